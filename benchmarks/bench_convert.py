@@ -0,0 +1,66 @@
+import os
+import sys
+import shutil
+import tempfile
+
+# Бенчмарк конвертации звуков в формат движка (Convert Sounds to Source Format): реплики 48 кГц / 24 бит стерео
+# (2-5 секунд) переводятся в 44.1 кГц / 16 бит моно - один процесс против пула процессов. Скорость - в файлах
+# и секундах звука за секунду работы. Заодно проверка: у синуса после ресемплинга та же частота и уровень.
+# Нужен NumPy. Запуск: python benchmarks/bench_convert.py [число файлов]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import soundscripts_core
+import soundscripts_audio
+
+# WAV 24 бит из кадров float
+def write_wav24(path, samples, rate):
+    np = soundscripts_audio.np
+    values = np.round(np.clip(samples, -1, 1) * 8388607).astype("<i4").ravel()
+    data = values.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    channels = samples.shape[1]
+    fmt = (1).to_bytes(2, "little") + channels.to_bytes(2, "little") + rate.to_bytes(4, "little") + (rate * channels * 3).to_bytes(4, "little") + (channels * 3).to_bytes(2, "little") + (24).to_bytes(2, "little")
+    body = b"WAVE" + b"fmt " + len(fmt).to_bytes(4, "little") + fmt + b"data" + len(data).to_bytes(4, "little") + data + (b"\0" if len(data) & 1 else b"")
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + len(body).to_bytes(4, "little") + body)
+
+def make_files(folder, count, generator):
+    np = soundscripts_audio.np
+    paths = []
+    for i in range(count):
+        frames = int(48000 * generator.uniform(2, 5))
+        samples = generator.standard_normal((frames, 2), dtype=np.float32) * 0.1
+        path = os.path.join(folder, f"line_{i}.wav")
+        write_wav24(path, samples, 48000)
+        paths.append(path)
+    return paths
+
+def main():
+    if not soundscripts_audio.available():
+        print("NumPy is not installed (pip install numpy)")
+        return 1
+    np = soundscripts_audio.np
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    tmp_dir = tempfile.mkdtemp()
+
+    # Проверка ресемплинга: синус 1 кГц
+    sine = os.path.join(tmp_dir, "sine.wav")
+    write_wav24(sine, np.sin(2 * np.pi * 1000 * np.arange(48000) / 48000)[:, None] * 0.5, 48000)
+    soundscripts_audio.conform_files([sine], jobs=1)
+    samples, rate = soundscripts_audio.read_wav_samples(sine)
+    spectrum = np.abs(np.fft.rfft(samples[:, 0]))
+    print(f"1 kHz sine after 48 -> {rate} Hz: peak at {np.argmax(spectrum) * rate / len(samples):.1f} Hz, level {np.abs(samples).max():.4f} (expected 0.5)")
+
+    for jobs in sorted({1, os.cpu_count() or 1}):
+        folder = os.path.join(tmp_dir, f"jobs_{jobs}")
+        os.makedirs(folder)
+        paths = make_files(folder, count, np.random.default_rng(0))
+        converted, errors, seconds = soundscripts_audio.conform_files(paths, mono=True, jobs=jobs)
+        audio = sum(info[2] for info in converted.values() if info)
+        conforming = sum(1 for path in paths if not soundscripts_audio.conform_problems(soundscripts_core.read_wav_header(path), mono=True))
+        print(f"{jobs:3d} processes: {len(converted)} files, {audio:.0f} s of audio in {seconds * 1000:8.1f} ms"
+              f" = {len(converted) / seconds:6.1f} files/s, {audio / seconds:6.1f} audio-s/s ({len(errors)} errors, {conforming} conform now)")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+# Бенчмарк памяти при записи нового файла: старый дамп (список строк, "\n".join, replace под переводы строк системы
+# и запись одной строкой) против потокового iter_dump_soundscript прямо в буферизованный файл.
+# Пик считается через tracemalloc сверх уже загруженных нод. Заодно проверяется что файлы совпадают байт в байт.
+# Запуск: python benchmarks/bench_dump_memory.py [число нод]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import soundscripts_core
+from soundscript_gen import generate_soundscript
+
+# Как писалось раньше: весь текст в списке, потом склейка, потом replace, потом запись
+def old_dump(items, path):
+    out = []
+    out.append(f'// Generated by {soundscripts_core.ABOUT_TOOL_NAME}')
+    out.append(f'// {soundscripts_core.ABOUT_TOOL_DESCRIPTION}')
+    out.append(f'// {soundscripts_core.ABOUT_TOOL_AUTHOR}')
+    out.append(f'// {soundscripts_core.ABOUT_TOOL_REQUESTED}')
+    out.append(f'// {soundscripts_core.ABOUT_TOOL_LINK}')
+    out.append(f'// {soundscripts_core.ABOUT_TOOL_DISCORD}\n')
+    for r in items:
+        out.append(soundscripts_core.format_entry(r) + "\n")
+    content = "\n".join(out).replace("\n", os.linesep)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+
+def new_dump(items, path):
+    soundscripts_core.write_text_atomic(path, soundscripts_core.iter_dump_soundscript(items, os.linesep))
+
+# (секунды, пик памяти в байтах)
+def measure(func, items, path):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    func(items, path)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    items = soundscripts_core.parse_soundscript(generate_soundscript(count, fanout=4, seed=count))
+    tmp_dir = tempfile.mkdtemp()
+    old_path = os.path.join(tmp_dir, "old.txt")
+    new_path = os.path.join(tmp_dir, "new.txt")
+
+    results = [("list + join", measure(old_dump, items, old_path)), ("streaming", measure(new_dump, items, new_path))]
+    size = os.path.getsize(old_path)
+    print(f"{len(items)} entries, {size / (1024 * 1024):.2f} MB on disk")
+    for name, (seconds, peak) in results:
+        print(f"{name:<12} {seconds * 1000:9.1f} ms   peak {peak / (1024 * 1024):8.2f} MB ({peak / size:.2f}x file size)")
+    with open(old_path, "rb") as a, open(new_path, "rb") as b:
+        print(f"byte-identical: {a.read() == b.read()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
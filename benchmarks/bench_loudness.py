@@ -0,0 +1,58 @@
+import os
+import sys
+import wave
+import random
+import shutil
+import tempfile
+
+# Бенчмарк анализа громкости (Suggest Volume by Loudness): синтетические реплики 16 бит (шум с огибающей на разной
+# громкости, 1-6 секунд, моно и стерео, 22/44 кГц), один процесс против пула процессов. Скорость - в часах звука
+# на секунду работы. Заодно проверка уровня: синус 997 Гц на полной шкале должен дать -3.01 LUFS.
+# Нужен NumPy. Запуск: python benchmarks/bench_loudness.py [число файлов]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import soundscripts_audio
+
+def write_wav(path, samples, rate):
+    np = soundscripts_audio.np
+    with wave.open(path, "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+def main():
+    if not soundscripts_audio.available():
+        print("NumPy is not installed (pip install numpy)")
+        return 1
+    np = soundscripts_audio.np
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rnd = random.Random(0)
+    generator = np.random.default_rng(0)
+    tmp_dir = tempfile.mkdtemp()
+    paths = []
+    for i in range(count):
+        rate = rnd.choice((22050, 44100))
+        frames = int(rate * rnd.uniform(1, 6))
+        envelope = np.abs(np.sin(np.linspace(0, rnd.uniform(3, 12), frames)))[:, None]
+        level = 10 ** (rnd.uniform(-30, -6) / 20)
+        samples = generator.standard_normal((frames, rnd.choice((1, 2))), dtype=np.float32) * envelope * level
+        path = os.path.join(tmp_dir, f"line_{i}.wav")
+        write_wav(path, samples, rate)
+        paths.append(path)
+    sine = os.path.join(tmp_dir, "sine.wav")
+    write_wav(sine, np.sin(2 * np.pi * 997 * np.arange(48000 * 3) / 48000)[:, None] * (32767 / 32768), 48000)
+
+    found, _, _ = soundscripts_audio.analyze_files([sine], jobs=1)
+    print(f"997 Hz full scale sine: {found[sine][2]:.2f} LUFS (expected -3.01)")
+    size = sum(os.path.getsize(path) for path in paths)
+    for jobs in sorted({1, os.cpu_count() or 1}):
+        found, errors, seconds = soundscripts_audio.analyze_files(paths, jobs=jobs)
+        audio = sum(result[3] for result in found.values())
+        print(f"{jobs:3d} processes: {len(found)} files, {audio / 60:.1f} min of audio, {size / (1024 * 1024):.1f} MB in {seconds * 1000:8.1f} ms"
+              f" = {soundscripts_audio.audio_hours_per_second(found, seconds):6.2f} audio-hours/s ({len(errors)} errors)")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import os
+import sys
+import random
+import tracemalloc
+
+# Бенчмарк памяти: список словарей (как раньше жили ноды в App.items) против компактных SoundEntry
+# Запуск: python benchmarks/bench_memory.py [размеры через запятую]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from soundscripts_core import SoundEntry, CHANNELS_LIST, SNDLVLS_LIST, VOLUME_LIST, PITCH_LIST
+
+# Новый объект строки на каждый вызов - так же, как их отдаёт парсер (группы регулярок не переиспользуются)
+def fresh(value):
+    return "".join(list(value))
+
+# Значения полей для i-й ноды: имя, перечислимые поля и 1-4 звука, часть путей повторяется между нодами
+def entry_values(i, rnd):
+    sounds = [fresh(f"vo/npc/line_{rnd.randrange(i + 1)}.wav") for _ in range(rnd.randint(1, 4))]
+    return (
+        fresh(f"npc.line_{i}"),
+        fresh(rnd.choice(CHANNELS_LIST)),
+        fresh(rnd.choice(VOLUME_LIST)),
+        fresh(rnd.choice(SNDLVLS_LIST)),
+        fresh(rnd.choice(PITCH_LIST)),
+        sounds,
+    )
+
+def build_dicts(count):
+    rnd = random.Random(count)
+    items = []
+    for i in range(count):
+        name, channel, volume, soundlevel, pitch, sounds = entry_values(i, rnd)
+        items.append({"entry_name": name, "channel": channel, "volume": volume, "soundlevel": soundlevel, "pitch": pitch, "sounds": sounds})
+    return items
+
+def build_entries(count):
+    rnd = random.Random(count)
+    items = []
+    for i in range(count):
+        name, channel, volume, soundlevel, pitch, sounds = entry_values(i, rnd)
+        items.append(SoundEntry(name, channel, volume, soundlevel, pitch, sounds))
+    return items
+
+# Сколько памяти держит результат build(count)
+def measure(build, count):
+    tracemalloc.start()
+    items = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size
+
+def main():
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000, 1000000]
+    print(f"{'entries':>9} {'dicts MB':>10} {'entries MB':>11} {'B/entry':>16} {'ratio':>6}")
+    for count in sizes:
+        old = measure(build_dicts, count)
+        new = measure(build_entries, count)
+        print(f"{count:>9} {old / 2**20:>10.1f} {new / 2**20:>11.1f} {old // count:>7} -> {new // count:<6} {old / new:>6.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import os
+import re
+import sys
+import time
+import random
+from typing import List, Dict, Any
+
+# Бенчмарк парсера: пропускная способность в MB/s нового токенайзера против старого пути на регулярках
+# Запуск: python benchmarks/bench_parse.py [количество нод]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from soundscripts_core import parse_soundscript
+
+# Старый парсер из App.parse_soundscript (до токенайзера), оставлен тут только для сравнения
+def parse_soundscript_regex(text) -> List[Dict[str, Any]]:
+    items = []
+    block_pattern = re.compile(r'"([^"]+)"\s*\{([^}]*)\}', re.DOTALL)
+    for match in block_pattern.finditer(text):
+        entry_name = match.group(1)
+        body = match.group(2)
+        item: Dict[str, Any] = {"entry_name": entry_name, "channel": "", "volume": "", "soundlevel": "", "pitch": "", "sounds": []}
+        if "rndwave" in body:
+            rnd_pattern = re.compile(r'"wave"\s+"([^"]+)"')
+            item["sounds"] = rnd_pattern.findall(body)
+        else:
+            wave_match = re.search(r'"wave"\s+"([^"]+)"', body)
+            if wave_match:
+                item["sounds"] = [wave_match.group(1)]
+        channel_match = re.search(r'"channel"\s+"([^"]+)"', body)
+        if channel_match:
+            item["channel"] = channel_match.group(1)
+        volume_match = re.search(r'"volume"\s+"([^"]+)"', body)
+        if volume_match:
+            item["volume"] = volume_match.group(1)
+        soundlevel_match = re.search(r'"soundlevel"\s+"([^"]+)"', body)
+        if soundlevel_match:
+            item["soundlevel"] = soundlevel_match.group(1)
+        pitch_match = re.search(r'"pitch"\s+"([^"]+)"', body)
+        if pitch_match:
+            item["pitch"] = pitch_match.group(1)
+        items.append(item)
+    return items
+
+# Простенький генератор саундскрипта в формате редактора
+def make_soundscript(count, seed=0):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(count):
+        out.append(f'"bench.entry_{i}"\n{{')
+        out.append('\t"channel"\t\t"CHAN_VOICE"')
+        out.append('\t"volume"\t\t"1"')
+        out.append('\t"soundlevel"\t"SNDLVL_NORM"')
+        out.append('\t"pitch"\t\t\t"PITCH_NORM"')
+        waves = rnd.randint(1, 4)
+        if waves == 1:
+            out.append(f'\t"wave"\t\t\t"bench/line_{i}.wav"')
+        else:
+            out.append('\t"rndwave"\n\t\t{')
+            for w in range(waves):
+                out.append(f'\t\t"wave"\t"bench/line_{i}_{w}.wav"')
+            out.append('\t}')
+        out.append('}\n')
+    return "\n".join(out)
+
+# Лучшее время из нескольких прогонов
+def best_time(func, text, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(text)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    text = make_soundscript(count)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    # Оба парсера должны давать одинаковый результат на простом файле
+    assert [item.to_dict() for item in parse_soundscript(text)] == parse_soundscript_regex(text)
+
+    print(f"{count} entries, {size_mb:.2f} MB")
+    for name, func in (("regex (old)", parse_soundscript_regex), ("tokenizer", parse_soundscript)):
+        dt = best_time(func, text)
+        print(f"{name:<12} {dt * 1000:9.1f} ms  {size_mb / dt:8.2f} MB/s")
+
+if __name__ == '__main__':
+    main()
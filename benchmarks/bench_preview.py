@@ -0,0 +1,74 @@
+import os
+import sys
+import wave
+import shutil
+import statistics
+import tempfile
+
+# Бенчмарк прослушивания (Space в таблице): время до первого сэмпла без кэша (файл декодируется) и из кэша
+# декодированных звуков, на реплике без pitch и с pitch 120 (интерполяция по блокам). Вывод - null (без звуковой
+# карты, блоки принимаются мгновенно), так что меряется сам движок; с sounddevice добавится задержка устройства.
+# Заодно проверка: вывод в файл с pitch 200 даёт звук вдвое короче на половине громкости.
+# Нужен NumPy. Запуск: python benchmarks/bench_preview.py [число файлов]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import soundscripts_audio
+import soundscripts_playback
+
+def write_wav(path, samples, rate):
+    np = soundscripts_audio.np
+    with wave.open(path, "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+# Время до первого сэмпла и время декодирования по каждому файлу, мс
+def first_samples(player, tasks, pitch):
+    times = []
+    decodes = []
+    for path in tasks:
+        playback = player.play(path, gain=0.8, pitch=pitch)
+        playback.finished.wait()
+        times.append(playback.first_sample * 1000)
+        decodes.append(playback.decode_seconds * 1000)
+    return times, decodes
+
+def main():
+    if not soundscripts_audio.available():
+        print("NumPy is not installed (pip install numpy)")
+        return 1
+    np = soundscripts_audio.np
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    generator = np.random.default_rng(0)
+    tmp_dir = tempfile.mkdtemp()
+    tasks = []
+    for i in range(count):
+        rate = (22050, 44100)[i % 2]
+        samples = generator.standard_normal((int(rate * generator.uniform(1, 6)), 1 + i % 2), dtype=np.float32) * 0.2
+        path = os.path.join(tmp_dir, f"line_{i}.wav")
+        write_wav(path, samples, rate)
+        tasks.append(path)
+    print(f"{count} WAV files, {sum(os.path.getsize(path) for path in tasks) / (1024 * 1024):.1f} MB")
+
+    for pitch in (100, 120):
+        player = soundscripts_playback.PreviewPlayer(soundscripts_playback.NullOutput())
+        cold, cold_decodes = first_samples(player, tasks, pitch)
+        warm, warm_decodes = first_samples(player, tasks, pitch)
+        print(f"pitch {pitch}: first sample, decoded  median {statistics.median(cold):6.2f} ms   max {max(cold):6.2f} ms   (decode median {statistics.median(cold_decodes):6.3f} ms)")
+        print(f"pitch {pitch}: first sample, cached   median {statistics.median(warm):6.2f} ms   max {max(warm):6.2f} ms   (lookup median {statistics.median(warm_decodes):6.3f} ms)"
+              f"   ({len(player.buffers.buffers)} sounds, {player.buffers.bytes / (1024 * 1024):.1f} MB in cache)")
+
+    # Проверка volume и pitch через вывод в файл
+    sine = os.path.join(tmp_dir, "sine.wav")
+    write_wav(sine, np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:, None] * 0.8, 44100)
+    sink = os.path.join(tmp_dir, "sink.wav")
+    player = soundscripts_playback.PreviewPlayer(soundscripts_playback.FileSinkOutput(sink))
+    player.play(sine, gain=0.5, pitch=200).finished.wait()
+    samples, rate = soundscripts_audio.read_wav_samples(sink)
+    print(f"file sink, pitch 200 and volume 0.5: {len(samples) / rate:.3f} s (expected 0.500), peak {np.abs(samples).max():.3f} (expected 0.400)")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Бенчмарк повторного открытия через кэш разбора: первое открытие (чтение, разбор, запись в кэш) против
+# повторного (чтение, проверка свежести, ноды из кэша). Для сравнения - сборка данных таблицы (table_data),
+# без которой окно всё равно не покажет ноды.
+# Запуск: python benchmarks/bench_reopen.py [размер в MB]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import soundscripts_core
+from soundscript_gen import generate_soundscript
+
+# То же что App.open_job, без окна
+def open_file(path, cache):
+    with open(path, "rb") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        data = f.read()
+    text = data.decode("utf-8")
+    entries = cache.load(path, data, mtime_ns)
+    if entries is not None:
+        return soundscripts_core.SoundscriptDocument(text, entries=entries), True
+    document = soundscripts_core.SoundscriptDocument(text)
+    cache.store(path, data, mtime_ns, [(item, *document.spans[id(item)][1:]) for item in document.items])
+    return document, False
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    text = generate_soundscript(int(size_mb * 1024 * 1024 / 210), fanout=4, comments=0.05, unusual=0.02, seed=3)
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, "game_sounds_big.txt")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    cache = soundscripts_core.ParseCache(os.path.join(tmp_dir, "parse_cache"))
+
+    cold, (document, hit) = timed(lambda: open_file(path, cache))
+    print(f"{len(document.items)} entries, {os.path.getsize(path) / (1024 * 1024):.2f} MB")
+    print(f"first open (parse + store) {cold * 1000:9.1f} ms   cache hit: {hit}")
+    warm = None
+    for _ in range(3):
+        seconds, (reopened, hit) = timed(lambda: open_file(path, cache))
+        warm = seconds if warm is None else min(warm, seconds)
+    print(f"reopen (cache)             {warm * 1000:9.1f} ms   cache hit: {hit}")
+    # Файл тронули (другой mtime), но содержимое то же - попадание через хэш
+    os.utime(path, ns=(0, 0))
+    seconds, (_, hit) = timed(lambda: open_file(path, cache))
+    print(f"reopen (touched file)      {seconds * 1000:9.1f} ms   cache hit: {hit}")
+    table, _ = timed(lambda: soundscripts_core.table_data(reopened.items))
+    print(f"table_data                 {table * 1000:9.1f} ms")
+    same = [item.to_dict() for item in reopened.items] == [item.to_dict() for item in document.items]
+    print(f"same entries: {same}, cache size {sum(entry.stat().st_size for entry in os.scandir(cache.folder)) / (1024 * 1024):.2f} MB")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
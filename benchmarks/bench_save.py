@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Бенчмарк сохранения: полный дамп всех нод против точечного сохранения через SoundscriptDocument
+# (изменена одна нода) и против простого копирования файла.
+# Запуск: python benchmarks/bench_save.py [размер в MB]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from soundscripts_core import SoundscriptDocument, format_entry
+from bench_parse import make_soundscript
+
+# Лучшее время из нескольких прогонов
+def best_time(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    # ~205 байт на ноду у генератора
+    count = int(size_mb * 1024 * 1024 / 205)
+    text = make_soundscript(count)
+    doc = SoundscriptDocument(text)
+    items = doc.items
+    print(f"{len(items)} entries, {len(text.encode('utf-8')) / (1024 * 1024):.2f} MB")
+
+    tmp_dir = tempfile.mkdtemp()
+    src = os.path.join(tmp_dir, "src.txt")
+    dst = os.path.join(tmp_dir, "dst.txt")
+    with open(src, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+    # Полный дамп, как делал dump_soundscript_from_items
+    def full_dump():
+        content = "\n".join(format_entry(r) + "\n" for r in items)
+        with open(dst, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+    # Одна изменённая нода
+    def incremental():
+        item = items[len(items) // 2]
+        item["volume"] = "0.5" if item["volume"] != "0.5" else "0.7"
+        doc.mark_dirty(item)
+        content = doc.render(items)
+        with open(dst, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+    def copy():
+        shutil.copyfile(src, dst)
+
+    for name, func in (("full dump", full_dump), ("1 dirty", incremental), ("file copy", copy)):
+        dt = best_time(func)
+        print(f"{name:<10} {dt * 1000:9.1f} ms")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
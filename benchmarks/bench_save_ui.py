@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import heapq
+import shutil
+import tempfile
+
+# Бенчмарк отзывчивости окна во время сохранения большого скрипта (~50 MB): главный цикл окна изображает
+# маленький планировщик в духе after() с тиком каждые 10 мс, а сохранение идёт либо прямо в главном потоке
+# (как было до фоновых задач), либо через JobRunner + write_text_atomic, как сейчас. Смотрим на сколько опаздывают
+# тики: опоздание тика = сколько окно не перерисовывалось бы и не отвечало на клики.
+# Запуск: python benchmarks/bench_save_ui.py [размер в MB]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import soundscripts_core
+from soundscripts_jobs import JobRunner
+from soundscript_gen import generate_soundscript
+
+TICK_MS = 10
+
+# Главный цикл окна: таймеры по времени, как after() у ткинтера
+class Loop:
+    def __init__(self):
+        self.timers = []
+        self.seq = 0
+        self.late = []
+
+    def after(self, ms, callback):
+        self.seq += 1
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, self.seq, callback))
+
+    # Тик окна: запоминаем насколько он опоздал относительно плана (due) и ставим следующий
+    def tick(self, due):
+        now = time.perf_counter()
+        self.late.append(max(0.0, now - due))
+        self.after(TICK_MS, lambda: self.tick(now + TICK_MS / 1000))
+
+    def run_until(self, done):
+        first = time.perf_counter() + TICK_MS / 1000
+        self.after(TICK_MS, lambda: self.tick(first))
+        while not done():
+            due, _, callback = heapq.heappop(self.timers)
+            wait = due - time.perf_counter()
+            if wait > 0: time.sleep(wait)
+            callback()
+        # Таймеры, которые уже просрочены к концу (тик, который ждал пока главный поток сохранял)
+        while self.timers and self.timers[0][0] <= time.perf_counter():
+            heapq.heappop(self.timers)[2]()
+
+def report(name, loop, seconds):
+    late = sorted(loop.late) or [0.0]
+    p99 = late[min(len(late) - 1, int(len(late) * 0.99))]
+    print(f"{name:<22} save {seconds * 1000:8.1f} ms   ticks {len(late):5d}   late p99 {p99 * 1000:7.1f} ms   max {late[-1] * 1000:7.1f} ms")
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    # ~210 байт на ноду у генератора с fanout=4
+    text = generate_soundscript(int(size_mb * 1024 * 1024 / 210), fanout=4, comments=0.05, seed=1)
+    document = soundscripts_core.SoundscriptDocument(text)
+    items = document.items
+    print(f"{len(items)} entries, {len(text.encode('utf-8')) / (1024 * 1024):.2f} MB")
+
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, "big.txt")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+    # Правим каждую сотую ноду, чтобы render было что собирать
+    def touch():
+        for item in items[::100]:
+            item.volume = "0.5" if item.volume != "0.5" else "0.7"
+            document.mark_dirty(item)
+
+    # То же что App.save_job: render, потом запись с резервной копией
+    def save(job=None):
+        content = document.render(items)
+        if job: job.edits_allowed = True
+        chunks = (content[pos:pos + (1 << 20)] for pos in range(0, len(content), 1 << 20))
+        soundscripts_core.write_text_atomic(path, chunks, backups=1, progress=job and (lambda done: job.set_progress(done, len(content))))
+
+    # Было: сохранение прямо в главном потоке - пока оно идёт, ни один тик не проходит
+    touch()
+    loop = Loop()
+    finished = []
+    def blocking():
+        started = time.perf_counter()
+        save()
+        finished.append(time.perf_counter() - started)
+    loop.after(TICK_MS // 2, blocking)
+    loop.run_until(lambda: finished)
+    report("main thread", loop, finished[0])
+
+    # Сейчас: фоновая задача, главный цикл только опрашивает её через after()
+    touch()
+    loop = Loop()
+    runner = JobRunner(loop.after)
+    finished = []
+    started = time.perf_counter()
+    runner.submit("Saving", save, on_done=lambda result: finished.append(time.perf_counter() - started))
+    loop.run_until(lambda: finished)
+    report("background job", loop, finished[0])
+    runner.shutdown()
+
+    print(f"backup kept: {os.path.exists(soundscripts_core.backup_path(path))}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
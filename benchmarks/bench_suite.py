@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+
+# Набор бенчмарков на синтетических саундскриптах: разбор, дамп, данные таблицы, имена при импорте, проверка звуков,
+# поиск, фильтр и сортировка на 1k/10k/100k нод. Результаты можно сохранить как базовые (JSON) и потом сравнивать с ними:
+# если какой-то случай стал медленнее больше чем на порог - код возврата 1.
+# Базовые числа имеют смысл только на той же машине, где их сняли.
+# Запуск:
+#   python benchmarks/bench_suite.py --save                 # снять базовые числа в benchmarks/baseline.json
+#   python benchmarks/bench_suite.py --compare              # сравнить с ними (порог 25%)
+#   python benchmarks/bench_suite.py --sizes 1000,10000 --compare --threshold 0.15
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import soundscripts_core
+from soundscript_gen import generate_soundscript, generate_wav_paths
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25 # на сколько можно стать медленнее (доля)
+MIN_DELTA = 0.002 # разницу меньше 2 мс не считаем регрессией - на маленьких случаях это шум
+GAMEINFO_FOLDER = os.path.normcase(os.path.abspath(os.path.join(os.sep, "bench", "mymod")))
+
+# Лучшее время из нескольких прогонов (на больших размерах прогонов меньше)
+def best_time(func, size):
+    repeat = 5 if size <= 10000 else 3
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+# Импорт: разбор путей и уникальные имена, как в App.add_files
+def import_names(paths):
+    resolved, _ = soundscripts_core.resolve_sound_files(paths, GAMEINFO_FOLDER)
+    names = soundscripts_core.EntryNameIndex()
+    for row, (file_name, _) in enumerate(resolved):
+        names.add(names.unique_name(file_name), row)
+    return names
+
+# Случаи для одного размера: имя -> функция без аргументов
+def build_cases(size):
+    text = generate_soundscript(size, fanout=4, comments=0.05, unusual=0.02, seed=size)
+    items = soundscripts_core.parse_soundscript(text)
+    # Разделители из слэшей в каждой десятой ноде, и в ноде с необычными ключами тоже (быстрый путь откатывается)
+    separated = generate_soundscript(size, fanout=4, comments=0.05, unusual=0.2, seed=size, separators=0.1)
+    paths = generate_wav_paths(size, GAMEINFO_FOLDER, seed=size)
+    # Индекс папки sound, в котором есть только каждый второй звук
+    index = soundscripts_core.SoundFileIndex(os.path.join(GAMEINFO_FOLDER, "sound"))
+    waves = [wave for item in items for wave in item.sounds]
+    index.files = {soundscripts_core.sound_key(wave): (wave, 0, 0) for wave in waves[::2]}
+    validator = soundscripts_core.SoundValidator(index)
+    # Поиск по уже построенному индексу: редкая подстрока, частая подстрока и начало пути
+    search = soundscripts_core.SearchIndex()
+    search.search(items, "x")
+    rare = f"bench.npc_{size // 2}"
+    # Фильтр по уже построенным индексам столбцов
+    columns = soundscripts_core.ColumnIndex()
+    by_fields = soundscripts_core.RowFilter("channel=CHAN_VOICE soundlevel=SNDLVL_NORM|SNDLVL_75dB")
+    by_fields.rows(items, columns)
+    by_name = soundscripts_core.RowFilter("bench.npc_*")
+    # Сортировка с нуля (ключи считаются заново) и шаг вставки после правки одной ноды
+    sorted_keys = soundscripts_core.SortKeys()
+    pitch_order = sorted_keys.order(items, "pitch")
+    def sort_reinsert():
+        row = size // 3
+        items[row].pitch = "PITCH_HIGH" if items[row].pitch != "PITCH_HIGH" else "50"
+        sorted_keys.touch(items, row, ["pitch"])
+        sorted_keys.reinsert(items, pitch_order, row, "pitch")
+    return {
+        "parse": lambda: soundscripts_core.parse_soundscript(text),
+        "parse_separators": lambda: soundscripts_core.parse_soundscript(separated),
+        "dump": lambda: soundscripts_core.dump_soundscript(items),
+        "table_data": lambda: soundscripts_core.table_data(items),
+        "import_names": lambda: import_names(paths),
+        "validate_sounds": lambda: validator.validate_all(items),
+        "search_rare": lambda: search.search(items, rare),
+        "search_common": lambda: search.search(items, "npc"),
+        "search_prefix": lambda: search.search(items, "vo/npc/line_1", "prefix"),
+        "filter_fields": lambda: by_fields.rows(items, columns),
+        "filter_name": lambda: by_name.rows(items, columns),
+        "sort_name": lambda: soundscripts_core.SortKeys().order(items, "entry_name"),
+        "sort_pitch": lambda: soundscripts_core.SortKeys().order(items, "pitch"),
+        "sort_reinsert": sort_reinsert,
+    }
+
+def run(sizes):
+    results = {}
+    for size in sizes:
+        for name, func in build_cases(size).items():
+            key = f"{name}@{size}"
+            results[key] = best_time(func, size)
+            print(f"{key:<22} {results[key] * 1000:10.2f} ms")
+    return results
+
+# Сравнение с базовыми числами, возвращает список регрессий
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n{'case':<22} {'baseline':>10} {'now':>10} {'change':>8}")
+    for key, now in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<22} {'-':>10} {now * 1000:8.2f}ms {'new':>8}")
+            continue
+        change = now / base - 1
+        regressed = change > threshold and now - base > MIN_DELTA
+        print(f"{key:<22} {base * 1000:8.2f}ms {now * 1000:8.2f}ms {change * 100:+7.1f}%{'  REGRESSION' if regressed else ''}")
+        if regressed: regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Soundscripts Editor benchmark suite")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="entry counts, comma separated")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="save results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline, exit code 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown as a fraction (default: 0.25)")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.sizes.split(",")])
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}, run with --save first!")
+            return 1
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            return 1
+        print(f"\nNo regressions over {args.threshold * 100:.0f}%")
+
+    if args.save:
+        # Старые случаи, которые не гоняли в этот раз, остаются в файле
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.platform(), "results": baseline}, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
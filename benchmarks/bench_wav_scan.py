@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import wave
+import shutil
+import tempfile
+
+# Бенчмарк чтения заголовков WAV (столбцы duration/rate/bits/ch): папка sound с ~20k озвучки (по умолчанию),
+# первый скан в пуле потоков против одного потока, и повторный скан по тем же файлам (всё из кэша по размеру и mtime,
+# которые берутся у каждого файла - перезаписанный на месте файл читается заново).
+# Файлы короткие, но с чанком LIST перед data - как у файлов из редакторов звука. Кэш страниц ОС после записи
+# тёплый, так что "холодный" скан тут - это чтение заголовков без диска; с настоящего диска потоки выигрывают больше.
+# Запуск: python benchmarks/bench_wav_scan.py [число файлов]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import soundscripts_core
+
+# Один WAV: fmt, LIST и data на frames сэмплов
+def write_wav(path, rate, channels, bits, frames):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(bits // 8)
+        f.setframerate(rate)
+        f.writeframes(b"\0" * (frames * channels * bits // 8))
+    # Вставляем LIST перед data, как это делают редакторы звука
+    with open(path, "rb") as f:
+        data = f.read()
+    info = b"INFOISFT\x0e\x00\x00\x00bench writer\x00\x00"
+    chunk = b"LIST" + len(info).to_bytes(4, "little") + info
+    body = data[12:36] + chunk + data[36:]
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + (len(body) + 4).to_bytes(4, "little") + b"WAVE" + body)
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tmp_dir = tempfile.mkdtemp()
+    sound_folder = os.path.join(tmp_dir, "sound")
+    waves = []
+    for i in range(count):
+        folder = ("vo/npc", "vo/citizens", "ambient/levels")[i % 3]
+        os.makedirs(os.path.join(sound_folder, folder), exist_ok=True)
+        wave_path = f"{folder}/line_{i}.wav"
+        write_wav(os.path.join(sound_folder, wave_path), (22050, 44100)[i % 2], 1 + i % 2, 16, 64 + i % 500)
+        waves.append(wave_path)
+    files = soundscripts_core.SoundFileIndex(sound_folder)
+    files.refresh()
+    print(f"{count} WAV files")
+
+    single, _ = timed(lambda: soundscripts_core.WavInfoIndex(sound_folder).scan(files, waves, workers=1))
+    index = soundscripts_core.WavInfoIndex(sound_folder)
+    pooled, scanned = timed(lambda: index.scan(files, waves))
+    print(f"scan, 1 thread            {single * 1000:9.1f} ms")
+    print(f"scan, {soundscripts_core.WAV_SCAN_WORKERS} threads          {pooled * 1000:9.1f} ms   ({len(scanned)} read)")
+    again, scanned = timed(lambda: index.scan(files, waves))
+    print(f"rescan (cached)           {again * 1000:9.1f} ms   ({len(scanned)} read)")
+    # Файл перезаписан на месте (как после экспорта из редактора звука): mtime папки не меняется,
+    # но скан проверяет каждый файл сам
+    write_wav(os.path.join(sound_folder, waves[0]), 11025, 1, 8, 100)
+    os.utime(os.path.join(sound_folder, waves[0]), ns=(0, 1))
+    files.refresh()
+    _, scanned = timed(lambda: index.scan(files, waves))
+    print(f"rescan after rewrite in place: {len(scanned)} read, new rate {index.get(waves[0])[2]} Hz")
+    path = os.path.join(tmp_dir, "wav_info.json")
+    saved, _ = timed(lambda: index.save(path))
+    loaded, reloaded = timed(lambda: soundscripts_core.WavInfoIndex.load(path, sound_folder))
+    print(f"save / load JSON          {saved * 1000:9.1f} / {loaded * 1000:.1f} ms")
+
+    # Проверка против модуля wave
+    bad = 0
+    for wave_path in waves[::97]:
+        with wave.open(os.path.join(sound_folder, wave_path), "rb") as f:
+            expected = (f.getnchannels(), f.getframerate(), f.getsampwidth() * 8, f.getnframes() / f.getframerate())
+        header = reloaded.get(wave_path)
+        if header is None or header[1:4] != expected[:3] or abs(header[4] - expected[3]) > 1e-9: bad += 1
+    print(f"headers match the wave module: {not bad}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import wave
+import shutil
+import tempfile
+
+# Бенчмарк миниатюр волны в столбце sounds: огибающие считаются заново (mmap + reduceat), читаются из кэша
+# на диске (память пустая, как после перезапуска) и берутся из LRU в памяти. Отдельно - сколько стоит дорисовать
+# один экран (40 строк) из памяти: это то, что делает главный поток при прокрутке.
+# Нужен NumPy. Запуск: python benchmarks/bench_waveforms.py [число файлов]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import soundscripts_audio
+
+SCREEN_ROWS = 40
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+def main():
+    if not soundscripts_audio.available():
+        print("NumPy is not installed (pip install numpy)")
+        return 1
+    np = soundscripts_audio.np
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    generator = np.random.default_rng(0)
+    tmp_dir = tempfile.mkdtemp()
+    tasks = []
+    for i in range(count):
+        rate = (22050, 44100)[i % 2]
+        frames = int(rate * generator.uniform(1, 6))
+        samples = generator.standard_normal(frames).astype(np.float32) * np.linspace(0.05, 0.4, frames, dtype=np.float32)
+        path = os.path.join(tmp_dir, f"line_{i}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+        tasks.append(path)
+    size = sum(os.path.getsize(path) for path in tasks)
+    print(f"{count} WAV files, {size / (1024 * 1024):.1f} MB")
+
+    cache_folder = os.path.join(tmp_dir, "waveforms")
+    cache = soundscripts_audio.WaveformCache(cache_folder, max_items=count)
+    cold, _ = timed(lambda: [cache.get(path) for path in tasks])
+    print(f"compute + store       {cold * 1000:9.1f} ms   {cold / count * 1e6:7.1f} us/file   {size / (1024 * 1024) / cold:7.1f} MB/s")
+    cache = soundscripts_audio.WaveformCache(cache_folder, max_items=count)
+    disk, _ = timed(lambda: [cache.get(path) for path in tasks])
+    print(f"from disk cache       {disk * 1000:9.1f} ms   {disk / count * 1e6:7.1f} us/file")
+    memory, _ = timed(lambda: [cache.peek(path) for path in tasks])
+    print(f"from memory (LRU)     {memory * 1000:9.1f} ms   {memory / count * 1e6:7.1f} us/file")
+    screen, _ = timed(lambda: [soundscripts_audio.waveform_text(cache.peek(path)) for path in tasks[:SCREEN_ROWS]])
+    print(f"one screen ({SCREEN_ROWS} rows)   {screen * 1000:9.2f} ms on the main thread")
+    print(f"example: {soundscripts_audio.waveform_text(cache.peek(tasks[0]))}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
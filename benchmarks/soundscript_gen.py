@@ -0,0 +1,109 @@
+import os
+import sys
+import random
+import argparse
+
+# Генератор синтетических саундскриптов для бенчмарков: количество нод, сколько звуков в rndwave,
+# доля комментариев и нод с необычными ключами (operator_stacks, [$WIN32], слова без кавычек, ключи в
+# верхнем регистре) и нод с линией-разделителем из слэшей (как в скриптах Valve - раньше на таких ноды с необычными
+# ключами разбирались экспоненциально долго). С одинаковым seed всегда получается один и тот же файл.
+# Запуск: python benchmarks/soundscript_gen.py OUT.txt --entries 10000 --fanout 6 --comments 0.1 --unusual 0.05 --separators 0.05
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from soundscripts_core import CHANNELS_LIST, SNDLVLS_LIST, VOLUME_LIST, PITCH_LIST
+
+SEPARATOR = "/" * 40 # линия-разделитель из скриптов Valve
+
+# Звуки одной ноды: от 1 до fanout штук
+def _sounds(rnd, index, fanout):
+    folder = rnd.choice(("vo/npc", "vo/citizens", "ambient/levels", "weapons/pistol", "physics/metal"))
+    return [f"{folder}/line_{index}_{w}.wav" for w in range(rnd.randint(1, fanout))]
+
+# Нода в том виде, в каком её пишет редактор
+def _plain_entry(rnd, name, sounds, out, separator=False):
+    out.append(f'"{name}"\n{{')
+    if separator: out.append(f'\t{SEPARATOR}')
+    out.append(f'\t"channel"\t\t"{rnd.choice(CHANNELS_LIST)}"')
+    if rnd.random() < 0.7: out.append(f'\t"volume"\t\t"{rnd.choice(VOLUME_LIST)}"')
+    out.append(f'\t"soundlevel"\t"{rnd.choice(SNDLVLS_LIST)}"')
+    if rnd.random() < 0.5: out.append(f'\t"pitch"\t\t\t"{rnd.choice(PITCH_LIST)}"')
+    if len(sounds) == 1:
+        out.append(f'\t"wave"\t\t\t"{sounds[0]}"')
+    else:
+        out.append('\t"rndwave"\n\t{')
+        for sound in sounds: out.append(f'\t\t"wave"\t"{sound}"')
+        out.append('\t}')
+    out.append('}\n')
+
+# Нода с тем, что встречается в ручных скриптах Valve и что быстрый путь парсера не берёт
+def _unusual_entry(rnd, name, sounds, out, separator=False):
+    kind = rnd.randrange(4)
+    out.append(f'"{name}"')
+    out.append('{')
+    if separator: out.append(f'\t{SEPARATOR}')
+    if kind == 0:
+        out.append('\t"CHANNEL"\t"CHAN_STATIC"')
+        out.append('\t"SoundLevel"\t"SNDLVL_NORM"')
+    else:
+        out.append(f'\t"channel"\t"{rnd.choice(CHANNELS_LIST)}"')
+        out.append('\t"soundlevel"\t"SNDLVL_75dB"')
+    if kind == 1:
+        out.append('\t"volume"\t"0.8" [$WIN32]')
+        out.append('\t"volume"\t"0.6" [$X360]')
+    if kind == 2:
+        out.append('\t"soundentry_version" "2"')
+        out.append('\t"operator_stacks"\n\t{\n\t\t"start_stack"\n\t\t{\n\t\t\t"import_stack" "P2_exclusion_time_blocker_start"\n\t\t}\n\t}')
+    if kind == 3:
+        out.append('\tpitch 100')
+    out.append('\t"rndwave"\n\t{')
+    for sound in sounds: out.append(f'\t\t"wave"\t"{sound}"')
+    out.append('\t}')
+    out.append('}\n')
+
+# Функция для генерации текста саундскрипта
+# separators - доля нод с разделителем из слэшей перед ними и первой строкой внутри
+def generate_soundscript(entries, fanout=4, comments=0.0, unusual=0.0, seed=0, newline="\n", separators=0.0):
+    rnd = random.Random(seed)
+    out = ["// Synthetic soundscript for benchmarks", f"// entries: {entries}, fanout: {fanout}, comments: {comments}, unusual: {unusual}, separators: {separators}, seed: {seed}\n"]
+    for i in range(entries):
+        if comments and rnd.random() < comments:
+            out.append(f"// Section {i}: {rnd.choice(('combat', 'idle', 'alert', 'pain', 'death'))} lines")
+        separator = bool(separators) and rnd.random() < separators
+        if separator: out.append(SEPARATOR)
+        name = f"bench.{rnd.choice(('npc', 'amb', 'weapon', 'phys'))}_{i}"
+        sounds = _sounds(rnd, i, fanout)
+        if unusual and rnd.random() < unusual:
+            _unusual_entry(rnd, name, sounds, out, separator)
+        else:
+            _plain_entry(rnd, name, sounds, out, separator)
+    text = "\n".join(out)
+    return text.replace("\n", newline) if newline != "\n" else text
+
+# Пути WAV файлов для бенчмарка импорта: часть имён повторяется в разных папках, чтобы работали суффиксы _N
+def generate_wav_paths(count, gameinfo_folder, duplicates=0.2, seed=0):
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(count):
+        base = rnd.randrange(max(1, i)) if i and rnd.random() < duplicates else i
+        folder = rnd.choice(("vo/npc", "vo/citizens", "ambient/levels"))
+        paths.append(os.path.join(gameinfo_folder, "sound", *folder.split("/"), f"Line ({base}) final.wav"))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic soundscript")
+    parser.add_argument("output")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--fanout", type=int, default=4, help="max sounds per entry (more than 1 gives rndwave)")
+    parser.add_argument("--comments", type=float, default=0.0, help="share of entries with a comment before them")
+    parser.add_argument("--unusual", type=float, default=0.0, help="share of entries with unusual keys")
+    parser.add_argument("--separators", type=float, default=0.0, help="share of entries with a slash separator line before and inside them")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--crlf", action="store_true", help="write CRLF line endings")
+    args = parser.parse_args()
+    text = generate_soundscript(args.entries, args.fanout, args.comments, args.unusual, args.seed, "\r\n" if args.crlf else "\n", args.separators)
+    with open(args.output, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    print(f"{args.output}: {args.entries} entries, {len(text.encode('utf-8')) / (1024 * 1024):.2f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+import os
+import math
+import mmap
+import time
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional
+
+import soundscripts_core
+
+# Анализ звука для редактора: чтение PCM из WAV через mmap и громкость (пик, RMS, интегральная громкость
+# в духе ITU-R BS.1770). Окна тут нет, модуль работает и в дочерних процессах пула.
+# NumPy необязателен: без него модуль импортируется, а функции анализа кидают RuntimeError.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LOUDNESS_BLOCK = 0.4 # окно для гейтинга громкости в секундах (BS.1770)
+LOUDNESS_STEP = 0.1 # шаг окна, перекрытие 75%
+LOUDNESS_ABSOLUTE_GATE = -70.0 # окна тише этого (LUFS) не считаются
+LOUDNESS_RELATIVE_GATE = -10.0 # и окна тише средней громкости на столько LU тоже
+SILENCE_DB = -120.0 # что пишем вместо минус бесконечности для полной тишины
+LOUDNESS_CHUNKSIZE = 16 # сколько файлов отдаём процессу пула за раз (озвучка - это тысячи коротких файлов)
+VOLUME_MIN = 0.05 # ниже этого предложенная громкость не опускается (тише - уже почти не слышно)
+
+# Есть ли NumPy (без него анализа нет)
+def available() -> bool:
+    return np is not None
+
+def _require_numpy():
+    if np is None: raise RuntimeError("NumPy is not installed (pip install numpy)")
+
+def _db(value) -> float:
+    return 20 * math.log10(value) if value > 0 else SILENCE_DB
+
+# Разбор WAV для чтения данных: (формат, каналы, частота, байт на сэмпл, где данные, кадров, обрезан ли файл).
+# Формат не PCM/float - ValueError
+def _pcm_layout(f):
+    format_tag, channels, rate, _, block_align, bits, offset, size = soundscripts_core.read_wav_layout(f)
+    if format_tag not in (soundscripts_core.WAV_FORMAT_PCM, soundscripts_core.WAV_FORMAT_FLOAT):
+        raise ValueError(f"unsupported WAV format {format_tag}")
+    if not channels or not block_align or block_align != channels * ((bits + 7) // 8):
+        raise ValueError(f"bad block align {block_align} for {channels} channels of {bits} bits")
+    # Обрезанный файл: data обещает больше чем есть - берём сколько есть
+    available = os.fstat(f.fileno()).st_size - offset
+    frames = max(0, min(size, available)) // block_align
+    return format_tag, channels, rate, block_align // channels, offset, frames, size > available
+
+# Вид NumPy на сэмплы прямо в mmap: (массив, смещение, множитель) - значение = (сэмпл - смещение) * множитель.
+# 24 бита так не лежат - для них массив int32 уже распакован (копия)
+def _pcm_view(mm, format_tag, width, count, offset):
+    if format_tag == soundscripts_core.WAV_FORMAT_FLOAT:
+        if width not in (4, 8): raise ValueError(f"unsupported float width {width * 8}")
+        return np.frombuffer(mm, dtype="<f4" if width == 4 else "<f8", count=count, offset=offset), 0, 1.0
+    if width == 1:
+        return np.frombuffer(mm, dtype=np.uint8, count=count, offset=offset), 128, 1 / 128
+    if width == 2:
+        return np.frombuffer(mm, dtype="<i2", count=count, offset=offset), 0, 1 / 32768
+    if width == 3:
+        raw = np.frombuffer(mm, dtype=np.uint8, count=count * 3, offset=offset).reshape(-1, 3)
+        # Три байта в int32 со знаком: сдвигаем в старшие байты и обратно
+        packed = (raw[:, 0].astype(np.int32) << 8) | (raw[:, 1].astype(np.int32) << 16) | (raw[:, 2].astype(np.int32) << 24)
+        return packed >> 8, 0, 1 / 8388608
+    if width == 4:
+        return np.frombuffer(mm, dtype="<i4", count=count, offset=offset), 0, 1 / 2147483648
+    raise ValueError(f"unsupported PCM width {width * 8}")
+
+# Функция для чтения PCM из WAV: (кадры x каналы в float32 от -1 до 1, частота).
+# Файл отображается в память и декодируется NumPy целиком, без чтения в bytes. Формат не PCM/float - ValueError
+def read_wav_samples(path) -> Tuple["np.ndarray", int]:
+    _require_numpy()
+    with open(path, "rb") as f:
+        format_tag, channels, rate, width, offset, frames, _ = _pcm_layout(f)
+        if not frames: return np.zeros((0, channels), dtype=np.float32), rate
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            raw, bias, scale = _pcm_view(mm, format_tag, width, frames * channels, offset)
+            samples = (raw.astype(np.float32) - bias) * scale if bias else raw.astype(np.float32) * scale
+            # Вид на mmap надо отпустить до его закрытия - samples уже своя копия
+            del raw
+    return samples.reshape(frames, channels), rate
+
+# Коэффициенты биквадов (b, a) взвешивания K на частоте rate: полка +4 дБ над ~1.7 кГц и срез ниже ~38 Гц.
+# Те же формулы что в libebur128 - на 48 кГц дают ровно коэффициенты из BS.1770, на других частотах пересчитываются
+def _k_filters(rate):
+    k = math.tan(math.pi * 1681.974450955533 / rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0), (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    k = math.tan(math.pi * 38.13547087602444 / rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    high_pass = (1.0, -2.0, 1.0), (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    return shelf, high_pass
+
+# Веса бинов rfft длины n для энергии после взвешивания K: |H|^2 и множители Парсеваля (бины кроме
+# нулевого и найквиста встречаются в спектре дважды). Энергия куска = сумма |X|^2 * веса
+@lru_cache(maxsize=32)
+def _k_energy_weights(n, rate):
+    z = np.exp(-1j * np.linspace(0, math.pi, n // 2 + 1))
+    response = np.ones(n // 2 + 1)
+    for b, a in _k_filters(rate):
+        response *= np.abs((b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)) ** 2
+    response[1:(n + 1) // 2] *= 2
+    return response / n
+
+# Функция для громкости звука: (пик dBFS, RMS dBFS, интегральная громкость LUFS).
+# Громкость приблизительная: взвешивание K делается не IIR фильтром (для него нужен scipy), а в спектре - каждый
+# кусок по 100 мс проходит через rfft (все куски одним вызовом) и его энергия считается по Парсевалю с весами АЧХ.
+# Дальше как в BS.1770 - окна по 400 мс (четыре куска) с шагом 100 мс, абсолютный гейт -70 LUFS и относительный -10 LU
+def measure_loudness(samples, rate) -> Tuple[float, float, float]:
+    _require_numpy()
+    frames = len(samples)
+    if not frames: return SILENCE_DB, SILENCE_DB, SILENCE_DB
+    peak = float(np.abs(samples).max())
+    rms = math.sqrt(float(np.mean(np.square(samples, dtype=np.float64))))
+    step = max(1, int(LOUDNESS_STEP * rate))
+    per_block = max(1, round(LOUDNESS_BLOCK / LOUDNESS_STEP))
+    count = frames // step
+    if count < per_block:
+        # Короче одного окна - считаем весь звук одним окном
+        step, count, per_block = frames, 1, 1
+    # (кусок, отсчёт, канал) -> спектры кусков -> энергия кусков (сумма по каналам, веса каналов 1)
+    pieces = samples[:count * step].reshape(count, step, -1)
+    spectrum = np.fft.rfft(pieces, axis=1)
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).sum(axis=2)
+    energy = power @ _k_energy_weights(step, rate)
+    # Энергия окна - среднее его кусков, окна идут с шагом в один кусок
+    totals = np.concatenate(([0.0], np.cumsum(energy)))
+    blocks = (totals[per_block:] - totals[:-per_block]) / (per_block * step)
+    gated = blocks[blocks > 10 ** ((LOUDNESS_ABSOLUTE_GATE + 0.691) / 10)]
+    if not len(gated): return _db(peak), _db(rms), SILENCE_DB
+    relative = -0.691 + 10 * math.log10(float(gated.mean())) + LOUDNESS_RELATIVE_GATE
+    gated = gated[gated > 10 ** ((relative + 0.691) / 10)]
+    loudness = -0.691 + 10 * math.log10(float(gated.mean())) if len(gated) else SILENCE_DB
+    return _db(peak), _db(rms), loudness
+
+# Воркер пула процессов: громкость одного файла. (путь, (пик, RMS, громкость, длительность), ошибка)
+def analyze_wav(path):
+    try:
+        samples, rate = read_wav_samples(path)
+        return path, (*measure_loudness(samples, rate), len(samples) / rate if rate else 0.0), None
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+# Функция для прогона func(задача) -> (путь, результат, ошибка) по задачам в пуле процессов (jobs - сколько, None - по ядрам).
+# progress(сделано, всего) может кинуть исключение чтобы прервать. Возвращает ({путь: результат}, [(путь, ошибка)], секунды)
+def _run_pool(func, tasks, jobs=None, progress=None, chunksize=1):
+    started = time.perf_counter()
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=min(jobs, len(tasks)))
+        results = pool.map(func, tasks, chunksize=chunksize)
+    else:
+        pool = None
+        results = map(func, tasks)
+    found = {}
+    errors = []
+    try:
+        for done, (path, result, error) in enumerate(results, start=1):
+            if error:
+                errors.append((path, error))
+            else:
+                found[path] = result
+            if progress is not None: progress(done, len(tasks))
+    finally:
+        if pool is not None: pool.shutdown(wait=False, cancel_futures=True)
+    return found, errors, time.perf_counter() - started
+
+# Функция для анализа громкости файлов в пуле процессов.
+# Возвращает ({путь: (пик, RMS, громкость, длительность)}, [(путь, ошибка)], секунды работы)
+def analyze_files(paths, jobs=None, progress=None) -> Tuple[Dict[str, Tuple[float, float, float, float]], List[Tuple[str, str]], float]:
+    _require_numpy()
+    return _run_pool(analyze_wav, paths, jobs, progress, LOUDNESS_CHUNKSIZE)
+
+# Сколько часов звука в секунду работы проанализировано (для статуса и бенчмарка)
+def audio_hours_per_second(results, seconds) -> float:
+    return sum(result[3] for result in results.values()) / 3600 / seconds if seconds > 0 else 0.0
+
+# Громкость ноды из громкостей её звуков: среднее по энергии (rndwave играет любой из них). None - нечего мерить
+def entry_loudness(loudness_values) -> Optional[float]:
+    values = [value for value in loudness_values if value > SILENCE_DB]
+    if not values: return None
+    return 10 * math.log10(sum(10 ** (value / 10) for value in values) / len(values))
+
+def _format_volume(value) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+# Функция для предложения volume ноды, чтобы её громкость стала target (LUFS). loudness - громкость звуков ноды
+# при volume 1. Диапазон "0.4, 0.6" сдвигается целиком с тем же соотношением краёв.
+# Возвращает (новое значение, упёрлось ли в 1) или None если текущее значение не число (например VOL_NORM оставляем как есть)
+def suggest_volume(volume: str, loudness: float, target: float) -> Optional[Tuple[str, bool]]:
+    if volume.strip().upper() == "VOL_NORM": volume = "1"
+    try:
+        parts = [float(part) for part in volume.split(",")]
+    except ValueError:
+        return None
+    if not parts or len(parts) > 2 or min(parts) <= 0: return None
+    wanted = 10 ** ((target - loudness) / 20)
+    # Середина диапазона встаёт на нужную громкость
+    scale = wanted / (sum(parts) / len(parts))
+    scaled = [part * scale for part in parts]
+    capped = max(scaled) > 1.0
+    if capped:
+        scaled = [part / max(scaled) for part in scaled]
+    scaled = [max(VOLUME_MIN, min(1.0, part)) for part in scaled]
+    return ", ".join(_format_volume(part) for part in scaled), capped
+
+
+SOURCE_RATES = (44100, 22050, 11025) # частоты, которые движок играет правильно
+SOURCE_BITS = (8, 16) # и разрядности PCM
+SOURCE_FORMATS = (soundscripts_core.WAV_FORMAT_PCM, 2) # PCM и MS ADPCM (его не трогаем - он уже для движка)
+RESAMPLE_ZERO_CROSSINGS = 16 # длина окна sinc в переходах через ноль с каждой стороны (на частоте ниже из двух)
+RESAMPLE_KAISER_BETA = 8.6 # окно Кайзера: подавление вне полосы ~85 дБ
+RESAMPLE_CUTOFF = 0.95 # срез фильтра от найквиста меньшей частоты (запас на переходную полосу)
+RESAMPLE_BLOCK = 1 << 15 # сколько выходных кадров считается за раз (память на матрицу отсчётов)
+CONVERT_CHUNKSIZE = 4 # сколько файлов отдаём процессу пула за раз
+
+# Функция для формата, в который надо перевести звук для движка: (каналы, частота, бит) или None если он уже подходит.
+# header - заголовок из read_wav_header. mono - стерео тоже сводить в моно (озвучка). Больше двух каналов движок
+# не играет - такие сводятся в моно всегда. Неизвестные форматы (не PCM/float/ADPCM) - ValueError
+def conform_target(header, mono=False) -> Optional[Tuple[int, int, int]]:
+    format_tag, channels, rate, bits, _ = header
+    if format_tag == 2: return None
+    if format_tag not in (soundscripts_core.WAV_FORMAT_PCM, soundscripts_core.WAV_FORMAT_FLOAT):
+        raise ValueError(f"unsupported WAV format {format_tag}")
+    new_channels = 1 if channels > 2 or (mono and channels > 1) else channels
+    # Ближайшая поддерживаемая частота не выше исходной (48 кГц -> 44.1), совсем низкие поднимаются до 11025
+    new_rate = rate if rate in SOURCE_RATES else max([r for r in SOURCE_RATES if r <= rate] or [min(SOURCE_RATES)])
+    new_bits = bits if format_tag == soundscripts_core.WAV_FORMAT_PCM and bits in SOURCE_BITS else 16
+    target = (new_channels, new_rate, new_bits)
+    return None if target == (channels, rate, bits) and format_tag == soundscripts_core.WAV_FORMAT_PCM else target
+
+# Что не так со звуком для движка (строки для отчёта), пусто - всё в порядке
+def conform_problems(header, mono=False) -> List[str]:
+    format_tag, channels, rate, bits, _ = header
+    if format_tag not in SOURCE_FORMATS and format_tag != soundscripts_core.WAV_FORMAT_FLOAT:
+        return [f"format {format_tag}"]
+    problems = []
+    if format_tag == soundscripts_core.WAV_FORMAT_FLOAT: problems.append("float")
+    elif format_tag == soundscripts_core.WAV_FORMAT_PCM and bits not in SOURCE_BITS: problems.append(f"{bits}-bit")
+    if format_tag != 2 and rate not in SOURCE_RATES: problems.append(f"{rate} Hz")
+    if format_tag != 2 and (channels > 2 or (mono and channels > 1)): problems.append(f"{channels} channels")
+    return problems
+
+# Фильтр полифазного ресемплера для up/down: окно Кайзера на sinc, разложенное по фазам - (фазы x отсчёты, задержка)
+@lru_cache(maxsize=16)
+def _resample_filter(up, down):
+    ratio = max(up, down)
+    half = RESAMPLE_ZERO_CROSSINGS * ratio
+    taps = np.arange(-half, half + 1)
+    cutoff = RESAMPLE_CUTOFF / ratio
+    h = cutoff * np.sinc(cutoff * taps) * np.kaiser(len(taps), RESAMPLE_KAISER_BETA) * up
+    # Фаза p берёт отсчёты h[p], h[p + up], h[p + 2up]...
+    per_phase = -(-len(h) // up)
+    h = np.concatenate((h, np.zeros(per_phase * up - len(h))))
+    return h.reshape(per_phase, up).T.astype(np.float32).copy(), half
+
+# Функция для смены частоты (кадры x каналы float32): полифазный фильтр с окном sinc, отношение сокращается
+# (48000 -> 44100 = 147/160). Выходной кадр n берёт отсчёты вокруг входного n * down / up, блоками по RESAMPLE_BLOCK кадров
+def resample(samples, rate_from, rate_to):
+    _require_numpy()
+    if rate_from == rate_to or not len(samples): return samples
+    common = math.gcd(rate_from, rate_to)
+    up, down = rate_to // common, rate_from // common
+    phases, delay = _resample_filter(up, down)
+    per_phase = phases.shape[1]
+    frames, channels = samples.shape
+    out_frames = -(-frames * up // down)
+    # Нули по краям, чтобы окно фильтра не выходило за массив
+    padded = np.concatenate((np.zeros((per_phase, channels), np.float32), samples, np.zeros((per_phase + delay // up + 1, channels), np.float32)))
+    offsets = np.arange(per_phase)
+    out = np.empty((out_frames, channels), np.float32)
+    for start in range(0, out_frames, RESAMPLE_BLOCK):
+        t = np.arange(start, min(out_frames, start + RESAMPLE_BLOCK), dtype=np.int64) * down + delay
+        base = t // up + per_phase
+        taps = phases[t % up] # (кадры, отсчёты)
+        window = padded[base[:, None] - offsets[None, :]] # (кадры, отсчёты, каналы)
+        out[start:start + len(t)] = np.einsum("nk,nkc->nc", taps, window)
+    return out
+
+# Чанки WAV кроме fmt, data и fact: [(id, тело)]. Метки cue и петли smpl пересчитываются под новую частоту
+def _extra_chunks(path, scale):
+    chunks = []
+    with open(path, "rb") as f:
+        f.seek(12)
+        for _ in range(soundscripts_core.WAV_MAX_CHUNKS):
+            header = f.read(8)
+            if len(header) < 8: break
+            chunk_id = header[:4]
+            size = int.from_bytes(header[4:8], "little")
+            if chunk_id in (b"fmt ", b"data", b"fact"):
+                f.seek(size + (size & 1), os.SEEK_CUR)
+                continue
+            body = bytearray(f.read(size))
+            if size & 1: f.seek(1, os.SEEK_CUR)
+            if scale != 1 and chunk_id == b"cue ":
+                # dwPosition (+4) и dwSampleOffset (+20) у каждой метки по 24 байта
+                for pos in range(4, len(body) - 23, 24):
+                    for field in (pos + 4, pos + 20):
+                        body[field:field + 4] = round(int.from_bytes(body[field:field + 4], "little") * scale).to_bytes(4, "little")
+            if scale != 1 and chunk_id == b"smpl" and len(body) >= 36:
+                # dwSamplePeriod в наносекундах, петли по 24 байта после заголовка (начало +8, конец +12)
+                period = int.from_bytes(body[8:12], "little")
+                if period: body[8:12] = round(period / scale).to_bytes(4, "little")
+                for pos in range(36, len(body) - 23, 24):
+                    for field in (pos + 8, pos + 12):
+                        body[field:field + 4] = round(int.from_bytes(body[field:field + 4], "little") * scale).to_bytes(4, "little")
+            chunks.append((chunk_id, bytes(body)))
+    return chunks
+
+# Байты PCM для кадров float32: 16 бит со знаком или 8 бит без знака
+def _pcm_bytes(samples, bits):
+    if bits == 8:
+        return (np.clip(np.round(samples * 128) + 128, 0, 255)).astype(np.uint8).tobytes()
+    return np.clip(np.round(samples * 32768), -32768, 32767).astype("<i2").tobytes()
+
+# Функция для перевода одного WAV в формат движка: частота, разрядность и каналы, остальные чанки (метки, LIST)
+# сохраняются. Файл заменяется атомарно (временный рядом, потом rename), старый уходит в .bak если backups > 0.
+# Возвращает (было (каналы, частота, бит), стало, секунды звука) или None если файл уже подходит
+def conform_wav(path, mono=False, backups=0):
+    _require_numpy()
+    header = soundscripts_core.read_wav_header(path)
+    target = conform_target(header, mono)
+    if target is None: return None
+    channels, rate, bits = target
+    samples, old_rate = read_wav_samples(path)
+    if samples.shape[1] != channels: samples = samples.mean(axis=1, keepdims=True, dtype=np.float32)
+    samples = resample(samples, old_rate, rate)
+    extra = _extra_chunks(path, rate / old_rate)
+    data = _pcm_bytes(samples, bits)
+    block_align = channels * bits // 8
+    fmt = (soundscripts_core.WAV_FORMAT_PCM.to_bytes(2, "little") + channels.to_bytes(2, "little") + rate.to_bytes(4, "little") +
+           (rate * block_align).to_bytes(4, "little") + block_align.to_bytes(2, "little") + bits.to_bytes(2, "little"))
+    parts = [b"fmt " + len(fmt).to_bytes(4, "little") + fmt]
+    for chunk_id, body in extra:
+        parts.append(chunk_id + len(body).to_bytes(4, "little") + body + (b"\0" if len(body) & 1 else b""))
+    parts.append(b"data" + len(data).to_bytes(4, "little"))
+    size = 4 + sum(len(part) for part in parts) + len(data) + (len(data) & 1)
+    chunks = [b"RIFF" + size.to_bytes(4, "little") + b"WAVE", *parts, data]
+    if len(data) & 1: chunks.append(b"\0")
+    soundscripts_core.write_bytes_atomic(path, chunks, backups)
+    return (header[1], header[2], header[3]), target, len(samples) / rate
+
+# Воркер пула процессов: (путь, mono, backups) -> (путь, результат conform_wav, ошибка)
+def conform_task(task):
+    path, mono, backups = task
+    try:
+        return path, conform_wav(path, mono, backups), None
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+# Функция для перевода файлов в формат движка в пуле процессов.
+# Возвращает ({путь: результат conform_wav или None}, [(путь, ошибка)], секунды работы)
+def conform_files(paths, mono=False, backups=0, jobs=None, progress=None):
+    _require_numpy()
+    return _run_pool(conform_task, [(path, mono, backups) for path in paths], jobs, progress, CONVERT_CHUNKSIZE)
+
+
+WAVEFORM_WIDTH = 24 # сколько столбиков в миниатюре волны (символов в клеточке)
+WAVEFORM_FLOOR_DB = -48.0 # всё что тише - пустой столбик (шкала в децибелах, иначе тихую озвучку не видно)
+WAVEFORM_CLIP = 0.999 # пик от полной шкалы, с которого звук считается перегруженным
+WAVEFORM_SILENT_DB = -60.0 # пик тише этого - звук считается пустым
+WAVEFORM_MEMORY_ITEMS = 4096 # сколько миниатюр держать в памяти (LRU)
+WAVEFORM_BARS = " ▁▂▃▄▅▆▇█"
+WAVEFORM_CLIPPED = 1 # флаги миниатюры
+WAVEFORM_SILENT = 2
+WAVEFORM_TRUNCATED = 4
+_WAVEFORM_HEADER = struct.Struct("<QqBH") # размер файла, mtime_ns, флаги, ширина
+
+# Функция для огибающей волны: (минимумы, максимумы по width кускам в int8 от -127 до 127, флаги WAVEFORM_*).
+# Минимум и максимум кусков считаются NumPy прямо по сэмплам в mmap (reduceat), без перевода файла во float
+def waveform_envelope(path, width=WAVEFORM_WIDTH):
+    _require_numpy()
+    with open(path, "rb") as f:
+        format_tag, channels, rate, sample_width, offset, frames, truncated = _pcm_layout(f)
+        flags = WAVEFORM_TRUNCATED if truncated else 0
+        if not frames:
+            return np.zeros(width, np.int8), np.zeros(width, np.int8), flags | WAVEFORM_SILENT
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            raw, bias, scale = _pcm_view(mm, format_tag, sample_width, frames * channels, offset)
+            raw = raw.reshape(frames, channels)
+            # Границы кусков; если кадров меньше чем столбиков - куски по одному кадру, остальные повторяются
+            edges = np.minimum(np.arange(width) * frames // width, frames - 1)
+            lows = ((np.minimum.reduceat(raw, edges, axis=0).min(axis=1).astype(np.float32) - bias) * scale)
+            highs = ((np.maximum.reduceat(raw, edges, axis=0).max(axis=1).astype(np.float32) - bias) * scale)
+            del raw
+    peak = max(float(-lows.min()), float(highs.max()))
+    if peak >= WAVEFORM_CLIP: flags |= WAVEFORM_CLIPPED
+    if peak < 10 ** (WAVEFORM_SILENT_DB / 20): flags |= WAVEFORM_SILENT
+    return np.round(np.clip(lows, -1, 1) * 127).astype(np.int8), np.round(np.clip(highs, -1, 1) * 127).astype(np.int8), flags
+
+# Миниатюра волны текстом: столбики по пику куска в децибелах и пометки clip/silent/cut
+def waveform_text(envelope) -> str:
+    lows, highs, flags = envelope
+    peaks = np.maximum(-lows.astype(np.int16), highs.astype(np.int16)) / 127
+    with np.errstate(divide="ignore"):
+        levels = 20 * np.log10(peaks)
+    steps = np.clip(np.ceil((1 - levels / WAVEFORM_FLOOR_DB) * (len(WAVEFORM_BARS) - 1)), 0, len(WAVEFORM_BARS) - 1).astype(int)
+    text = "".join(WAVEFORM_BARS[step] for step in steps)
+    if flags & WAVEFORM_CLIPPED: text += " clip"
+    if flags & WAVEFORM_SILENT: text += " silent"
+    if flags & WAVEFORM_TRUNCATED: text += " cut"
+    return text
+
+# Кэш огибающих: в памяти LRU на max_items штук, на диске - маленький файл на звук в папке folder
+# (имя - хэш пути, внутри размер и mtime файла, по которым запись проверяется). Размер и mtime get берёт у самого
+# файла, а память для главного потока (peek) не проверяется - изменённые файлы оттуда убирает forget.
+# Доступ из нескольких потоков
+class WaveformCache:
+    def __init__(self, folder, max_items=WAVEFORM_MEMORY_ITEMS, width=WAVEFORM_WIDTH):
+        self.folder = folder
+        self.max_items = max_items
+        self.width = width
+        self.memory = OrderedDict() # путь -> (размер, mtime_ns, огибающая)
+        self._lock = threading.Lock()
+
+    def _file(self, path):
+        return os.path.join(self.folder, hashlib.blake2b(os.path.normcase(os.path.abspath(path)).encode("utf-8"), digest_size=16).hexdigest())
+
+    # Огибающая из памяти. Без диска - можно звать из главного потока
+    def peek(self, path):
+        with self._lock:
+            record = self.memory.get(path)
+            if record is None: return None
+            self.memory.move_to_end(path)
+            return record[2]
+
+    # Убрать из памяти файлы, которые поменялись на диске (следующий get посчитает заново)
+    def forget(self, paths):
+        with self._lock:
+            for path in paths: self.memory.pop(path, None)
+
+    def _remember(self, path, size, mtime_ns, envelope):
+        with self._lock:
+            self.memory[path] = (size, mtime_ns, envelope)
+            self.memory.move_to_end(path)
+            while len(self.memory) > self.max_items:
+                self.memory.popitem(last=False)
+
+    # Огибающая из памяти, с диска или посчитанная заново (и записанная на диск). Для рабочего потока.
+    # Файл не читается - OSError/ValueError
+    def get(self, path):
+        st = os.stat(path)
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+        with self._lock:
+            record = self.memory.get(path)
+            if record is not None and record[0] == size and record[1] == mtime_ns:
+                self.memory.move_to_end(path)
+                return record[2]
+        cache_file = self._file(path)
+        envelope = None
+        try:
+            with open(cache_file, "rb") as f:
+                data = f.read()
+            cached_size, cached_mtime, flags, width = _WAVEFORM_HEADER.unpack_from(data)
+            if (cached_size, cached_mtime, width) == (size, mtime_ns, self.width) and len(data) == _WAVEFORM_HEADER.size + 2 * width:
+                body = np.frombuffer(data, np.int8, offset=_WAVEFORM_HEADER.size)
+                envelope = (body[:width].copy(), body[width:].copy(), flags)
+        except (OSError, struct.error):
+            envelope = None
+        if envelope is None:
+            envelope = waveform_envelope(path, self.width)
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                tmp_path = f"{cache_file}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(_WAVEFORM_HEADER.pack(size, mtime_ns, envelope[2], self.width) + envelope[0].tobytes() + envelope[1].tobytes())
+                os.replace(tmp_path, cache_file)
+            except OSError:
+                pass # без кэша на диске тоже работает, просто в следующий раз посчитаем заново
+        self._remember(path, size, mtime_ns, envelope)
+        return envelope
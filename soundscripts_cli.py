@@ -0,0 +1,171 @@
+import os
+import sys
+import time
+import fnmatch
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import soundscripts_core
+
+# Консольный режим без окна для сборочного сервера: проверка, форматирование и слияние саундскриптов.
+# Запуск: soundscripts_editor.py --check scripts/   (или python soundscripts_cli.py --check scripts/)
+# Файлы обрабатываются параллельно в пуле процессов, по каждому пишется время.
+
+DEFAULT_PATTERN = "*.txt"
+
+# Функция для чтения файла как есть (newline="" - переводы строк не трогаем)
+def read_text(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+# Функция для сбора файлов: файлы берутся как есть, папки обходятся целиком по маске
+def collect_files(paths, pattern=DEFAULT_PATTERN):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for folder, _, names in os.walk(path):
+                found.extend(os.path.join(folder, name) for name in names if fnmatch.fnmatch(name.lower(), pattern.lower()))
+            files.extend(sorted(found))
+        else:
+            files.append(path)
+    return files
+
+# Воркер --check: (путь, число нод, проблемы, секунды, ошибка)
+def check_file(path):
+    started = time.perf_counter()
+    try:
+        text = read_text(path)
+        items = soundscripts_core.parse_soundscript(text)
+        problems = soundscripts_core.check_soundscript(text)
+    except (OSError, UnicodeError) as e:
+        return path, 0, [], time.perf_counter() - started, str(e)
+    # Не саундскрипт (манифест, скрипт оружия и т.п.) - ни одной ноды со звуками
+    if not any(item.sounds for item in items):
+        return path, 0, [], time.perf_counter() - started, None
+    return path, len(items), problems, time.perf_counter() - started, None
+
+# Воркер --format: (путь, изменён ли файл, имена оставленных как есть нод, секунды, ошибка)
+def format_file(path, dry_run=False):
+    started = time.perf_counter()
+    try:
+        text = read_text(path)
+        formatted, kept = soundscripts_core.format_soundscript(text)
+        changed = formatted != text
+        # Атомарно: прерванный прогон (например в CI) не оставит обрезанный файл
+        if changed and not dry_run: soundscripts_core.write_text_atomic(path, [formatted])
+    except (OSError, UnicodeError) as e:
+        return path, False, [], time.perf_counter() - started, str(e)
+    return path, changed, kept, time.perf_counter() - started, None
+
+# Воркер --merge: (путь, [(имя ноды, текст ноды)], секунды, ошибка)
+def read_entries(path):
+    started = time.perf_counter()
+    try:
+        text = read_text(path)
+        entries = [(item.entry_name, text[start:end]) for item, start, end in soundscripts_core.iter_soundscript_entries(text)]
+    except (OSError, UnicodeError) as e:
+        return path, [], time.perf_counter() - started, str(e)
+    return path, entries, time.perf_counter() - started, None
+
+# Функция для запуска воркера по всем файлам: в пуле процессов если файлов несколько, иначе прямо тут.
+# Результаты отдаются в порядке файлов
+def run_all(worker, files, jobs, *args):
+    if jobs == 1 or len(files) < 2:
+        return [worker(path, *args) for path in files]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(worker, files, *[[arg] * len(files) for arg in args], chunksize=max(1, len(files) // (jobs * 4))))
+
+def run_check(files, jobs):
+    failed = 0
+    for path, entries, problems, seconds, error in run_all(check_file, files, jobs):
+        if error:
+            failed += 1
+            print(f"ERROR {seconds:7.3f}s  {path}: {error}")
+        elif not entries:
+            print(f"SKIP  {seconds:7.3f}s  {path} (no sound entries)")
+        elif problems:
+            failed += 1
+            print(f"FAIL  {seconds:7.3f}s  {path} ({entries} entries, {len(problems)} problems)")
+            for line, message in problems:
+                print(f"    {path}:{line}: {message}")
+        else:
+            print(f"OK    {seconds:7.3f}s  {path} ({entries} entries)")
+    return failed
+
+def run_format(files, jobs, dry_run):
+    failed = 0
+    for path, changed, kept, seconds, error in run_all(format_file, files, jobs, dry_run):
+        if error:
+            failed += 1
+            print(f"ERROR {seconds:7.3f}s  {path}: {error}")
+            continue
+        if changed:
+            # В режиме проверки неотформатированный файл - ошибка (для CI)
+            if dry_run: failed += 1
+            print(f"{'WOULD' if dry_run else 'FIXED'} {seconds:7.3f}s  {path}")
+        else:
+            print(f"OK    {seconds:7.3f}s  {path}")
+        for name in kept:
+            print(f'    {path}: entry "{name}" kept as is (comments or keys the editor does not write)')
+    return failed
+
+def run_merge(files, jobs, output):
+    failed = 0
+    seen = {}
+    merged = []
+    for path, entries, seconds, error in run_all(read_entries, files, jobs):
+        if error:
+            failed += 1
+            print(f"ERROR {seconds:7.3f}s  {path}: {error}")
+            continue
+        duplicates = 0
+        for name, entry_text in entries:
+            # Одинаковые имена: остаётся первая нода, остальные выкидываются с предупреждением
+            key = name.lower()
+            if key in seen:
+                duplicates += 1
+                print(f'    {path}: duplicate entry "{name}" skipped (already in {seen[key]})')
+                continue
+            seen[key] = path
+            merged.append(entry_text.replace("\r\n", "\n"))
+        print(f"OK    {seconds:7.3f}s  {path} ({len(entries) - duplicates} entries)")
+    if failed: return failed
+    # Шапка как у файлов, которые пишет редактор, переводы строк как у системы
+    content = soundscripts_core.dump_soundscript([]) + "\n" + "\n\n".join(merged) + "\n"
+    soundscripts_core.write_text_atomic(output, [content.replace("\n", os.linesep)])
+    print(f"Merged {len(merged)} entries from {len(files)} files into {output}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="soundscripts_editor", description=f"{soundscripts_core.ABOUT_TOOL_NAME} - command line mode")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--check", action="store_true", help="validate soundscripts (braces, duplicate names, missing sounds, unknown channels and soundlevels)")
+    mode.add_argument("--format", action="store_true", help="rewrite entries the way the editor writes them, everything else is kept")
+    mode.add_argument("--merge", metavar="OUTPUT", help="merge entries of all files into OUTPUT (first entry with a name wins)")
+    parser.add_argument("paths", nargs="+", help="soundscript files or folders (e.g. scripts/)")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"file mask for folders (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--dry-run", action="store_true", help="with --format: only report files that would change (exit code 1 if any)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    return parser
+
+# Точка входа. Код возврата: 0 - всё хорошо, 1 - есть проблемы
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    files = collect_files(args.paths, args.pattern)
+    if not files:
+        print("No files found!")
+        return 1
+    jobs = max(1, args.jobs)
+    started = time.perf_counter()
+    if args.check:
+        failed = run_check(files, jobs)
+    elif args.format:
+        failed = run_format(files, jobs, args.dry_run)
+    else:
+        failed = run_merge(files, jobs, args.merge)
+    print(f"{len(files)} files, {failed} failed, {time.perf_counter() - started:.3f}s total")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2183 @@
+import os
+import re
+import gc
+import sys
+import json
+import shlex
+import pickle
+import shutil
+import hashlib
+from array import array
+from itertools import islice
+from collections import deque
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+
+# Ядро работы с саундскриптами: тут нет ни tkinter, ни tksheet, чтобы это можно было юзать без окна
+
+# Константы о программе (нужны и окну, и шапке генерируемых файлов)
+ABOUT_TOOL_VERSION      = "1.0.0"
+ABOUT_TOOL_NAME         = f"Soundscripts Editor v{ABOUT_TOOL_VERSION}"
+ABOUT_TOOL_DESCRIPTION  = "This tool helps to edit soundscripts files used on Source Engine."
+ABOUT_TOOL_AUTHOR       = "Shitcoded by Ambiabstract (Sergey Shavin)."
+ABOUT_TOOL_REQUESTED    = "Requested by Aptekarr (Ruslan Pozdnyakov)."
+ABOUT_TOOL_LINK         = "Github: https://github.com/Ambiabstract/soundscripts_editor"
+ABOUT_TOOL_LINK_2       = "https://github.com/Ambiabstract/soundscripts_editor"
+ABOUT_TOOL_DISCORD      = "Discord: @Ambiabstract"
+
+# Константы дефолтных значений настроек саундскрипта
+DEFAULT_CHANNEL     = "CHAN_AUTO"
+DEFAULT_SOUNDLEVEL  = "SNDLVL_IDLE"
+DEFAULT_VOLUME      = "1"
+DEFAULT_PITCH       = "PITCH_NORM"
+CHANNELS_LIST = [
+    "CHAN_AUTO", 
+    "CHAN_WEAPON", 
+    "CHAN_VOICE", 
+    "CHAN_VOICE2", 
+    "CHAN_ITEM", 
+    "CHAN_BODY", 
+    "CHAN_STREAM", 
+    "CHAN_REPLACE", 
+    "CHAN_STATIC", 
+    "CHAN_VOICE_BASE"
+]
+SNDLVLS_LIST  = [
+    "SNDLVL_NONE", 
+    "SNDLVL_20dB", 
+    "SNDLVL_25dB", 
+    "SNDLVL_30dB", 
+    "SNDLVL_35dB", 
+    "SNDLVL_40dB",
+    "SNDLVL_45dB", 
+    "SNDLVL_50dB", 
+    "SNDLVL_55dB", 
+    "SNDLVL_IDLE", 
+    "SNDLVL_TALKING", 
+    "SNDLVL_65dB",
+    "SNDLVL_STATIC", 
+    "SNDLVL_70dB", 
+    "SNDLVL_NORM", 
+    "SNDLVL_75dB", 
+    "SNDLVL_80dB", 
+    "SNDLVL_85dB",
+    "SNDLVL_90dB", 
+    "SNDLVL_95dB", 
+    "SNDLVL_100dB", 
+    "SNDLVL_105dB", 
+    "SNDLVL_110dB", 
+    "SNDLVL_120dB",
+    "SNDLVL_130dB", 
+    "SNDLVL_GUNFIRE", 
+    "SNDLVL_140dB", 
+    "SNDLVL_150dB", 
+    "SNDLVL_180dB",
+]
+VOLUME_LIST = ["0.1", "0.2", "0.3", "0.4", "0.5", "0.6", "0.7", "0.8", "0.9", "1", "0.1, 0.9", "0.2, 0.8", "0.3, 0.7", "0.4, 0.6", "0.5, 1"]
+PITCH_LIST = ["10", "20", "30", "40", "50", "60", "70", "80", "90", "PITCH_LOW", "PITCH_NORM", "100", "110", "PITCH_HIGH", "120", "130", "140", "150", "160", "170", "180", "190", "200", "210", "220", "230", "240", "250", "95, 100", "100, 110"]
+
+# Типы токенов KeyValues
+TOKEN_STRING = 1   # "строка в кавычках"
+TOKEN_OPEN   = 2   # {
+TOKEN_CLOSE  = 3   # }
+TOKEN_WORD   = 4   # строка без кавычек (#include, [$WIN32] и прочее)
+
+# Одна регулярка на все токены, текст проходится ровно один раз.
+# Порядок важен: комментарий должен проверяться раньше строки без кавычек.
+# Группы: 1 - строка в кавычках, 2 - {, 3 - }, 4 - слово без кавычек. Комментарий без группы.
+_KV_TOKEN_RE = re.compile(r'"([^"]*)"|(\{)|(\})|//[^\n]*|([^\s"{}]+)')
+
+# Быстрый путь для типичной ноды: одна регулярка ловит ноду целиком вместе с полями в любом порядке
+# (группа внутри повторения запоминает последнее совпадение). Сюда попадают ноды только с известными
+# ключами в нижнем регистре и комментариями, всё остальное (operator_stacks, [$WIN32], слова без
+# кавычек и т.п.) разбирается токенайзером.
+# Группы: 1 - имя, 2 - channel, 3 - volume, 4 - soundlevel, 5 - pitch, 6 - wave, 7 - тело rndwave.
+# Комментарий всегда идёт до конца строки (_COMMENT): иначе строку из сорока слэшей можно разбить на "//" множеством
+# способов, и когда быстрый путь не подходит, откат перебирает их все (экспоненциально, файл открывается минутами).
+# Атомарные группы (?>...) есть только с 3.11, поэтому конец строки проверяется заглядыванием
+_VALUE = r'\s*"([^"]*)"'
+_COMMENT = r'//[^\n]*(?![^\n])'
+_FAST_ENTRY_RE = re.compile(
+    r'\s*(?:' + _COMMENT + r'\s*)*"([^"]*)"\s*\{\s*'
+    r'(?:(?:' + _COMMENT +
+    r'|"channel"' + _VALUE +
+    r'|"volume"' + _VALUE +
+    r'|"soundlevel"' + _VALUE +
+    r'|"pitch"' + _VALUE +
+    r'|"wave"' + _VALUE +
+    r'|"rndwave"\s*\{((?:\s*(?:' + _COMMENT + r'|"wave"\s*"[^"]*"))*\s*)\})\s*)*\}'
+)
+# Звуки внутри rndwave (комментарии ловятся отдельно, чтобы закомментированные wave не попадали)
+_RNDWAVE_RE = re.compile(r'//[^\n]*|"wave"\s*"([^"]*)"')
+# Пропуск пробелов и комментариев до конца файла
+_TAIL_RE = re.compile(r'\s*(?:' + _COMMENT + r'\s*)*')
+
+# Ключи ноды, которые показываются в таблице
+ENTRY_FIELDS = ("channel", "volume", "soundlevel", "pitch")
+# Все ключи ноды
+ENTRY_KEYS = ("entry_name", "channel", "volume", "soundlevel", "pitch", "sounds")
+
+
+# Генератор токенов: (тип, значение, начало, конец). Пробелы и комментарии // пропускаются
+def iter_kv_tokens(text: str, pos: int = 0) -> Iterator[Tuple[int, str, int, int]]:
+    for m in _KV_TOKEN_RE.finditer(text, pos):
+        kind = m.lastindex
+        if kind is None:
+            continue  # комментарий
+        yield kind, m.group(kind), m.start(), m.end()
+
+
+# Проверка на условие вида [$WIN32] после значения, его просто пропускаем
+def _is_condition(kind: int, value: str) -> bool:
+    return kind == TOKEN_WORD and value.startswith("[") and value.endswith("]")
+
+
+# Таблица интернирования значений: строка <-> маленький номер. Одинаковые CHAN_VOICE, SNDLVL_NORM и т.п.
+# у десятков тысяч нод хранятся один раз, а в самой ноде лежит только номер.
+class ValueTable:
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values=()):
+        self.values = [""]          # номер -> строка (0 - пустое значение)
+        self.codes = {"": 0}        # строка -> номер
+        for value in values:
+            self.code(value)
+
+    # Номер значения (новое значение добавляется в конец таблицы)
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            value = sys.intern(value)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+# Таблицы кодов для полей с перечислимыми значениями, заранее заполнены стандартными списками
+CHANNEL_TABLE    = ValueTable(CHANNELS_LIST)
+SOUNDLEVEL_TABLE = ValueTable(SNDLVLS_LIST)
+VOLUME_TABLE     = ValueTable(VOLUME_LIST)
+PITCH_TABLE      = ValueTable(PITCH_LIST)
+_CHANNEL_CODES    = CHANNEL_TABLE.codes
+_SOUNDLEVEL_CODES = SOUNDLEVEL_TABLE.codes
+_VOLUME_CODES     = VOLUME_TABLE.codes
+_PITCH_CODES      = PITCH_TABLE.codes
+
+
+# Нода саундскрипта. Компактная запись со __slots__: поля channel/soundlevel/volume/pitch хранятся номерами
+# из таблиц выше, пути звуков интернируются и лежат кортежем. Снаружи ведёт себя как старый словарь:
+# item["channel"], item["sounds"] = [...], item.get("sounds") - так что остальной код не поменялся.
+# Сравнение нод идёт по объекту (на этом держится SoundscriptDocument).
+class SoundEntry:
+    __slots__ = ("entry_name", "_channel", "_volume", "_soundlevel", "_pitch", "_sounds")
+
+    def __init__(self, entry_name, channel="", volume="", soundlevel="", pitch="", sounds=()):
+        # Сначала прямой поиск в словаре кодов (почти всегда попадает), новое значение - через code()
+        self.entry_name = entry_name
+        self._channel = _CHANNEL_CODES.get(channel) or CHANNEL_TABLE.code(channel)
+        self._volume = _VOLUME_CODES.get(volume) or VOLUME_TABLE.code(volume)
+        self._soundlevel = _SOUNDLEVEL_CODES.get(soundlevel) or SOUNDLEVEL_TABLE.code(soundlevel)
+        self._pitch = _PITCH_CODES.get(pitch) or PITCH_TABLE.code(pitch)
+        self._sounds = tuple(map(sys.intern, sounds))
+
+    @property
+    def channel(self):
+        return CHANNEL_TABLE.values[self._channel]
+
+    @channel.setter
+    def channel(self, value):
+        self._channel = CHANNEL_TABLE.code(value)
+
+    @property
+    def volume(self):
+        return VOLUME_TABLE.values[self._volume]
+
+    @volume.setter
+    def volume(self, value):
+        self._volume = VOLUME_TABLE.code(value)
+
+    @property
+    def soundlevel(self):
+        return SOUNDLEVEL_TABLE.values[self._soundlevel]
+
+    @soundlevel.setter
+    def soundlevel(self, value):
+        self._soundlevel = SOUNDLEVEL_TABLE.code(value)
+
+    @property
+    def pitch(self):
+        return PITCH_TABLE.values[self._pitch]
+
+    @pitch.setter
+    def pitch(self, value):
+        self._pitch = PITCH_TABLE.code(value)
+
+    @property
+    def sounds(self):
+        return self._sounds
+
+    @sounds.setter
+    def sounds(self, value):
+        self._sounds = tuple(map(sys.intern, value))
+
+    # Доступ как у словаря
+    def __getitem__(self, key):
+        if key not in ENTRY_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in ENTRY_KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in ENTRY_KEYS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: (list(self.sounds) if key == "sounds" else getattr(self, key)) for key in ENTRY_KEYS}
+
+    def __repr__(self):
+        return f"SoundEntry({self.to_dict()!r})"
+
+    # В другой процесс (пул разбора проекта) ноды едут строками: номера значений там из других таблиц
+    def __reduce__(self):
+        return SoundEntry, (self.entry_name, self.channel, self.volume, self.soundlevel, self.pitch, self._sounds)
+
+
+# Новая пустая нода
+def new_entry(entry_name: str) -> SoundEntry:
+    return SoundEntry(entry_name)
+
+
+# Общий разбор одной штуки верхнего уровня токенайзером, начиная с pos.
+# Возвращает (нода или None, начало, конец). Нода None - если это была не нода (пара вроде #base или мусор).
+# Понимает комментарии //, строки с кавычками и без, условия [$...] и вложенные блоки любой глубины
+# (неизвестные блоки вроде operator_stacks просто пропускаются с учётом скобок).
+def _slow_entry(text: str, pos: int) -> Tuple[Optional[SoundEntry], int, int]:
+    depth = 0               # глубина скобок
+    key = None              # ключ, для которого ждём значение или {
+    start = None            # начало штуки верхнего уровня
+    item = None             # текущая нода
+    block = None            # имя вложенного блока на глубине 2 (например rndwave)
+    rndwave = []
+
+    for m in _KV_TOKEN_RE.finditer(text, pos):
+        kind = m.lastindex
+        if kind is None:
+            continue  # комментарий
+        if start is None:
+            start = m.start()
+
+        if kind == TOKEN_OPEN:
+            if depth == 0:
+                item = new_entry(key if key is not None else "")
+            elif depth == 1:
+                block = key.lower() if key is not None else None
+            depth += 1
+            key = None
+            continue
+
+        if kind == TOKEN_CLOSE:
+            if depth == 0:
+                return None, start, m.end()  # лишняя скобка
+            depth -= 1
+            if depth == 0:
+                if rndwave:
+                    item["sounds"] = rndwave
+                return item, start, m.end()
+            if depth == 1:
+                block = None
+            key = None
+            continue
+
+        value = m.group(kind)
+        if _is_condition(kind, value):
+            if depth == 0 and key is None:
+                return None, start, m.end()
+            continue
+
+        # Первый токен пары - ключ, второй - значение
+        if key is None:
+            key = value
+            continue
+
+        if depth == 0:
+            return None, start, m.end()  # пара верхнего уровня, не нода
+        k = key.lower()
+        if depth == 1:
+            if k in ENTRY_FIELDS:
+                if value: item[k] = value
+            elif k == "wave":
+                if value: item["sounds"] = [value]
+        elif depth == 2 and block == "rndwave" and k == "wave":
+            if value: rndwave.append(value)
+        key = None
+
+    # Файл кончился посреди блока - отдаём что успели прочитать
+    end = len(text)
+    if item is not None and rndwave:
+        item["sounds"] = rndwave
+    return item, (start if start is not None else end), end
+
+
+# Потоковый парсер саундскрипта: один проход по тексту, ноды отдаются по мере чтения.
+# Каждая нода отдаётся вместе с позициями своего блока в тексте: (нода, начало, конец).
+# Типичные ноды ловятся одной регуляркой, всё необычное (комментарии внутри, глубокие блоки,
+# строки без кавычек) разбирается токенайзером.
+def iter_soundscript_entries(text: str) -> Iterator[Tuple[SoundEntry, int, int]]:
+    pos = 1 if text.startswith("\ufeff") else 0  # BOM от блокнота пропускаем
+    size = len(text)
+    fast_match = _FAST_ENTRY_RE.match
+    while pos < size:
+        m = fast_match(text, pos)
+        if m is not None:
+            entry_name, channel, volume, soundlevel, pitch, wave, rndwave = m.groups("")
+            if rndwave:
+                sounds = _RNDWAVE_RE.findall(rndwave)
+                if "" in sounds:
+                    sounds = [w for w in sounds if w]
+            else:
+                sounds = [wave] if wave else []
+            yield SoundEntry(entry_name, channel, volume, soundlevel, pitch, sounds), m.start(1) - 1, m.end()
+            pos = m.end()
+            continue
+        pos = _TAIL_RE.match(text, pos).end()
+        if pos >= size:
+            break
+        item, start, pos = _slow_entry(text, pos)
+        if item is not None:
+            yield item, start, pos
+
+
+# Регулярки для имени ноды из имени WAV файла
+_NAME_CYRILLIC_RE = re.compile(r"[А-Яа-яЁё]")
+_NAME_BAD_CHARS_RE = re.compile(r"[ \-\—\(\)\[\]\{\},;!@#$%^&*+=№~`«»<>?/\\|\"']")
+_NAME_UNDERSCORES_RE = re.compile(r"_+")
+
+
+DUMP_BATCH = 1024 # сколько нод склеивается в один кусок при потоковом дампе
+
+# Функция для дампа содержания саундскрипта из нод целиком (шапка с описанием программы + все ноды).
+# Отдаёт текст кусками по DUMP_BATCH нод, чтобы писать его в файл сразу, не собирая весь в памяти.
+# newline - переводы строк в результате (например os.linesep для файла)
+def iter_dump_soundscript(items, newline="\n") -> Iterator[str]:
+    header = "\n".join((
+        f'// Generated by {ABOUT_TOOL_NAME}',
+        f'// {ABOUT_TOOL_DESCRIPTION}',
+        f'// {ABOUT_TOOL_AUTHOR}',
+        f'// {ABOUT_TOOL_REQUESTED}',
+        f'// {ABOUT_TOOL_LINK}',
+        f'// {ABOUT_TOOL_DISCORD}\n',
+    ))
+    yield header if newline == "\n" else header.replace("\n", newline)
+    batch = []
+    for r in items:
+        # Ноды разделены пустой строкой, после последней - перевод строки
+        batch.append("\n" + format_entry(r) + "\n")
+        if len(batch) == DUMP_BATCH:
+            chunk = "".join(batch)
+            yield chunk if newline == "\n" else chunk.replace("\n", newline)
+            batch = []
+    if batch:
+        chunk = "".join(batch)
+        yield chunk if newline == "\n" else chunk.replace("\n", newline)
+
+def dump_soundscript(items) -> str:
+    return "".join(iter_dump_soundscript(items))
+
+
+_SNDLVL_RE = re.compile(r'SNDLVL_\d+dB$|\d+(\.\d+)?$', re.IGNORECASE)
+_CHANNELS_UPPER = frozenset(CHANNELS_LIST)
+_SNDLVLS_UPPER = frozenset(value.upper() for value in SNDLVLS_LIST)
+
+
+# Строки в кавычках и комментарии - выкидываются перед быстрой проверкой скобок
+_STRINGS_AND_COMMENTS_RE = re.compile(r'"[^"]*"|//[^\n]*')
+_NOT_BRACES_RE = re.compile(r'[^{}]+')
+
+
+# Быстрая проверка что скобки сбалансированы (всё на уровне C, без обхода токенов в питоне)
+def _braces_balanced(text: str) -> bool:
+    braces = _NOT_BRACES_RE.sub("", _STRINGS_AND_COMMENTS_RE.sub("", text))
+    while "{}" in braces:
+        braces = braces.replace("{}", "")
+    return not braces
+
+
+# Функция для проверки саундскрипта: скобки, имена, звуки и значения полей.
+# Возвращает список проблем (номер строки, текст), пустой список - всё хорошо
+def check_soundscript(text: str) -> List[Tuple[int, str]]:
+    line_starts = []
+    # Номера строк нужны только для найденных проблем, поэтому таблица начал строк строится при первой
+    def line_of(offset):
+        if not line_starts:
+            line_starts.append(0)
+            pos = text.find("\n")
+            while pos >= 0:
+                line_starts.append(pos + 1)
+                pos = text.find("\n", pos + 1)
+        return bisect_right(line_starts, offset)
+
+    problems = []
+    # Структура: лишние и незакрытые скобки (по токенам, только если быстрая проверка что-то нашла)
+    if not _braces_balanced(text):
+        opened = []
+        for kind, _, start, _ in iter_kv_tokens(text):
+            if kind == TOKEN_OPEN:
+                opened.append(start)
+            elif kind == TOKEN_CLOSE:
+                if not opened:
+                    problems.append((line_of(start), "unexpected '}'"))
+                    continue
+                opened.pop()
+        for start in opened:
+            problems.append((line_of(start), "'{' is never closed"))
+
+    # Ноды
+    first_start = {}
+    for item, start, _ in iter_soundscript_entries(text):
+        name = item.entry_name
+        key = name.lower()
+        if not name:
+            problems.append((line_of(start), "entry without a name"))
+        elif key in first_start:
+            problems.append((line_of(start), f'duplicate entry "{name}" (first defined at line {line_of(first_start[key])})'))
+        else:
+            first_start[key] = start
+        if not item.sounds:
+            problems.append((line_of(start), f'entry "{name}" has no wave or rndwave sounds'))
+        channel = item.channel
+        if channel and channel.upper() not in _CHANNELS_UPPER:
+            problems.append((line_of(start), f'entry "{name}" has unknown channel "{channel}"'))
+        soundlevel = item.soundlevel
+        if soundlevel and soundlevel.upper() not in _SNDLVLS_UPPER and not _SNDLVL_RE.match(soundlevel.strip()):
+            problems.append((line_of(start), f'entry "{name}" has unknown soundlevel "{soundlevel}"'))
+    problems.sort(key=lambda problem: problem[0])
+    return problems
+
+
+# Функция для получения имени ноды из имени WAV файла (prefix - первое слово имени проекта, если надо)
+def entry_name_from_file(file_name: str, prefix: Optional[str] = None) -> str:
+    if prefix:
+        file_name = prefix + "." + file_name
+    file_name = file_name.replace(".wav", "").replace(".WAV", "")
+    file_name = _NAME_CYRILLIC_RE.sub("", file_name)
+    file_name = _NAME_BAD_CHARS_RE.sub("_", file_name)
+    file_name = _NAME_UNDERSCORES_RE.sub("_", file_name)
+    return file_name.strip("_")
+
+
+# Функция чтобы преобразовывать абсолютный путь файла в путь относительно папки sound проекта.
+# None - файл не из папки sound этого проекта. Простое сравнение начала строк вместо commonpath/relpath:
+# путь уже абсолютный и нормализованный, а импорт зовёт это на каждый файл
+def sound_path_relative(path: str, gameinfo_folder: str) -> Optional[str]:
+    # Проверяем, начинается ли path с папки с гейминфо (normcase - на винде без учёта регистра)
+    folder = os.path.normcase(gameinfo_folder).rstrip("\\/") + os.sep
+    if not os.path.normcase(path).startswith(folder):
+        return None
+    parts = path[len(folder):].split(os.sep)
+    if parts[0].lower() != "sound":
+        return None
+    # Всё, что справа от "sound"
+    return "/".join(parts[1:])
+
+
+# Функция для разбора WAV файлов при импорте: [(имя ноды, путь относительно sound)] и список чужих файлов.
+# Имена ещё не уникальные - это делает EntryNameIndex при добавлении. progress(сделано, всего) - как у документа
+def resolve_sound_files(paths, gameinfo_folder, prefix=None, progress=None):
+    resolved = []
+    bad_paths = []
+    total = len(paths)
+    for index, path in enumerate(paths):
+        if progress is not None and not index % 100: progress(index, total)
+        path = os.path.abspath(path)
+        file_name = os.path.basename(path) or path
+        
+        # Фиксим имена
+        file_name = entry_name_from_file(file_name, prefix)
+
+        # Добавление пути файла в список звуков
+        try:
+            path_rel = sound_path_relative(path, gameinfo_folder)
+        except Exception:
+            path_rel = None
+        if path_rel is None:
+            bad_paths.append(path)
+            continue
+        resolved.append((file_name, path_rel))
+    return resolved, bad_paths
+
+
+PROGRESS_STEP = 2000 # раз во сколько нод разбор сообщает о прогрессе
+
+
+# Функция для чтения саундскрипта целиком в список нод
+def parse_soundscript(text: str) -> List[SoundEntry]:
+    return [item for item, _, _ in iter_soundscript_entries(text)]
+
+
+# Разделители между ключом и значением, как их пишет редактор
+FIELD_SEPARATORS = {"channel": "\t\t", "volume": "\t\t", "soundlevel": "\t", "pitch": "\t\t\t"}
+# Поля, которые не пишутся в файл если пустые
+OPTIONAL_FIELDS = ("volume", "pitch")
+
+
+# Текст звуков ноды начиная с ключа wave/rndwave (без отступа перед ключом)
+def format_sounds(sounds) -> str:
+    if not sounds:
+        return '"wave"\t\t""'
+    if len(sounds) == 1:
+        return f'"wave"\t\t\t"{sounds[0]}"'
+    waves = "".join(f'\n\t\t"wave"\t"{w}"' for w in sounds)
+    return f'"rndwave"\n\t\t{{{waves}\n\t}}'
+
+
+# Текст одной ноды от имени до закрывающей скобки, ровно в формате редактора
+def format_entry(item: SoundEntry) -> str:
+    out = [f'"{item.entry_name}"\n{{']
+    out.append(f'\t"channel"\t\t"{item.channel}"')
+    if item.volume: out.append(f'\t"volume"\t\t"{item.volume}"')
+    out.append(f'\t"soundlevel"\t"{item.soundlevel}"')
+    if item.pitch: out.append(f'\t"pitch"\t\t\t"{item.pitch}"')
+    out.append("\t" + format_sounds(item.sounds))
+    out.append("}")
+    return "\n".join(out)
+
+
+# Токены текста без учёта регистра и порядка - чтобы понять, теряет ли format_entry что-нибудь из ноды
+def _token_bag(text: str) -> List[str]:
+    return sorted(value.lower() for _, value, _, _ in iter_kv_tokens(text))
+
+
+# Данные строки таблицы для одной ноды (порядок столбцов как в таблице редактора)
+def table_row(item: SoundEntry) -> List[str]:
+    sounds = item.sounds
+    return [item.entry_name, item.channel, item.soundlevel, item.volume, item.pitch, "\n".join(sounds) + "\n" if sounds else ""]
+
+
+# Данные всей таблицы
+def table_data(items) -> List[List[str]]:
+    return [table_row(item) for item in items]
+
+
+# Функция для приведения нод саундскрипта к виду, в котором их пишет редактор. Всё между нодами
+# (шапка, комментарии, пустые строки) остаётся как было. Ноды, которые так не записать без потерь
+# (комментарии внутри, неизвестные ключи, условия, пустые значения), тоже остаются как были.
+# Возвращает (новый текст, имена оставленных как есть нод)
+def format_soundscript(text: str) -> Tuple[str, List[str]]:
+    newline = "\r\n" if "\r\n" in text[:4096] else "\n"
+    out = []
+    kept = []
+    pos = 0
+    for item, start, end in iter_soundscript_entries(text):
+        original = text[start:end]
+        formatted = format_entry(item)
+        if "//" in original or _token_bag(original) != _token_bag(formatted):
+            kept.append(item.entry_name)
+            continue
+        out.append(text[pos:start])
+        out.append(formatted.replace("\n", newline) if newline != "\n" else formatted)
+        pos = end
+    out.append(text[pos:])
+    return "".join(out), kept
+
+
+# Начало строки, в которой стоит позиция pos
+def _line_start(text: str, pos: int) -> int:
+    return text.rfind("\n", 0, pos) + 1
+
+
+# Диапазон для удаления куска [a, b): если он один на строке - удаляется вся строка вместе с переводом
+def _removal_span(text: str, a: int, b: int) -> Tuple[int, int]:
+    ls = _line_start(text, a)
+    le = text.find("\n", b)
+    if le < 0:
+        le = len(text)
+    if not text[ls:a].strip() and not text[b:le].strip():
+        return ls, min(le + 1, len(text))
+    return a, b
+
+
+# Точечная правка ноды в исходном тексте: меняются только те токены, значения которых разошлись с item.
+# Комментарии, неизвестные ключи и блоки, форматирование - всё остальное остаётся как было.
+def patch_entry(text: str, start: int, end: int, item, newline: str = "\n") -> str:
+    name = None             # (начало, конец, значение) токена имени
+    fields = {}             # ключ -> (начало ключа, начало значения, конец значения, значение)
+    sound_spans = []        # куски с wave/rndwave: (начало, конец)
+    wave = []               # значение одиночного wave
+    rndwave = []            # значения внутри rndwave
+    first_key = None        # начало первого ключа ноды, для отступа
+    close = end - 1         # закрывающая скобка ноды
+    depth = 0
+    key = None              # (значение, начало) ключа, для которого ждём значение
+    block = None            # (имя, начало) вложенного блока на глубине 2
+
+    for kind, value, a, b in iter_kv_tokens(text, start):
+        if a >= end:
+            break
+        if kind == TOKEN_OPEN:
+            if depth == 1 and key is not None:
+                block = (key[0].lower(), key[1])
+            depth += 1
+            key = None
+            continue
+        if kind == TOKEN_CLOSE:
+            depth -= 1
+            if depth == 1 and block is not None:
+                if block[0] == "rndwave":
+                    sound_spans.append((block[1], b))
+                block = None
+            elif depth == 0:
+                close = a
+            key = None
+            continue
+        if _is_condition(kind, value):
+            continue
+        if depth == 0:
+            if name is None:
+                name = (a, b, value)
+            continue
+        if key is None:
+            key = (value, a)
+            if depth == 1 and first_key is None:
+                first_key = a
+            continue
+        k = key[0].lower()
+        if depth == 1:
+            if k in ENTRY_FIELDS:
+                fields[k] = (key[1], a, b, value)
+            elif k == "wave":
+                sound_spans.append((key[1], b))
+                wave = [value] if value else []
+        elif depth == 2 and block is not None and block[0] == "rndwave" and k == "wave":
+            if value: rndwave.append(value)
+        key = None
+
+    # Отступ и место для вставки новых строк
+    indent = "\t"
+    if first_key is not None and not text[_line_start(text, first_key):first_key].strip():
+        indent = text[_line_start(text, first_key):first_key]
+    if sound_spans:
+        insert_at = min(a for a, _ in sound_spans)
+    else:
+        insert_at = close
+    one_line = bool(text[_line_start(text, insert_at):insert_at].strip())
+    if not one_line:
+        insert_at = _line_start(text, insert_at)
+
+    # Вставка новой строки (или куска, если нода записана в одну строку)
+    def insertion(s):
+        return (s + " ") if one_line else (indent + s + "\n")
+
+    edits = []  # (начало, конец, замена)
+    if name is not None and name[2] != item["entry_name"]:
+        edits.append((name[0], name[1], f'"{item["entry_name"]}"'))
+    for k in ENTRY_FIELDS:
+        new = item[k]
+        if k in fields:
+            ka, va, vb, old = fields[k]
+            if new == old:
+                continue
+            if not new and k in OPTIONAL_FIELDS:
+                a, b = _removal_span(text, ka, vb)
+                edits.append((a, b, ""))
+            else:
+                edits.append((va, vb, f'"{new}"'))
+        elif new:
+            edits.append((insert_at, insert_at, insertion(f'"{k}"{FIELD_SEPARATORS[k]}"{new}"')))
+    old_sounds = rndwave or wave
+    if list(item["sounds"]) != old_sounds:
+        if sound_spans:
+            sound_spans.sort()
+            a, b = sound_spans[0]
+            edits.append((a, b, format_sounds(item["sounds"])))
+            for a, b in sound_spans[1:]:
+                a, b = _removal_span(text, a, b)
+                edits.append((a, b, ""))
+        else:
+            edits.append((insert_at, insert_at, insertion(format_sounds(item["sounds"]))))
+
+    # Применяем правки с конца, чтобы позиции не съезжали
+    out = []
+    pos = end
+    for a, b, s in sorted(edits, key=lambda e: (e[0], e[1]), reverse=True):
+        out.append(text[b:pos])
+        out.append(s.replace("\n", newline) if newline != "\n" else s)
+        pos = a
+    out.append(text[start:pos])
+    return "".join(reversed(out))
+
+
+# Конкретное синтаксическое дерево саундскрипта (без потерь): исходный текст плюс позиции каждой ноды.
+# При сохранении нетронутые ноды копируются из исходника как есть, изменённые правятся точечно,
+# новые дописываются в формате редактора. Ноды узнаются по объекту (id словаря).
+class SoundscriptDocument:
+    # progress(позиция, длина текста) вызывается каждые PROGRESS_STEP нод; может кинуть исключение чтобы прервать разбор.
+    # entries - уже разобранные (нода, начало, конец), например в другом процессе - тогда текст заново не разбирается
+    def __init__(self, text: str, items=None, progress=None, entries=None):
+        self.newline = "\r\n" if "\r\n" in text[:4096] else "\n"
+        parsed = []
+        spans = []
+        prev_end = None
+        size = len(text)
+        for item, start, end in (iter_soundscript_entries(text) if entries is None else entries):
+            parsed.append(item)
+            if progress is not None and not len(parsed) % PROGRESS_STEP:
+                progress(end, size)
+            if prev_end is None:
+                # Пустые строки между шапкой и первой нодой уезжают вместе с нодой
+                prev_end = len(text[:start].rstrip())
+            spans.append((prev_end, start, end))
+            prev_end = end
+        # Можно подсунуть свои объекты нод (например после сохранения нового файла), если их столько же
+        if items is not None and len(items) == len(parsed):
+            parsed = list(items)
+        self._rebase(text, parsed, spans)
+
+    # Новый исходник: текст, ноды в порядке следования в нём и их позиции
+    def _rebase(self, text, items, spans):
+        self.text = text
+        self.items = items          # ноды в порядке исходника (их и отдаём наружу после загрузки)
+        self._order = list(items)   # своя копия порядка; заодно держит ссылки, чтобы id не переиспользовались
+        self._by_id = {id(item): item for item in items}
+        self.spans = {}             # id(нода) -> (начало отступа перед нодой, начало ноды, конец ноды)
+        for item, span in zip(items, spans):
+            self.spans[id(item)] = span
+        self.overrides = {}         # id(нода) -> текущий текст ноды, если она правилась после загрузки
+        self.dirty = set()          # id нод, изменённых с последнего сохранения
+        # Шапка файла (всё до первой ноды) и хвост (всё после последней) хранятся отдельно
+        self.head_end = spans[0][0] if spans else len(text)
+        self.tail_start = spans[-1][2] if spans else len(text)
+
+    # Пометить ноду изменённой
+    def mark_dirty(self, item):
+        self.dirty.add(id(item))
+
+    # Состояние документа до render (он сбрасывает dirty и может сменить исходник) - чтобы откатиться,
+    # если сохранение не дошло до конца
+    def snapshot(self):
+        state = dict(self.__dict__)
+        state["overrides"] = dict(self.overrides)
+        state["dirty"] = set(self.dirty)
+        return state
+
+    def restore(self, state):
+        self.__dict__.update(state)
+
+    # Есть ли у ноды кусок в исходнике
+    def has_span(self, item) -> bool:
+        return id(item) in self.spans
+
+    # Текущий текст ноды с учётом правок
+    def _entry_text(self, item) -> str:
+        key = id(item)
+        body = self.overrides.get(key)
+        if body is None:
+            _, start, end = self.spans[key]
+            if key not in self.dirty:
+                return self.text[start:end]
+            return patch_entry(self.text, start, end, item, self.newline)
+        if key in self.dirty:
+            body = patch_entry(body, 0, len(body), item, self.newline)
+        return body
+
+    # Есть ли что сохранять для такого списка нод (правки, перестановки, новые или удалённые ноды)
+    def changed(self, items) -> bool:
+        return bool(self.dirty) or items != self._order
+
+    # Собрать текст файла для текущего списка нод
+    def render(self, items) -> str:
+        # Порядок нод тот же, что в исходнике (сравнение списков идёт по объектам) -
+        # копируем исходник большими кусками и вклеиваем только изменённые ноды
+        if items == self._order:
+            return self._render_in_place()
+        return self._render_rebuild(items)
+
+    # Быстрое сохранение без перестановок: цена примерно как у копирования файла
+    def _render_in_place(self) -> str:
+        text = self.text
+        changed = set(self.overrides)
+        changed.update(self.dirty)
+        by_id = self._by_id
+        out = []
+        pos = 0
+        for key in sorted(changed, key=lambda k: self.spans[k][1]):
+            item = by_id[key]
+            _, start, end = self.spans[key]
+            body = self._entry_text(item)
+            out.append(text[pos:start])
+            out.append(body)
+            if key in self.dirty:
+                self.overrides[key] = body
+            pos = end
+        out.append(text[pos:])
+        self.dirty.clear()
+        return "".join(out)
+
+    # Сохранение с перестановками, удалениями и новыми нодами: собираем текст заново
+    # (нетронутые ноды всё равно копируются кусками) и делаем его новым исходником
+    def _render_rebuild(self, items) -> str:
+        text = self.text
+        nl = self.newline
+        out = [text[:self.head_end]]
+        out_len = self.head_end
+        spans = []
+        run_start = run_end = None   # непрерывный кусок исходника, который копируется одним срезом
+        run_shift = 0                # сдвиг позиций нод внутри этого куска
+
+        for item in items:
+            key = id(item)
+            span = self.spans.get(key)
+            if span is not None and key not in self.dirty and key not in self.overrides:
+                lead, start, end = span
+                if run_end is not None and lead == run_end:
+                    run_end = end
+                else:
+                    if run_end is not None:
+                        out.append(text[run_start:run_end])
+                        out_len += run_end - run_start
+                    if lead == start and out_len > 0:
+                        # У ноды нет отступа (была первой в файле) - отделяем её пустой строкой
+                        out.append(nl + nl)
+                        out_len += 2 * len(nl)
+                    run_start, run_end = lead, end
+                    run_shift = out_len - lead
+                spans.append((lead + run_shift, start + run_shift, end + run_shift))
+                continue
+
+            if run_end is not None:
+                out.append(text[run_start:run_end])
+                out_len += run_end - run_start
+                run_start = run_end = None
+            if span is not None:
+                lead, start, _ = span
+                lead_text = text[lead:start] or (nl + nl if out_len > 0 else "")
+                body = self._entry_text(item)
+            else:
+                lead_text = nl + nl if out_len > 0 else ""
+                body = format_entry(item)
+                if nl != "\n":
+                    body = body.replace("\n", nl)
+            out.append(lead_text)
+            out.append(body)
+            spans.append((out_len, out_len + len(lead_text), out_len + len(lead_text) + len(body)))
+            out_len += len(lead_text) + len(body)
+
+        if run_end is not None:
+            out.append(text[run_start:run_end])
+        out.append(text[self.tail_start:])
+        result = "".join(out)
+
+        # Теперь исходником становится то, что сохранили
+        head_end = self.head_end
+        self._rebase(result, list(items), spans)
+        if not spans:
+            self.head_end = self.tail_start = head_end
+        return result
+
+
+# Индекс имён нод: имя -> строки таблицы, где оно встречается (имена могут повторяться, если пользователь
+# так захотел). Плюс счётчики суффиксов для каждого базового имени, чтобы уникальное имя вида name_N
+# находилось за амортизированное O(1), а не перебором по всему списку.
+class EntryNameIndex:
+    def __init__(self, items=()):
+        self.rebuild(items)
+
+    # Полная перестройка по списку нод (после открытия файла, удаления строк и т.п.)
+    def rebuild(self, items):
+        self.rows_by_name = {}   # имя -> множество строк
+        self.next_suffix = {}    # базовое имя -> номер, с которого искать свободный суффикс
+        for row, item in enumerate(items):
+            self.rows_by_name.setdefault(item["entry_name"], set()).add(row)
+
+    def __contains__(self, name) -> bool:
+        return name in self.rows_by_name
+
+    def __len__(self) -> int:
+        return len(self.rows_by_name)
+
+    # Все строки с таким именем
+    def rows(self, name):
+        return self.rows_by_name.get(name, set())
+
+    # Первая строка с таким именем или None
+    def row(self, name) -> Optional[int]:
+        rows = self.rows_by_name.get(name)
+        return min(rows) if rows else None
+
+    # Имя появилось в строке row
+    def add(self, name, row):
+        self.rows_by_name.setdefault(name, set()).add(row)
+
+    # Имя ушло из строки row
+    def remove(self, name, row):
+        rows = self.rows_by_name.get(name)
+        if rows is None:
+            return
+        rows.discard(row)
+        if rows:
+            return
+        del self.rows_by_name[name]
+        # Освободился суффикс - откатываем счётчик, чтобы снова выдавался наименьший свободный номер
+        base, sep, number = name.rpartition("_")
+        if sep and number.isdigit() and base in self.next_suffix:
+            self.next_suffix[base] = min(self.next_suffix[base], int(number))
+
+    # Переименование ноды в строке row
+    def rename(self, old_name, new_name, row):
+        self.remove(old_name, row)
+        self.add(new_name, row)
+
+    # Уникальное имя: само base, если свободно, иначе base_1, base_2... (наименьший свободный номер)
+    def unique_name(self, base) -> str:
+        if base not in self.rows_by_name:
+            return base
+        i = self.next_suffix.get(base, 1)
+        while f"{base}_{i}" in self.rows_by_name:
+            i += 1
+        self.next_suffix[base] = i + 1
+        return f"{base}_{i}"
+
+
+# Символы перед путём звука, которые движок понимает как флаги (*, #, ), ^ и т.п.) - к файлу отношения не имеют
+SOUND_CHARS = "*#@><^)}$!?&~`+%"
+
+
+# Ключ пути звука в индексе: без флагов, прямые слэши, нижний регистр (движок ищет файлы без учёта регистра)
+def sound_key(wave: str) -> str:
+    return wave.lstrip(SOUND_CHARS).replace("\\", "/").lower()
+
+
+# Индекс всех файлов в папке sound проекта: путь относительно sound -> размер и время изменения.
+# Обновляется по разнице: папка, у которой не поменялось время изменения, не перечитывается
+# (время папки меняется когда в ней создают, удаляют или переименовывают файлы), так что повторное
+# обновление большого проекта - это только stat каждой папки.
+class SoundFileIndex:
+    VERSION = 1
+
+    def __init__(self, sound_folder: str):
+        self.sound_folder = sound_folder
+        self.dirs = {}      # папка относительно sound ("" - сама sound) -> (mtime_ns, [подпапки], [(имя, размер, mtime_ns)])
+        self.files = {}     # sound_key(путь) -> (путь как на диске, размер, mtime_ns)
+        self._sorted = None # отсортированные ключи для автодополнения, строятся по запросу
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, wave) -> bool:
+        return sound_key(wave) in self.files
+
+    # Есть ли файл звука (путь как в саундскрипте, флаги и регистр не важны)
+    def exists(self, wave: str) -> bool:
+        return sound_key(wave) in self.files
+
+    # Пути звуков, начинающиеся с prefix (для автодополнения), не больше limit штук
+    def complete(self, prefix: str, limit: int = 100) -> List[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self.files)
+        key = sound_key(prefix)
+        keys = self._sorted
+        out = []
+        for i in range(bisect_left(keys, key), len(keys)):
+            if not keys[i].startswith(key) or len(out) >= limit:
+                break
+            out.append(self.files[keys[i]][0])
+        return out
+
+    # Обновить индекс с диска. Возвращает (сколько файлов добавилось, сколько пропало, сколько папок перечитано).
+    # progress(просмотрено папок, известно папок) - может кинуть исключение чтобы прервать обход
+    def refresh(self, progress=None) -> Tuple[int, int, int]:
+        old_dirs = self.dirs
+        dirs = {}
+        rescanned = 0
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            if progress is not None and not len(dirs) % 200:
+                progress(len(dirs), max(len(old_dirs), len(dirs) + len(stack)))
+            full = os.path.join(self.sound_folder, rel) if rel else self.sound_folder
+            try:
+                mtime = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+            old = old_dirs.get(rel)
+            if old is not None and old[0] == mtime:
+                record = old
+            else:
+                subdirs = []
+                files = []
+                try:
+                    with os.scandir(full) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir():
+                                    subdirs.append(entry.name)
+                                elif entry.is_file():
+                                    st = entry.stat()
+                                    files.append((entry.name, st.st_size, st.st_mtime_ns))
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+                record = (mtime, subdirs, files)
+                rescanned += 1
+            dirs[rel] = record
+            for name in record[1]:
+                stack.append(f"{rel}/{name}" if rel else name)
+
+        previous = self.files
+        self.dirs = dirs
+        self._rebuild_files()
+        added = sum(1 for key in self.files if key not in previous)
+        removed = len(previous) - (len(self.files) - added)
+        if len(dirs) != len(old_dirs): rescanned += 1 # папку удалили - тоже изменение
+        return added, removed, rescanned
+
+    # Плоский словарь файлов из записей папок
+    def _rebuild_files(self):
+        files = {}
+        for rel, (_, _, dir_files) in self.dirs.items():
+            for name, size, mtime in dir_files:
+                path = f"{rel}/{name}" if rel else name
+                files[sound_key(path)] = (path, size, mtime)
+        self.files = files
+        self._sorted = None
+
+    # Сохранить индекс в JSON файл (рядом с кэшем редактора)
+    def save(self, path: str):
+        data = {"version": self.VERSION, "sound_folder": self.sound_folder, "dirs": self.dirs}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    # Загрузить индекс из файла. Если файла нет, он битый или от другой папки - пустой индекс
+    @classmethod
+    def load(cls, path: str, sound_folder: str) -> "SoundFileIndex":
+        index = cls(sound_folder)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != cls.VERSION or data.get("sound_folder") != sound_folder:
+                return index
+            index.dirs = {rel: (mtime, subdirs, [tuple(file) for file in files]) for rel, (mtime, subdirs, files) in data["dirs"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            index.dirs = {}
+        index._rebuild_files()
+        return index
+
+
+# Проверка что звуки нод есть на диске - по индексу папки sound (поиск в множестве, без os.path.exists).
+# Помнит результат для каждой ноды, поэтому после правки одной ноды перепроверяется только она.
+class SoundValidator:
+    def __init__(self, index: SoundFileIndex):
+        self.index = index
+        self.missing = {}   # id(нода) -> (нода, [пути которых нет]); только ноды с проблемами
+
+    # Пути звуков ноды, которых нет в индексе
+    # (сначала просто нижний регистр - обычно этого хватает, полная нормализация только для промахов)
+    def missing_sounds(self, item) -> List[str]:
+        files = self.index.files
+        return [wave for wave in item.sounds if wave.lower() not in files and sound_key(wave) not in files]
+
+    # Проверить все ноды заново. Возвращает количество битых путей
+    def validate_all(self, items) -> int:
+        files = self.index.files
+        missing = {}
+        for item in items:
+            bad = [wave for wave in item.sounds if wave.lower() not in files and sound_key(wave) not in files]
+            if bad:
+                missing[id(item)] = (item, bad)
+        self.missing = missing
+        return self.total()
+
+    # Проверить одну ноду (после правки). True - у неё есть битые пути
+    def validate(self, item) -> bool:
+        bad = self.missing_sounds(item)
+        if bad:
+            self.missing[id(item)] = (item, bad)
+        else:
+            self.missing.pop(id(item), None)
+        return bool(bad)
+
+    # Забыть ноду (удалена из списка)
+    def discard(self, item):
+        self.missing.pop(id(item), None)
+
+    def is_missing(self, item) -> bool:
+        return id(item) in self.missing
+
+    # Всего битых путей
+    def total(self) -> int:
+        return sum(len(bad) for _, bad in self.missing.values())
+
+    # Отчёт: [(номер строки, имя ноды, путь)] в порядке нод
+    def report(self, items) -> List[Tuple[int, str, str]]:
+        out = []
+        missing = self.missing
+        for row, item in enumerate(items):
+            entry = missing.get(id(item))
+            if entry is not None:
+                out.extend((row, item.entry_name, wave) for wave in entry[1])
+        return out
+
+
+SEARCH_BLOCK_ROWS = 1024 # строк в одном блоке поискового индекса
+SEARCH_COLUMNS = ((0, "entry_name"), (5, "sounds")) # где ищем: столбец таблицы -> поле ноды
+
+
+# Поисковый индекс по именам нод и путям звуков. Текст хранится блоками по SEARCH_BLOCK_ROWS строк: каждый блок -
+# одна строка в нижнем регистре, где на каждой строчке текст одной клеточки (пути звуков через таб), а после \x01
+# номер клеточки (строка * 8 + столбец). Поиск - одна регулярка findall на блок, которая за строчку даёт не больше
+# одного совпадения и сразу отдаёт номер клеточки, так что даже на сотнях тысяч совпадений питоновского цикла
+# по тексту нет. Правка строки пересобирает только её блок, и только при следующем поиске.
+class SearchIndex:
+    def __init__(self):
+        self.blocks = []    # номер блока -> (сколько в нём строк, текст) или None если устарел
+        self.version = 0    # растёт при каждом изменении, чтобы знать что старые результаты поиска устарели
+
+    # Строки начиная с from_row поменялись местами/удалились/добавились
+    def invalidate(self, from_row=0):
+        del self.blocks[from_row // SEARCH_BLOCK_ROWS:]
+        self.version += 1
+
+    # Строка row поменялась
+    def touch(self, row):
+        block = row // SEARCH_BLOCK_ROWS
+        if block < len(self.blocks):
+            self.blocks[block] = None
+        self.version += 1
+
+    # Пересобрать устаревшие блоки (новые строки в конце тоже видны - у последнего блока не сойдётся число строк)
+    def _sync(self, items):
+        count = (len(items) + SEARCH_BLOCK_ROWS - 1) // SEARCH_BLOCK_ROWS
+        blocks = self.blocks
+        del blocks[count:]
+        while len(blocks) < count:
+            blocks.append(None)
+        for number in range(count):
+            first = number * SEARCH_BLOCK_ROWS
+            rows = min(SEARCH_BLOCK_ROWS, len(items) - first)
+            block = blocks[number]
+            if block is None or block[0] != rows:
+                blocks[number] = (rows, self._block_text(items, first, rows))
+
+    @staticmethod
+    def _block_text(items, first, rows):
+        lines = []
+        for row in range(first, first + rows):
+            item = items[row]
+            for column, field in SEARCH_COLUMNS:
+                text = "\t".join(item.sounds) if field == "sounds" else item[field]
+                lines.append(f"{text}\x01{row * 8 + column}")
+        return "\n" + "\n".join(lines).lower()
+
+    # Регулярка для запроса. substring - подстрока, prefix - начало имени или пути, regex - регулярка
+    # (^ и $ в ней - начало и конец имени или пути). Номер клеточки - последняя группа. Для regex может кинуть
+    # re.error (и на любую другую проблему с регуляркой пользователя тоже re.error)
+    @staticmethod
+    def compile(query, mode="substring"):
+        flags = re.MULTILINE
+        if mode == "regex":
+            if query.startswith("^"): query = "(?<=[\n\t])" + query[1:]
+            if query.endswith("$") and not query.endswith("\\$"): query = query[:-1] + "(?=[\t\x01])"
+            needle = f"(?:{query})"
+            # Текст уже в нижнем регистре, IGNORECASE нужен только если в запросе есть большие буквы (или \D, \W...),
+            # а без него re находит литеральное начало регулярки быстрым поиском
+            if query != query.lower(): flags |= re.IGNORECASE
+        elif mode == "prefix":
+            # Сначала сама подстрока, а потом проверка что перед ней начало строчки или таб: регулярка
+            # начинается с литерала, и re ищет его быстрым поиском подстроки, а не пробует каждую позицию
+            needle = re.escape(query.lower())
+            needle = f"{needle}(?<=[\n\t]{needle})"
+        else:
+            needle = re.escape(query.lower())
+        # Хвост до конца строчки (.* - у re для него быстрый путь) съедает остальные совпадения в этой клеточке и достаёт её номер
+        try:
+            return re.compile(needle + ".*\x01" + r"(\d+)", flags)
+        except (OverflowError, ValueError, RecursionError) as e: # слишком большая или глубокая регулярка
+            raise re.error(str(e))
+
+    # Найти клеточки: номера клеточек в порядке таблицы, каждая один раз (в (строка, столбец) переводит cell)
+    def search(self, items, query, mode="substring") -> List[int]:
+        if not query: return []
+        self._sync(items)
+        pattern = self.compile(query, mode)
+        found = []
+        if pattern.groups == 1:
+            findall = pattern.findall
+            for _, text in self.blocks:
+                found.extend(findall(text))
+        else:
+            # Группы в самом запросе (re:(step|run)) - findall вернул бы кортежи, номер клеточки в последней группе
+            for _, text in self.blocks:
+                found.extend(m.group(pattern.groups) for m in pattern.finditer(text))
+        return list(map(int, found))
+
+    # Номер клеточки -> (строка, столбец)
+    @staticmethod
+    def cell(number) -> Tuple[int, int]:
+        return divmod(number, 8)
+
+    # (строка, столбец) -> номер клеточки
+    @staticmethod
+    def number(row, column) -> int:
+        return row * 8 + column
+
+
+FILTER_FIELDS = ("channel", "soundlevel", "volume", "pitch") # поля, по которым фильтр ищет точные значения
+FILTER_ALIASES = {"chan": "channel", "sndlvl": "soundlevel", "level": "soundlevel", "vol": "volume"}
+
+
+# Индексы значений столбцов для фильтра: поле -> значение в нижнем регистре -> номера строк по возрастанию.
+# Строятся лениво при первом фильтре по полю, правка поля сбрасывает индекс только этого поля
+class ColumnIndex:
+    def __init__(self):
+        self.fields = {}
+
+    # Сбросить индекс поля (None - всех полей, например когда строки съехали)
+    def invalidate(self, field=None):
+        if field is None:
+            self.fields.clear()
+        else:
+            self.fields.pop(field, None)
+
+    def values(self, items, field) -> Dict[str, List[int]]:
+        index = self.fields.get(field)
+        if index is None:
+            index = {}
+            lowered = {} # значения интернированы, разных мало - нижний регистр считаем один раз на значение
+            for row, item in enumerate(items):
+                raw = item[field]
+                value = lowered.get(raw)
+                if value is None:
+                    value = lowered[raw] = raw.lower()
+                rows = index.get(value)
+                if rows is None:
+                    index[value] = [row]
+                else:
+                    rows.append(row)
+            self.fields[field] = index
+        return index
+
+    def rows(self, items, field, value) -> List[int]:
+        return self.values(items, field).get(value.lower(), [])
+
+
+# Маска имени из фильтра: с * или ? - на всё имя, иначе подстрока. Регистр не важен
+def _name_pattern(word):
+    if "*" not in word and "?" not in word:
+        return re.compile(re.escape(word), re.IGNORECASE)
+    regex = "".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in word)
+    return re.compile(f"^(?:{regex})\\Z", re.IGNORECASE | re.DOTALL)
+
+
+# Фильтр строк таблицы, например: npc_alyx.* channel=CHAN_VOICE soundlevel=SNDLVL_NORM|SNDLVL_75dB pitch="95, 100"
+# Слова без "=" - имена нод, поле=значение|значение - точные значения столбцов, всё вместе через И.
+# Кривой фильтр - ValueError
+class RowFilter:
+    def __init__(self, text):
+        self.text = text
+        self.names = []   # регулярки для имён
+        self.fields = {}  # поле -> [значения]
+        try:
+            words = shlex.split(text)
+        except ValueError as e:
+            raise ValueError(f"Bad filter: {e}")
+        for word in words:
+            key, sep, value = word.partition("=")
+            if not sep:
+                self.names.append(_name_pattern(word))
+                continue
+            field = FILTER_ALIASES.get(key.lower(), key.lower())
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter field: {key}")
+            self.fields.setdefault(field, []).extend(v.strip() for v in value.split("|"))
+
+    def __bool__(self):
+        return bool(self.names or self.fields)
+
+    # Номера подходящих нод по возрастанию. Сначала поля по индексам (пересечение от самого маленького),
+    # имена проверяются только у оставшихся
+    def rows(self, items, columns: ColumnIndex) -> List[int]:
+        found = []
+        for field, values in self.fields.items():
+            index = columns.values(items, field)
+            rows = set()
+            for value in values:
+                rows.update(index.get(value.lower(), ()))
+            found.append(rows)
+        if found:
+            found.sort(key=len)
+            rows = sorted(found[0].intersection(*found[1:]))
+        else:
+            rows = range(len(items))
+        for pattern in self.names:
+            match = pattern.search
+            rows = [row for row in rows if match(items[row].entry_name)]
+        return list(rows)
+
+
+# Числа за именованными значениями - для сортировки, чтобы SNDLVL_NORM стоял рядом с 75dB, а PITCH_NORM рядом со 100
+SORT_NAMED_VALUES = {
+    "sndlvl_none": 0, "sndlvl_idle": 60, "sndlvl_talking": 60, "sndlvl_static": 66, "sndlvl_norm": 75, "sndlvl_gunfire": 140,
+    "pitch_low": 95, "pitch_norm": 100, "pitch_high": 120,
+    "vol_norm": 1,
+}
+_SORT_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_SORT_DIGITS_RE = re.compile(r"\d+")
+_CHANNEL_ORDER = {channel.lower(): i for i, channel in enumerate(CHANNELS_LIST)}
+
+
+# Ключ сортировки текста с числами внутри: npc_2 раньше npc_10 (числа дополняются нулями, ключ - простая строка,
+# их сравнение быстрее чем кортежей)
+def _natural_key(text):
+    return _SORT_DIGITS_RE.sub(_pad_number, text.lower())
+
+
+def _pad_number(m):
+    return m.group().rjust(12, "0")
+
+
+# Ключ сортировки значения: числа и диапазоны ("0.5, 1", "95, 100", "SNDLVL_75dB", "PITCH_NORM") по числам,
+# остальное текстом после чисел, пустые в конце
+def _value_key(value):
+    numbers = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        number = SORT_NAMED_VALUES.get(part)
+        if number is None:
+            m = _SORT_NUMBER_RE.search(part)
+            if m is None:
+                return (1, value.lower())
+            number = float(m.group())
+        numbers.append(number)
+    return (0, tuple(numbers)) if numbers else (2,)
+
+
+# Ключ сортировки поля ноды
+def sort_key(field, item):
+    if field == "entry_name":
+        return _natural_key(item.entry_name)
+    if field == "sounds":
+        sounds = item.sounds
+        return (len(sounds), sounds[0].lower() if sounds else "")
+    value = item[field]
+    if field == "channel":
+        position = _CHANNEL_ORDER.get(value.lower())
+        if position is not None:
+            return (0, (position,))
+    return _value_key(value)
+
+
+# Кэш ключей сортировки: поле -> ключи по номерам нод. Правка ноды пересчитывает только её ключи,
+# порядок - перестановка номеров нод, сами ноды не переставляются
+class SortKeys:
+    def __init__(self):
+        self.fields = {}
+        self.key_funcs = {} # поля не из ноды (например заголовки WAV): поле -> функция(нода) -> ключ
+
+    # Сбросить всё (строки съехали) или только ключи поля field
+    def invalidate(self, field=None):
+        if field is None:
+            self.fields.clear()
+        else:
+            self.fields.pop(field, None)
+
+    def _key(self, field, item):
+        func = self.key_funcs.get(field)
+        return func(item) if func is not None else sort_key(field, item)
+
+    def keys(self, items, field) -> list:
+        keys = self.fields.get(field)
+        if keys is None:
+            func = self.key_funcs.get(field)
+            if func is not None:
+                keys = [func(item) for item in items]
+            elif field in ("entry_name", "sounds"):
+                keys = [sort_key(field, item) for item in items]
+            else:
+                # Значения интернированы и их мало - ключ считаем один раз на значение
+                memo = {}
+                keys = []
+                for item in items:
+                    value = item[field]
+                    key = memo.get(value)
+                    if key is None:
+                        key = memo[value] = sort_key(field, item)
+                    keys.append(key)
+            self.fields[field] = keys
+        return keys
+
+    # Нода row поменялась (fields - какие поля, None - все)
+    def touch(self, items, row, fields=None):
+        for field, keys in self.fields.items():
+            if fields is None or field in fields:
+                keys[row] = self._key(field, items[row])
+
+    # Перестановка: номера нод rows (по умолчанию все) по полю; равные остаются в порядке номеров
+    def order(self, items, field, rows=None, reverse=False) -> List[int]:
+        keys = self.keys(items, field)
+        return sorted(range(len(items)) if rows is None else rows, key=keys.__getitem__, reverse=reverse)
+
+    # Шаг вставки после правки одной ноды: вынуть row из order и вставить на своё место бинарным поиском,
+    # вместо сортировки заново. Возвращает (старая позиция, новая позиция)
+    def reinsert(self, items, order, row, field, reverse=False) -> Tuple[int, int]:
+        keys = self.keys(items, field)
+        old = order.index(row)
+        del order[old]
+        key = keys[row]
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = order[mid]
+            other_key = keys[other]
+            if (other_key > key if reverse else other_key < key) or (other_key == key and other < row):
+                lo = mid + 1
+            else:
+                hi = mid
+        order.insert(lo, row)
+        return old, lo
+
+
+JOURNAL_MAX_BYTES = 32 << 20 # примерный потолок памяти журнала правок, старые правки выкидываются
+
+
+# Примерный размер значения поля в журнале (строки интернированы и общие с нодами, так что это с запасом)
+def _journal_value_size(value):
+    if isinstance(value, tuple):
+        return 56 + 8 * len(value) + sum(len(v) for v in value)
+    return 50 + len(value)
+
+
+def _journal_item_size(item):
+    return 300 + len(item.entry_name) + _journal_value_size(item.sounds)
+
+
+# Одна правка: kind - "set" (data: [(строка, поле, старое, новое)]), "delete" (data: [(строка, нода)] по возрастанию
+# строк, как они стояли до удаления) или "insert" (data: (первая строка, [ноды]) - ноды добавлены подряд)
+class EditCommand:
+    __slots__ = ("kind", "label", "data", "size")
+
+    def __init__(self, kind, label, data, size):
+        self.kind = kind
+        self.label = label
+        self.data = data
+        self.size = size
+
+    # Строки, которых касается правка
+    def rows(self) -> List[int]:
+        if self.kind == "insert":
+            start, added = self.data
+            return list(range(start, start + len(added)))
+        return sorted({change[0] for change in self.data})
+
+    # Поля, которых касается правка ("set"), None - строки целиком
+    def fields(self):
+        if self.kind != "set": return None
+        return sorted({field for _, field, _, _ in self.data})
+
+
+# Журнал правок для Undo/Redo. Хранит не копии списка нод, а только обратимые изменения: какое поле какой строки
+# было каким и стало каким, какие ноды на каких местах удалены, какие добавлены. Отмена и повтор стоят
+# столько же, сколько сама правка. Журнал ограничен по примерному размеру: старые правки выкидываются.
+class EditJournal:
+    def __init__(self, max_bytes=JOURNAL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.size = 0   # примерный размер undo_stack + redo_stack в байтах
+        self.on_change = None   # on_change(правка, undo) после каждой новой, отменённой и повторённой правки
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.size = 0
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def _push(self, command):
+        # Новая правка - повторять больше нечего
+        for old in self.redo_stack:
+            self.size -= old.size
+        self.redo_stack.clear()
+        self.undo_stack.append(command)
+        self.size += command.size
+        # Последнюю правку держим в любом случае, даже если она одна больше потолка
+        while self.size > self.max_bytes and len(self.undo_stack) > 1:
+            self.size -= self.undo_stack.popleft().size
+        if self.on_change: self.on_change(command, False)
+        return command
+
+    # Поля нод поменялись: changes - [(строка, поле, старое значение, новое значение)]
+    def record_set(self, label, changes):
+        changes = [change for change in changes if change[2] != change[3]]
+        if not changes: return None
+        size = 64 + sum(24 + _journal_value_size(old) + _journal_value_size(new) for _, _, old, new in changes)
+        return self._push(EditCommand("set", label, changes, size))
+
+    # Ноды удалены: removed - [(строка до удаления, нода)]
+    def record_delete(self, label, removed):
+        if not removed: return None
+        removed = sorted(removed, key=lambda change: change[0])
+        size = 64 + sum(16 + _journal_item_size(item) for _, item in removed)
+        return self._push(EditCommand("delete", label, removed, size))
+
+    # Ноды добавлены подряд начиная со строки start
+    def record_insert(self, label, start, added):
+        if not added: return None
+        size = 64 + sum(8 + _journal_item_size(item) for item in added)
+        return self._push(EditCommand("insert", label, (start, list(added)), size))
+
+    # Отменить последнюю правку в items. Возвращает отменённую правку или None
+    def undo(self, items) -> Optional[EditCommand]:
+        if not self.undo_stack: return None
+        command = self.undo_stack.pop()
+        self._apply(items, command, undo=True)
+        self.redo_stack.append(command)
+        if self.on_change: self.on_change(command, True)
+        return command
+
+    # Повторить последнюю отменённую правку. Возвращает её или None
+    def redo(self, items) -> Optional[EditCommand]:
+        if not self.redo_stack: return None
+        command = self.redo_stack.pop()
+        self._apply(items, command, undo=False)
+        self.undo_stack.append(command)
+        if self.on_change: self.on_change(command, False)
+        return command
+
+    @staticmethod
+    def _apply(items, command, undo):
+        if command.kind == "set":
+            for row, field, old, new in (reversed(command.data) if undo else command.data):
+                items[row][field] = old if undo else new
+        elif command.kind == "delete":
+            if undo:
+                # По возрастанию: каждая нода встаёт ровно на ту строку, где была
+                for row, item in command.data:
+                    items.insert(row, item)
+            else:
+                for row, _ in reversed(command.data):
+                    del items[row]
+        else:
+            start, added = command.data
+            if undo:
+                del items[start:start + len(added)]
+            else:
+                items[start:start] = added
+
+
+AUTOSAVE_VERSION = 1
+
+
+# Нода для журнала автосохранения и обратно
+def _entry_to_list(item):
+    return [item.entry_name, item.channel, item.soundlevel, item.volume, item.pitch, list(item.sounds)]
+
+
+def _entry_from_list(data):
+    entry_name, channel, soundlevel, volume, pitch, sounds = data
+    return SoundEntry(entry_name, channel=channel, soundlevel=soundlevel, volume=volume, pitch=pitch, sounds=sounds)
+
+
+# Запись журнала автосохранения для правки из EditJournal (undo - правка отменена, пишем обратное действие):
+#   {"op": "set", "changes": [[строка, поле, значение], ...]}
+#   {"op": "delete", "rows": [строки до удаления по возрастанию]}
+#   {"op": "insert", "entries": [[строка после вставки, нода], ...]} по возрастанию строк
+#   {"op": "order", "rows": [старые номера нод в новом порядке]}
+def autosave_record(command: EditCommand, undo=False) -> Dict[str, Any]:
+    if command.kind == "set":
+        if undo:
+            return {"op": "set", "changes": [[row, field, old] for row, field, old, _ in reversed(command.data)]}
+        return {"op": "set", "changes": [[row, field, new] for row, field, _, new in command.data]}
+    if command.kind == "delete":
+        if undo:
+            return {"op": "insert", "entries": [[row, _entry_to_list(item)] for row, item in command.data]}
+        return {"op": "delete", "rows": [row for row, _ in command.data]}
+    start, added = command.data
+    if undo:
+        return {"op": "delete", "rows": list(range(start, start + len(added)))}
+    return {"op": "insert", "entries": [[start + i, _entry_to_list(item)] for i, item in enumerate(added)]}
+
+
+# Применить записи журнала автосохранения к items. Возвращает ноды, у которых менялись поля.
+# Кривая запись - ValueError (ноды до неё уже поменяны)
+def replay_autosave(items, records) -> List[SoundEntry]:
+    changed = {}
+    for number, record in enumerate(records, start=1):
+        try:
+            op = record["op"]
+            if op == "set":
+                for row, field, value in record["changes"]:
+                    item = items[row]
+                    item[field] = value
+                    changed[id(item)] = item
+            elif op == "delete":
+                for row in reversed(record["rows"]):
+                    del items[row]
+            elif op == "insert":
+                for row, data in record["entries"]:
+                    if not 0 <= row <= len(items): raise IndexError(row)
+                    items.insert(row, _entry_from_list(data))
+            elif op == "order":
+                items[:] = [items[row] for row in record["rows"]]
+            else:
+                raise KeyError(op)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"change {number}: {e!r}")
+    return list(changed.values())
+
+
+# Автосохранение: журнал правок, который только дописывается в конец файла (одна запись JSON на строку,
+# первая строка - от какого состояния считать: файл и сколько в нём нод). Записи копятся в памяти и пишутся
+# пачками с fsync, так что правка стоит строчку в файле, а не перезапись всего скрипта. При сохранении
+# документа журнал начинается заново (reset) - это и есть сжатие.
+class AutosaveLog:
+    def __init__(self, path):
+        self.path = path
+        self.header = None   # {"version", "source", "entries"}, None - журнал ещё не начат
+        self.lines = []      # строки JSON всех записей с начала журнала
+        self.file = None
+        self.written = 0     # сколько из них уже в файле
+
+    # Начать журнал заново от состояния "файл source (None - новый скрипт) с entries нод"; старый файл удаляется.
+    # keep_from - оставить записи начиная с этого номера (правки, сделанные пока файл писался в фоне)
+    def reset(self, source, entries, keep_from=None):
+        kept = self.lines[keep_from:] if keep_from is not None else []
+        self.close()
+        self.header = {"version": AUTOSAVE_VERSION, "source": source, "entries": entries}
+        self.lines = kept
+        self.written = 0
+        self._remove()
+
+    # Сколько записей с начала журнала (метка для reset(keep_from=...))
+    def count(self) -> int:
+        return len(self.lines)
+
+    def add(self, command, undo=False):
+        self.add_record(autosave_record(command, undo))
+
+    def add_record(self, record):
+        self.lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+    # Записать накопленное и fsync. Возвращает сколько записей ушло в файл
+    def flush(self) -> int:
+        pending = self.lines[self.written:]
+        if not pending or self.header is None: return 0
+        if self.file is None:
+            self.file = open(self.path, "w", encoding="utf-8", newline="\n")
+            self.file.write(json.dumps(self.header, ensure_ascii=False) + "\n")
+        self.file.write("\n".join(pending) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.written = len(self.lines)
+        return len(pending)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # Журнал больше не нужен (всё сохранено или пользователь отказался от правок)
+    def discard(self):
+        self.close()
+        self.header = None
+        self.lines = []
+        self.written = 0
+        self._remove()
+
+    def _remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    # Прочитать журнал после падения: (заголовок, записи) или None если журнала нет.
+    # Недописанная последняя строка (падение посреди записи) и всё после неё отбрасываются
+    @staticmethod
+    def load(path):
+        if not os.path.exists(path): return None
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().split("\n")
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None
+        if not isinstance(header, dict) or header.get("version") != AUTOSAVE_VERSION: return None
+        records = []
+        for line in lines[1:]:
+            if not line: continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        return header, records
+
+SAVE_BUFFER_SIZE = 1 << 20 # буфер записи файла - пишем крупными кусками, а не по строчке
+
+# Имя n-й резервной копии: file.txt.bak, file.txt.bak2, file.txt.bak3...
+def backup_path(path, n=1):
+    return f"{path}.bak" if n == 1 else f"{path}.bak{n}"
+
+# Сдвинуть старые резервные копии (самая старая выкидывается) и сделать новую .bak из текущего файла.
+# Жёсткая ссылка ничего не копирует, а os.replace потом просто подменит имя - старые байты останутся в .bak.
+# Где ссылки не работают (FAT, сетевые диски) - обычная копия
+def rotate_backups(path, count):
+    if count < 1 or not os.path.exists(path): return
+    for n in range(count - 1, 0, -1):
+        if os.path.exists(backup_path(path, n)): os.replace(backup_path(path, n), backup_path(path, n + 1))
+    bak = backup_path(path)
+    if os.path.exists(bak): os.remove(bak)
+    try:
+        os.link(path, bak)
+    except OSError:
+        shutil.copy2(path, bak)
+
+# Папку тоже fsync-аем, чтобы после падения системы подмена имени не откатилась (на Windows так нельзя и не нужно)
+def _fsync_dir(folder):
+    if os.name != "posix": return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# Функция для безопасной записи текста: куски chunks пишутся через буфер во временный файл в той же папке,
+# fsync, потом старый файл уходит в резервные копии (backups штук) и временный атомарно встаёт на его место.
+# Упало или отменили на середине - настоящий файл не тронут, временный удаляется.
+# progress(сколько символов записано) вызывается после каждого куска и может кинуть исключение чтобы прервать запись
+def write_text_atomic(path, chunks, backups=0, progress=None) -> int:
+    return _write_atomic(path, chunks, backups, progress, binary=False)
+
+# То же для байтов (например WAV после конвертации), progress получает сколько байт записано
+def write_bytes_atomic(path, chunks, backups=0, progress=None) -> int:
+    return _write_atomic(path, chunks, backups, progress, binary=True)
+
+def _write_atomic(path, chunks, backups, progress, binary):
+    tmp_path = path + ".tmp"
+    written = 0
+    try:
+        with (open(tmp_path, "wb", buffering=SAVE_BUFFER_SIZE) if binary else open(tmp_path, "w", encoding="utf-8", newline="", buffering=SAVE_BUFFER_SIZE)) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+                if progress is not None: progress(written)
+            f.flush()
+            os.fsync(f.fileno())
+        rotate_backups(path, backups)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+    return written
+
+
+MANIFEST_NAME = "game_sounds_manifest.txt"
+MANIFEST_KEYS = ("precache_file", "preload_file", "declare_file") # ключи манифеста со скриптами звуков
+
+# Путь манифеста мода рядом с его gameinfo.txt
+def manifest_path(gameinfo_path):
+    return os.path.join(os.path.dirname(str(gameinfo_path)), "scripts", MANIFEST_NAME)
+
+# Функция для разбора манифеста: пути скриптов как они в нём записаны (относительно папки мода), по порядку и без повторов
+def parse_manifest(text: str) -> List[str]:
+    paths = []
+    seen = set()
+    key = None
+    for kind, value, _, _ in iter_kv_tokens(text):
+        if kind not in (TOKEN_STRING, TOKEN_WORD) or _is_condition(kind, value):
+            key = None
+            continue
+        if key is None:
+            key = value
+            continue
+        if key.lower() in MANIFEST_KEYS and value.lower() not in seen:
+            seen.add(value.lower())
+            paths.append(value)
+        key = None
+    return paths
+
+# Воркер пула процессов: прочитать и разобрать один скрипт проекта. (путь, текст, [(нода, начало, конец)], ошибка)
+def read_project_file(path):
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        return path, text, list(iter_soundscript_entries(text)), None
+    except (OSError, UnicodeError) as e:
+        return path, "", [], str(e)
+
+# Проект мода: все скрипты из манифеста в одной таблице. Ноды идут подряд в порядке манифеста,
+# у каждой есть файл-владелец, и сохранение раскладывает их обратно по своим файлам.
+# files - [(путь, SoundscriptDocument)] в порядке манифеста
+class SoundscriptProject:
+    def __init__(self, manifest, files):
+        self.manifest = manifest
+        self.paths = [path for path, _ in files]
+        self.documents = dict(files)
+        self.owners = {}            # id(нода) -> путь файла (ноды, удалённые из таблицы, тоже остаются - для Undo)
+        self.items = []
+        for path, document in files:
+            for item in document.items:
+                self.owners[id(item)] = path
+            self.items.extend(document.items)
+        self.target = self.paths[0] if self.paths else None # куда идут новые ноды
+
+    # Загрузить проект по манифесту: скрипты читаются и разбираются параллельно в пуле процессов.
+    # progress(готово файлов, всего) может кинуть исключение чтобы прервать загрузку.
+    # Возвращает (проект, [(путь, ошибка)] для файлов, которые не прочитались)
+    @classmethod
+    def load(cls, manifest, jobs=None, progress=None):
+        with open(manifest, "r", encoding="utf-8", errors="replace") as f:
+            listed = parse_manifest(f.read())
+        mod_folder = os.path.dirname(os.path.dirname(os.path.abspath(manifest)))
+        paths = [os.path.normpath(os.path.join(mod_folder, path)) for path in listed]
+        jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+        if jobs == 1:
+            results = map(read_project_file, paths)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=jobs)
+            results = pool.map(read_project_file, paths)
+        files = []
+        errors = []
+        try:
+            for done, (path, text, entries, error) in enumerate(results, start=1):
+                if error:
+                    errors.append((path, error))
+                else:
+                    files.append((path, SoundscriptDocument(text, entries=entries)))
+                if progress is not None: progress(done, len(paths))
+        finally:
+            if jobs > 1: pool.shutdown(wait=False, cancel_futures=True)
+        return cls(manifest, files), errors
+
+    def owner(self, item):
+        return self.owners.get(id(item), self.target)
+
+    # Новая нода попадает в файл target (или в указанный)
+    def adopt(self, item, path=None):
+        self.owners[id(item)] = path or self.target
+
+    def mark_dirty(self, item):
+        document = self.documents.get(self.owner(item))
+        if document is not None: document.mark_dirty(item)
+
+    # Ноды по файлам-владельцам в порядке списка: {путь: [ноды]} для всех файлов проекта
+    def split(self, items) -> Dict[str, List[SoundEntry]]:
+        by_path = {path: [] for path in self.paths}
+        for item in items:
+            by_path.setdefault(self.owner(item), []).append(item)
+        return by_path
+
+    # Файлы, в которых есть что сохранять: [(путь, документ, ноды)]
+    def changed(self, items):
+        return [(path, self.documents[path], file_items) for path, file_items in self.split(items).items() if self.documents[path].changed(file_items)]
+
+    # Имена нод, которые есть сразу в нескольких файлах: {имя: [файлы]}. names - EntryNameIndex по всем нодам таблицы
+    def duplicates(self, items, names) -> Dict[str, List[str]]:
+        found = {}
+        for name, rows in names.rows_by_name.items():
+            if len(rows) < 2: continue
+            paths = {self.owner(items[row]) for row in rows}
+            if len(paths) > 1: found[name] = [path for path in self.paths if path in paths]
+        return found
+
+    # Все состояния документов (до сохранения) и откат к ним, как SoundscriptDocument.snapshot/restore
+    def snapshot(self):
+        return {path: document.snapshot() for path, document in self.documents.items()}
+
+    def restore(self, state):
+        for path, document_state in state.items():
+            self.documents[path].restore(document_state)
+
+
+PARSE_CACHE_VERSION = 1
+PARSE_CACHE_MAX_BYTES = 512 << 20 # потолок папки кэша разбора, самые давно открытые файлы выкидываются
+_PACK_SEPARATOR = "\0" # имена и пути в кэше склеены через него в одну строку (её pickle пишет и читает одним куском)
+
+# Хэш содержимого файла для кэша разбора
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Разобранные ноды (нода, начало, конец) в компактном виде: значения полей - номерами из своих таблиц значений,
+# имена и звуки - одной строкой, позиции - массивом. None - так не упаковать (разделитель внутри строки)
+def pack_entries(entries):
+    items = [item for item, _, _ in entries]
+    names = _PACK_SEPARATOR.join(item.entry_name for item in items)
+    sounds = _PACK_SEPARATOR.join(sound for item in items for sound in item._sounds)
+    if names.count(_PACK_SEPARATOR) != max(0, len(items) - 1): return None
+    if sounds.count(_PACK_SEPARATOR) != max(0, sum(len(item._sounds) for item in items) - 1): return None
+    spans = array("q")
+    for _, start, end in entries:
+        spans.append(start)
+        spans.append(end)
+    return {
+        "tables": [table.values for table in (CHANNEL_TABLE, VOLUME_TABLE, SOUNDLEVEL_TABLE, PITCH_TABLE)],
+        "codes": [array("I", [getattr(item, slot) for item in items]) for slot in ("_channel", "_volume", "_soundlevel", "_pitch")],
+        "names": names,
+        "sounds": sounds,
+        "counts": array("I", [len(item._sounds) for item in items]),
+        "spans": spans,
+    }
+
+# Обратно в [(нода, начало, конец)]. Номера значений пересчитываются в таблицы этого процесса,
+# ноды собираются в обход __init__ - это и есть выигрыш против разбора текста
+def unpack_entries(packed):
+    counts = packed["counts"]
+    if not counts: return []
+    remaps = [[table.code(value) for value in values] for table, values in zip((CHANNEL_TABLE, VOLUME_TABLE, SOUNDLEVEL_TABLE, PITCH_TABLE), packed["tables"])]
+    channels, volumes, soundlevels, pitches = ([remap[code] for code in codes] for remap, codes in zip(remaps, packed["codes"]))
+    names = packed["names"].split(_PACK_SEPARATOR)
+    sounds = iter(packed["sounds"].split(_PACK_SEPARATOR)) if packed["sounds"] else iter(())
+    new = SoundEntry.__new__
+    items = []
+    # Сотни тысяч новых объектов подряд запускают полные проходы сборщика мусора по всей куче - на время сборки он выключен
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for name, channel, volume, soundlevel, pitch, count in zip(names, channels, volumes, soundlevels, pitches, counts):
+            item = new(SoundEntry)
+            item.entry_name = name
+            item._channel = channel
+            item._volume = volume
+            item._soundlevel = soundlevel
+            item._pitch = pitch
+            item._sounds = tuple(islice(sounds, count))
+            items.append(item)
+        spans = packed["spans"]
+        return list(zip(items, spans[0::2], spans[1::2]))
+    finally:
+        if gc_enabled: gc.enable()
+
+# Кэш разобранных скриптов на диске: один файл на путь, внутри сначала маленькая шапка (путь, размер, mtime, хэш),
+# потом ноды (pickle protocol 5). Свежесть проверяется дёшево: другой размер - промах без чтения нод,
+# тот же mtime - попадание без хэша, иначе решает хэш содержимого. Папка держится в пределах max_bytes,
+# выкидываются давно не открывавшиеся файлы (попадание обновляет время файла кэша)
+class ParseCache:
+    def __init__(self, folder, max_bytes=PARSE_CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+    def _file(self, path):
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, key + ".pickle")
+
+    # Ноды для содержимого data файла path (mtime_ns - его время изменения) или None если в кэше их нет
+    def load(self, path, data: bytes, mtime_ns):
+        cache_file = self._file(path)
+        try:
+            with open(cache_file, "rb") as f:
+                header = pickle.load(f)
+                if header.get("version") != PARSE_CACHE_VERSION or header.get("path") != os.path.abspath(path): return None
+                if header.get("size") != len(data): return None
+                if header.get("mtime_ns") != mtime_ns and header.get("hash") != content_hash(data): return None
+                entries = unpack_entries(pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError, ValueError):
+            # Битый или чужой файл кэша - просто разбираем заново (и перезапишем его)
+            return None
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return entries
+
+    # Запомнить разобранные ноды для содержимого data файла path. False - не получилось (кэш не обязателен)
+    def store(self, path, data: bytes, mtime_ns, entries) -> bool:
+        packed = pack_entries(entries)
+        if packed is None: return False
+        header = {"version": PARSE_CACHE_VERSION, "path": os.path.abspath(path), "size": len(data), "mtime_ns": mtime_ns, "hash": content_hash(data)}
+        cache_file = self._file(path)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(cache_file + ".tmp", "wb") as f:
+                pickle.dump(header, f, protocol=5)
+                pickle.dump(packed, f, protocol=5)
+            os.replace(cache_file + ".tmp", cache_file)
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+    # Выкинуть самые давно открытые файлы, пока папка больше max_bytes
+    def evict(self):
+        try:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in os.scandir(self.folder) if entry.name.endswith(".pickle")]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, cache_file in sorted(files):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(cache_file)
+            except OSError:
+                continue
+            total -= size
+
+
+WAV_SCAN_WORKERS = 16 # потоков для чтения заголовков WAV (ждут диск, а не процессор, так что их больше чем ядер)
+WAV_MAX_CHUNKS = 64 # сколько чанков RIFF просматриваем в поисках fmt и data, дальше файл считаем кривым
+WAV_FIELDS = {"wav_duration": 4, "wav_rate": 2, "wav_bits": 3, "wav_channels": 1} # поля столбцов WAV -> место в заголовке read_wav_header
+
+WAV_FORMAT_PCM = 1
+WAV_FORMAT_FLOAT = 3
+WAV_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Функция для разбора чанков открытого WAV (f - двоичный файл в начале): только шапка RIFF и заголовки чанков,
+# данные пропускаются seek-ом. Возвращает (формат, каналы, частота, байт в секунду, байт на кадр, бит на сэмпл,
+# где начинаются данные, размер данных). У WAVE_FORMAT_EXTENSIBLE формат берётся из подформата.
+# Не WAV или битый файл - ValueError
+def read_wav_layout(f) -> Tuple[int, int, int, int, int, int, int, int]:
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("not a RIFF WAVE file")
+    fmt = None
+    data = None
+    for _ in range(WAV_MAX_CHUNKS):
+        header = f.read(8)
+        if len(header) < 8: break
+        chunk_id = header[:4]
+        chunk_size = int.from_bytes(header[4:8], "little")
+        if chunk_id == b"fmt ":
+            body = f.read(min(chunk_size, 40))
+            if len(body) < 16: raise ValueError("short fmt chunk")
+            format_tag = int.from_bytes(body[0:2], "little")
+            if format_tag == WAV_FORMAT_EXTENSIBLE and len(body) >= 26:
+                format_tag = int.from_bytes(body[24:26], "little")
+            fmt = (
+                format_tag, int.from_bytes(body[2:4], "little"),
+                int.from_bytes(body[4:8], "little"), int.from_bytes(body[8:12], "little"),
+                int.from_bytes(body[12:14], "little"), int.from_bytes(body[14:16], "little"),
+            )
+            f.seek(chunk_size - len(body) + (chunk_size & 1), os.SEEK_CUR)
+        elif chunk_id == b"data":
+            data = (f.tell(), chunk_size)
+            if fmt is not None: break
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+        else:
+            # Чанки выровнены по 2 байта
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    if fmt is None: raise ValueError("no fmt chunk")
+    if data is None: raise ValueError("no data chunk")
+    return (*fmt, *data)
+
+# Функция для чтения заголовка WAV по пути.
+# Возвращает (формат, каналы, частота, бит на сэмпл, длительность в секундах). Не WAV или битый файл - ValueError
+def read_wav_header(path) -> Tuple[int, int, int, int, float]:
+    with open(path, "rb") as f:
+        format_tag, channels, rate, byte_rate, _, bits, _, data_size = read_wav_layout(f)
+    # Для сжатых форматов bits ничего не говорит о длине - считаем по байтам в секунду
+    duration = data_size / byte_rate if byte_rate else 0.0
+    return format_tag, channels, rate, bits, duration
+
+# Заголовки WAV файлов из папки sound: ключ звука (sound_key) -> (размер, mtime_ns, заголовок или None если не читается).
+# Повторный скан читает только файлы, у которых по SoundFileIndex поменялись размер или время
+class WavInfoIndex:
+    VERSION = 1
+
+    def __init__(self, sound_folder: str):
+        self.sound_folder = sound_folder
+        self.info = {}
+
+    # Заголовок звука (путь как в саундскрипте) или None - не сканирован, не WAV или битый
+    def get(self, wave):
+        record = self.info.get(sound_key(wave))
+        return record[2] if record is not None else None
+
+    # Клеточки столбцов WAV для ноды (в порядке WAV_FIELDS): по строке на каждый звук, как в столбце sounds.
+    # Пусто - звук ещё не прочитан, не WAV или файл битый
+    def cells(self, item) -> List[str]:
+        sounds = item.sounds
+        if not sounds or not self.info: return ["", "", "", ""]
+        headers = [self.get(wave) for wave in sounds]
+        if not any(headers): return ["", "", "", ""]
+        duration = "\n".join(f"{h[4]:.2f}" if h else "" for h in headers) + "\n"
+        rate = "\n".join(str(h[2]) if h else "" for h in headers) + "\n"
+        bits = "\n".join(str(h[3]) if h else "" for h in headers) + "\n"
+        channels = "\n".join(str(h[1]) if h else "" for h in headers) + "\n"
+        return [duration, rate, bits, channels]
+
+    # Функция ключа сортировки для поля WAV: по первому звуку ноды, непрочитанные - в конце
+    def sort_key(self, field):
+        position = WAV_FIELDS[field]
+        def key(item):
+            header = self.get(item.sounds[0]) if item.sounds else None
+            return (0, header[position]) if header else (1, 0)
+        return key
+
+    # WAV звуки из waves, которые есть в папке sound: [(ключ, путь в папке sound)]
+    def _found(self, files: "SoundFileIndex", waves):
+        todo = []
+        seen = set()
+        for wave in waves:
+            key = sound_key(wave)
+            if key in seen or not key.endswith(".wav"): continue
+            seen.add(key)
+            found = files.files.get(key)
+            if found is not None: todo.append((key, found[0]))
+        return todo
+
+    # Прочитать заголовки новых и изменённых звуков в пуле потоков. Размер и mtime берутся у самого файла
+    # (os.stat в потоке пула): индекс папки видит только новые и удалённые файлы, а перезапись файла на месте
+    # mtime папки не меняет. progress(проверено, всего) может кинуть исключение чтобы прервать скан (прочитанное
+    # до этого не теряется). Возвращает ключи перечитанных звуков
+    def scan(self, files: "SoundFileIndex", waves, workers=WAV_SCAN_WORKERS, progress=None) -> List[str]:
+        todo = self._found(files, waves)
+        if not todo: return []
+        def read(task):
+            key, path = task
+            full = os.path.join(self.sound_folder, path)
+            try:
+                st = os.stat(full)
+            except OSError:
+                return key, None # файл пропал - индекс папки это увидит при следующем обновлении
+            record = self.info.get(key)
+            if record is not None and record[0] == st.st_size and record[1] == st.st_mtime_ns: return key, None
+            try:
+                return key, (st.st_size, st.st_mtime_ns, read_wav_header(full))
+            except (OSError, ValueError):
+                return key, (st.st_size, st.st_mtime_ns, None)
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="soundscripts_wav")
+        results = {}
+        try:
+            for done, (key, record) in enumerate(pool.map(read, todo), start=1):
+                if record is not None: results[key] = record
+                if progress is not None and not done % 200: progress(done, len(todo))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            # Одним update - главный поток в это время только читает словарь
+            self.info.update(results)
+        return list(results)
+
+    def save(self, path: str):
+        data = {"version": self.VERSION, "sound_folder": self.sound_folder, "info": self.info}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    # Загрузить из файла. Если файла нет, он битый или от другой папки - пустой индекс
+    @classmethod
+    def load(cls, path: str, sound_folder: str) -> "WavInfoIndex":
+        index = cls(sound_folder)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != cls.VERSION or data.get("sound_folder") != sound_folder:
+                return index
+            index.info = {key: (size, mtime, tuple(header) if header else None) for key, (size, mtime, header) in data["info"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            index.info = {}
+        return index
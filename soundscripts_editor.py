@@ -1,90 +1,77 @@
 import os
+import sys
+
+# Консольный режим (--check/--format/--merge) работает без окна, поэтому проверяем флаги до импорта ткинтера
+CLI_FLAGS = ("--check", "--format", "--merge")
+if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support() # в собранном exe дочерние процессы пула запускаются через него же
+if __name__ == '__main__' and any(arg.split("=", 1)[0] in CLI_FLAGS for arg in sys.argv[1:]):
+    import soundscripts_cli
+    sys.exit(soundscripts_cli.main(sys.argv[1:]))
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from tkinterdnd2 import DND_FILES, TkinterDnD
 from tksheet import Sheet
 import json
+import time
 from pathlib import Path
 import re
+import bisect
+import random
 from typing import List, Dict, Any
-import sys
 import webbrowser
+import soundscripts_core
+import soundscripts_audio
+import soundscripts_playback
+import soundscripts_log
+import soundscripts_jobs
+from soundscripts_log import log, TRACE
 
-# Константы о программе
-ABOUT_TOOL_VERSION      = "1.0.0"
-ABOUT_TOOL_NAME         = f"Soundscripts Editor v{ABOUT_TOOL_VERSION}"
-ABOUT_TOOL_DESCRIPTION  = "This tool helps to edit soundscripts files used on Source Engine."
-ABOUT_TOOL_AUTHOR       = "Shitcoded by Ambiabstract (Sergey Shavin)."
-ABOUT_TOOL_REQUESTED    = "Requested by Aptekarr (Ruslan Pozdnyakov)."
-ABOUT_TOOL_LINK         = "Github: https://github.com/Ambiabstract/soundscripts_editor"
-ABOUT_TOOL_LINK_2       = "https://github.com/Ambiabstract/soundscripts_editor"
-ABOUT_TOOL_DISCORD      = "Discord: @Ambiabstract"
+# Константы о программе (лежат в ядре, шапка генерируемых файлов берёт их оттуда)
+from soundscripts_core import ABOUT_TOOL_VERSION, ABOUT_TOOL_NAME, ABOUT_TOOL_DESCRIPTION, ABOUT_TOOL_AUTHOR, ABOUT_TOOL_REQUESTED, ABOUT_TOOL_LINK, ABOUT_TOOL_LINK_2, ABOUT_TOOL_DISCORD
 
 # Константы технические
 CACHE_PATH = "soundscripts_editor_cache.json"
+SOUND_INDEX_PATH = "soundscripts_editor_sound_index.json" # индекс файлов папки sound, лежит рядом с кэшем
+PARSE_CACHE_PATH = "soundscripts_editor_parse_cache" # папка кэша разобранных скриптов (быстрое повторное открытие), рядом с кэшем
+WAV_INFO_PATH = "soundscripts_editor_wav_info.json" # заголовки WAV файлов папки sound (длительность, частота...), рядом с кэшем
+WAVEFORM_CACHE_PATH = "soundscripts_editor_waveforms" # папка миниатюр волны звуков (по файлу на звук), рядом с кэшем
+WAVEFORM_POLL_MS = 250 # как часто проверяем, какие строки видны, чтобы дорисовать им миниатюры волны
+WAVEFORM_PREFETCH_ROWS = 200 # сколько строк за краями экрана готовим заранее (в фоне, чтобы прокрутка была без ожидания)
+PREVIEW_POLL_MS = 10 # как часто проверяем, пошёл ли звук прослушивания (чтобы показать время до первого сэмпла)
+AUTOSAVE_PATH = "soundscripts_editor_autosave.jsonl" # журнал несохранённых правок на случай падения, тоже рядом с кэшем
+AUTOSAVE_RECOVERY_PATH = AUTOSAVE_PATH + ".old" # журнал, который восстанавливается прямо сейчас (или не смог восстановиться)
+AUTOSAVE_FLUSH_MS = 1000 # правки пишутся в журнал пачками не реже чем раз в столько миллисекунд
+SAVE_CHUNK_SIZE = 1 << 20 # сохранение пишет файл кусками по столько символов, между ними можно отменить
+LOUDNESS_REPORT_LINES = 30 # сколько предложенных громкостей показывать в окне подтверждения (все - в логе)
+PROJECT_REPORT_LINES = 30 # сколько строк про дубликаты и ошибки показывать в окне после открытия проекта (все - в логе)
+SAVE_BACKUPS_DEFAULT = 1 # сколько резервных копий (.bak, .bak2...) держать при сохранении, 0 - без них
+CONVERT_MONO_DEFAULT = False # сводить ли стерео в моно при переводе звуков в формат движка (больше 2 каналов - всегда)
+CONVERT_REPORT_LINES = 30 # сколько неподходящих звуков показывать в окне перед конвертацией (все - в логе)
+PREVIEW_OUTPUT_DEFAULT = "auto" # куда играть звуки по Space: auto, sounddevice, winsound, null или путь к .wav (из кэша)
+SEARCH_DELAY_MS = 150 # счётчик совпадений в поиске и фильтр обновляются после паузы в наборе
 WINDOW_SIZE_DEFAULT = "1024x720"
 
 # Константы для корректного визуала таблицы
-HEADERS = ["entry.name", "channel", "soundlevel", "volume", "pitch", "sounds"]
+HEADERS = ["entry.name", "channel", "soundlevel", "volume", "pitch", "sounds", "duration", "rate", "bits", "ch"]
+# Номер столбца для каждого поля ноды. Поля wav_* - не из ноды, а из заголовков WAV файлов (только для чтения)
+FIELD_COLUMNS = {"entry_name": 0, "channel": 1, "soundlevel": 2, "volume": 3, "pitch": 4, "sounds": 5, "wav_duration": 6, "wav_rate": 7, "wav_bits": 8, "wav_channels": 9}
+COLUMN_FIELDS = {column: field for field, column in FIELD_COLUMNS.items()} # поле ноды для каждого столбца
+SORT_REINSERT_MAX = 64 # если после правки надо переставить больше строк - проще отсортировать заново
 COLUMN_WIDTH_DENOMINATOR    = 10 # делим ширину экрана в 10 раз чтобы получить базовую ширину столбца
 ENTRY_NAME_WIDTH_MULTIPLIER = 2
 CHANNEL_WIDTH_MULTIPLIER    = 1
 SOUNDLEVEL_WIDTH_MULTIPLIER = 1
 VOLUME_WIDTH_MULTIPLIER     = 1
 PITCH_WIDTH_MULTIPLIER      = 1
-SOUNDS_WIDTH_MULTIPLIER     = 3.6
+SOUNDS_WIDTH_MULTIPLIER     = 1.6
+WAV_WIDTH_MULTIPLIER        = 0.5
 BASE_ROW_HEIGHT = 22 # дефолтная высота строки, вроде бы в пикселях
 
-# Константы дефолтных значений настроек саундскрипта
-DEFAULT_CHANNEL     = "CHAN_AUTO"
-DEFAULT_SOUNDLEVEL  = "SNDLVL_IDLE"
-DEFAULT_VOLUME      = "1"
-DEFAULT_PITCH       = "PITCH_NORM"
-CHANNELS_LIST = [
-    "CHAN_AUTO", 
-    "CHAN_WEAPON", 
-    "CHAN_VOICE", 
-    "CHAN_VOICE2", 
-    "CHAN_ITEM", 
-    "CHAN_BODY", 
-    "CHAN_STREAM", 
-    "CHAN_REPLACE", 
-    "CHAN_STATIC", 
-    "CHAN_VOICE_BASE"
-]
-SNDLVLS_LIST  = [
-    "SNDLVL_NONE", 
-    "SNDLVL_20dB", 
-    "SNDLVL_25dB", 
-    "SNDLVL_30dB", 
-    "SNDLVL_35dB", 
-    "SNDLVL_40dB",
-    "SNDLVL_45dB", 
-    "SNDLVL_50dB", 
-    "SNDLVL_55dB", 
-    "SNDLVL_IDLE", 
-    "SNDLVL_TALKING", 
-    "SNDLVL_65dB",
-    "SNDLVL_STATIC", 
-    "SNDLVL_70dB", 
-    "SNDLVL_NORM", 
-    "SNDLVL_75dB", 
-    "SNDLVL_80dB", 
-    "SNDLVL_85dB",
-    "SNDLVL_90dB", 
-    "SNDLVL_95dB", 
-    "SNDLVL_100dB", 
-    "SNDLVL_105dB", 
-    "SNDLVL_110dB", 
-    "SNDLVL_120dB",
-    "SNDLVL_130dB", 
-    "SNDLVL_GUNFIRE", 
-    "SNDLVL_140dB", 
-    "SNDLVL_150dB", 
-    "SNDLVL_180dB",
-]
-VOLUME_LIST = ["0.1", "0.2", "0.3", "0.4", "0.5", "0.6", "0.7", "0.8", "0.9", "1", "0.1, 0.9", "0.2, 0.8", "0.3, 0.7", "0.4, 0.6", "0.5, 1"]
-PITCH_LIST = ["10", "20", "30", "40", "50", "60", "70", "80", "90", "PITCH_LOW", "PITCH_NORM", "100", "110", "PITCH_HIGH", "120", "130", "140", "150", "160", "170", "180", "190", "200", "210", "220", "230", "240", "250", "95, 100", "100, 110"]
+# Константы дефолтных значений настроек саундскрипта (сами списки лежат в ядре, рядом с таблицами кодов)
+from soundscripts_core import DEFAULT_CHANNEL, DEFAULT_SOUNDLEVEL, DEFAULT_VOLUME, DEFAULT_PITCH, CHANNELS_LIST, SNDLVLS_LIST, VOLUME_LIST, PITCH_LIST
 
 # Константы светлой или тёмной темы
 LIGHT = {
@@ -101,6 +88,8 @@ LIGHT = {
     "btn_bg": "#BFBFBF",
     "btn_fg": "#191919",
     "table_bg": "#262626",
+    "missing_bg": "#FFD6D6",        # клеточка со звуком которого нет на диске
+    "missing_fg": "#8B0000",
 }
 DARK = {
     "bg": "#444444",                # фон рамки окна
@@ -122,6 +111,8 @@ DARK = {
     "btn_bg_disabled": "#595959",   # кнопки выключенные
     "btn_fg_disabled": "#8F8F8F",   # текст выключенных кнопок
     "btn_focuscolor": "#808080",    # цвет пунктирной фигни на кнопках
+    "missing_bg": "#6B2A2A",        # клеточка со звуком которого нет на диске
+    "missing_fg": "#FFD0D0",
 }
 
 # Функции чтобы вытаскивать ресурсы из экзешника
@@ -348,7 +339,7 @@ class ThemeManager:
         # Особая уличная магия для чёрной шапки окна
         try:
             dark_win_result = enable_win_dark_titlebar(self.app, enable=(self.name == "dark"))
-            print(f"dark_win_result: {dark_win_result}")
+            log.debug(f"dark_win_result: {dark_win_result}")
         except Exception:
             pass
 
@@ -396,7 +387,8 @@ class App(TkinterDnD.Tk):
         self.minsize(800, 600)
         # self.column_widths = COLUMN_WIDTHS_DEFAULT # [(0, 200), (1, 100), (2, 100), (3, 100), (4, 100), (5, 385)]
         
-        self.items = []  # список словарей в котором хранятся все нужные нам ноды
+        self.items = []  # список нод (soundscripts_core.SoundEntry, доступ к полям как у словаря)
+        self.names = soundscripts_core.EntryNameIndex()  # индекс имён нод -> строки, обновляется при каждом изменении self.items
         self.gameinfo_path = None
         self.gameinfo_folder = None
         self.project_name = None
@@ -404,6 +396,52 @@ class App(TkinterDnD.Tk):
         self.soundscript_name = None
         self.soundscript_saved = True
         self.add_proj_name_to_entryname = False
+        self.document = None  # исходный текст открытого саундскрипта с позициями нод (для точечного сохранения)
+        self.project = None  # soundscripts_core.SoundscriptProject - открыты все скрипты из манифеста мода (тогда document = None)
+        self.row_index_files = False  # слева у строк сейчас имена файлов проекта, а не номера
+        self.table_dirty = {}  # строка -> множество изменённых столбцов (None - вся строка), копится до refresh_table
+        self.log_level = soundscripts_log.DEFAULT_LOG_LEVEL  # уровень логов из кэша ("warning" по умолчанию)
+        self.log_file = ""  # путь лог-файла из кэша, пусто - без файла
+        self.save_backups = SAVE_BACKUPS_DEFAULT  # сколько резервных копий файла оставлять при сохранении (из кэша)
+        self.convert_mono = CONVERT_MONO_DEFAULT  # сводить стерео в моно при конвертации звуков (из кэша)
+        self.preview_output = PREVIEW_OUTPUT_DEFAULT  # вывод для прослушивания звуков (из кэша)
+        self.jobs = soundscripts_jobs.JobRunner(self.after)  # фоновые задачи пользователя (открытие, импорт, сохранение)
+        self.background = soundscripts_jobs.JobRunner(self.after, workers=soundscripts_jobs.BACKGROUND_WORKERS)  # индексы и миниатюры, свой пул
+        self.job = None  # текущая фоновая задача, пока она идёт - правки таблицы и файловые операции заблокированы
+        self.sound_index = None  # soundscripts_core.SoundFileIndex папки sound проекта, строится в фоне
+        self.sound_index_job = None  # обновление индекса идёт в фоне и ничего не блокирует
+        self.wav_info = soundscripts_core.WavInfoIndex("")  # заголовки WAV звуков нод для столбцов duration/rate/bits/ch (пока пустые)
+        self.wav_scan_job = None  # чтение заголовков идёт в фоне и ничего не блокирует
+        self.wav_scan_again = False  # пока шёл скан появились новые звуки - после него ещё один
+        self.waveforms = soundscripts_audio.WaveformCache(WAVEFORM_CACHE_PATH)  # миниатюры волны звуков (LRU в памяти + диск)
+        self.waveform_job = None  # огибающие считаются в фоне и ничего не блокируют
+        self.waveform_rows = set()  # строки таблицы, у которых в клеточке sounds уже нарисованы миниатюры
+        self.waveform_failed = set()  # файлы, которые не читаются (для них миниатюр не будет, не пытаемся снова)
+        self.player = None  # soundscripts_playback.PreviewPlayer, создаётся при первом прослушивании (тогда же открывается вывод)
+        self.preview_item = None  # номер ноды, чей звук играет сейчас (Space на ней же - стоп)
+        self.preview_after = None  # отложенная проверка, пошёл ли звук
+        self.validator = None  # soundscripts_core.SoundValidator - какие звуки нод не найдены в папке sound
+        self.search = soundscripts_core.SearchIndex()  # индекс для поиска по именам и звукам
+        self.search_key = None  # (запрос, версия индекса) для которых найдены search_hits
+        self.search_hits = []  # номера найденных клеточек (SearchIndex.cell)
+        self.search_pos = -1  # на каком совпадении стоим
+        self.search_after = None  # отложенный подсчёт совпадений при наборе
+        self.columns = soundscripts_core.ColumnIndex()  # индексы значений столбцов для фильтра
+        self.row_filter = None  # soundscripts_core.RowFilter из поля фильтра, None - показываем все ноды
+        self.view = None  # номера нод в порядке строк таблицы (пока есть фильтр), None - строка таблицы = номер ноды
+        self.view_rows = None  # номер ноды -> строка таблицы для self.view
+        self.view_version = 0  # растёт при каждой смене self.view (для кэша поиска)
+        self.filter_after = None  # отложенное применение фильтра при наборе
+        self.sort_keys = soundscripts_core.SortKeys()  # кэш ключей сортировки по столбцам
+        for field in soundscripts_core.WAV_FIELDS: self.sort_keys.key_funcs[field] = self.wav_info.sort_key(field)
+        self.sort_field = None  # поле, по которому отсортирована таблица, None - порядок файла
+        self.sort_reverse = False  # сортировка по убыванию
+        self.journal = soundscripts_core.EditJournal()  # правки для Undo/Redo
+        self.journal.on_change = self.on_journal_change
+        self.autosave = soundscripts_core.AutosaveLog(AUTOSAVE_PATH)  # журнал правок с последнего сохранения на случай падения
+        self.autosave_after = None  # отложенная запись журнала автосохранения
+        self.parse_cache = soundscripts_core.ParseCache(PARSE_CACHE_PATH)  # разобранные скрипты для быстрого повторного открытия
+        self.save_dirty = None  # ноды, изменённые пока файл пишется в фоне (None - сохранение не идёт)
         
         # Применяем тему если менеджер тем включен
         # Если тут не включить то при первом запуске тема будет неправильной
@@ -437,6 +475,10 @@ class App(TkinterDnD.Tk):
         self.btn_open_ss.pack(
             side=tk.LEFT, padx=buttons_padx
         )
+        self.btn_open_project = ttk.Button(self.toolbar, text="Open Project", command=self.open_project_dialog, state="disabled")
+        self.btn_open_project.pack(
+            side=tk.LEFT, padx=buttons_padx
+        )
         self.btn_save_ss = ttk.Button(self.toolbar, text="     Save     ", command=lambda: self.save_soundscript(same_file=True), state="disabled")
         self.btn_save_ss.pack(
             side=tk.LEFT, padx=buttons_padx
@@ -463,16 +505,31 @@ class App(TkinterDnD.Tk):
         )
         
         # Поле ввода для панели поиска
-        self.search_entry = tk.Entry(self.toolbar, width=100)
+        self.search_entry = tk.Entry(self.toolbar, width=60)
         self.search_entry.pack(
             side=tk.RIGHT, padx=2, pady=2
         )
+
+        # Поле фильтра: в таблице остаются только подходящие строки
+        self.filter_entry = tk.Entry(self.toolbar, width=40)
+        self.filter_entry.pack(
+            side=tk.RIGHT, padx=2, pady=2
+        )
+        ttk.Label(self.toolbar, text="Filter:").pack(
+            side=tk.RIGHT, padx=buttons_padx
+        )
         
         # Анонсируем и размещаем статусную надпись со всякими подсказками
-        self.status_var = tk.StringVar(value="Please set up Gameinfo!")
-        ttk.Label(self, textvariable=self.status_var, anchor="w", padding=(4, 2)).pack(
+        # Справа от неё кнопка Cancel, которая видна только пока идёт фоновая задача
+        self.status_bar = ttk.Frame(self)
+        self.status_bar.pack(
             side=tk.BOTTOM, fill=tk.X
         )
+        self.status_var = tk.StringVar(value="Please set up Gameinfo!")
+        ttk.Label(self.status_bar, textvariable=self.status_var, anchor="w", padding=(4, 2)).pack(
+            side=tk.LEFT, fill=tk.X, expand=True
+        )
+        self.btn_cancel_job = ttk.Button(self.status_bar, text="Cancel", command=self.cancel_job)
 
     # Метод для создания таблицы
     def build_table_ui(self):
@@ -487,11 +544,12 @@ class App(TkinterDnD.Tk):
             show_x_scrollbar=False,
             show_y_scrollbar=True,
             height = 1, # количество строк, которые будут одновременно видны в таблице (по вертикали)
-            width = 6, # количество столбцов, которые будут одновременно видны (по горизонтали)
+            width = len(HEADERS), # количество столбцов, которые будут одновременно видны (по горизонтали)
             # align="center",
         )
         self.sheet.pack(fill=tk.BOTH, expand=True)
         self.sheet["B:E"].align("center") # горизонтальное центрование для некоторых столбцов
+        self.sheet["G:J"].align("center")
 
         # Всякие разрешения для таблицы
         try:
@@ -512,9 +570,7 @@ class App(TkinterDnD.Tk):
             )
             # print(f"Bindings enabled!")
         except Exception as e:
-            print(f"Cant enable bindings!")
-            print(f"{e}")
-            pass
+            log.warning(f"Cant enable bindings: {e}")
 
         # Настройка ширины столбцов
         # Если убрать то сломается ширина столбцов на старте
@@ -535,12 +591,26 @@ class App(TkinterDnD.Tk):
         # self.sheet.RI.bind("<Button-3>", self.on_right_click_ri, add="+") # Row Index
         self.sheet.bind("<Control-s>", lambda event: self.save_soundscript(same_file=True))
         self.sheet.bind("<Control-S>", lambda event: self.save_soundscript(same_file=False))
+        self.sheet.bind("<Control-z>", self.undo)
+        self.sheet.bind("<Control-Z>", self.redo)
+        self.sheet.bind("<Control-y>", self.redo)
         self.sheet.bind("<Return>", self.fast_edit)
         self.sheet.bind("<Delete>", self.delete_selected_rows)
         
+        # Space - послушать звук выделенной ноды
+        self.sheet.bind("<space>", self.preview_selected)
+
         # Хоткей для фокуса на панели поиска
         self.sheet.bind("<Control-f>", lambda event: self.search_entry.focus_set())
         self.search_entry.bind("<Return>", lambda event: self.find_next(search_text=self.search_entry.get()))
+        self.search_entry.bind("<Shift-Return>", lambda event: self.find_next(search_text=self.search_entry.get(), step=-1))
+        self.search_entry.bind("<KeyRelease>", self.on_search_typed)
+        self.filter_entry.bind("<KeyRelease>", self.on_filter_typed)
+        self.filter_entry.bind("<Return>", lambda event: self.apply_filter())
+        self.filter_entry.bind("<Escape>", lambda event: self.clear_filter())
+
+        # Ctrl+клик по заголовку - сортировка по столбцу (просто клик выделяет столбец, дабл-клик - правка всего столбца)
+        self.sheet.CH.bind("<Control-Button-1>", self.on_header_sort_click)
         
         # Бинд на изменение состояния окна, нужен для обновления ширины столбцов при изменении размеров окна
         self.bind("<Configure>", self.on_configure)
@@ -591,47 +661,26 @@ class App(TkinterDnD.Tk):
         # На крайний случай — update_idletasks, чтобы форсировать отрисовку
         self.update_idletasks()
     
-    # Метод для обновления данных таблицы (содержания), в конце ещё ссылка на апдейт визуала
-    def update_table(self):
-        data = []
-        print(f"\n{len(self.items)} ITEMS:")
-        for index, item_info in enumerate(self.items, start=1):
-            # print(f"index: {index}")
-            # print(f"item_info: {item_info}")
-            
-            # Получение данных из списка нод для заполнения таблицы
-            entry_name = item_info["entry_name"]
-            channel = item_info["channel"]
-            soundlevel = item_info["soundlevel"]
-            volume = item_info["volume"]
-            pitch = item_info["pitch"]
-            sounds = item_info["sounds"]
-            sounds_str = ""
-            
-            # Проверка
-            '''
-            sounds.append("test_001")
-            sounds.append("test_002")
-            sounds.append("test_003")
-            sounds.append("test_004")
-            sounds.append("test_005")
-            '''
-
-            # Проверка
-            print(f"{index}  {entry_name}")
-            print(f"    channel:    {channel}")
-            print(f"    soundlevel: {soundlevel}")
-            print(f"    volume:     {volume}")
-            print(f"    pitch:      {pitch}")
-            print(f"    sounds:     ")
-            sound_count = 0
-            for sound in sounds:
-                sound_count += 1
-                print(f"    {sound}")
-                sounds_str = sounds_str + str(sound)  + "\n"
-
-            # Заполняем данные таблицы
-            data.append([entry_name, channel, soundlevel, volume, pitch, sounds_str])
+    # Метод для обновления данных таблицы (содержания), в конце ещё ссылка на апдейт визуала.
+    # reindex=False - ноды не менялись (сменился только фильтр или сортировка), индексы поиска и столбцов остаются.
+    # recompute_view=False - порядок строк self.view уже готов (после шага вставки при сортировке)
+    def update_table(self, reindex=True, recompute_view=True):
+        self.table_dirty.clear() # таблица перестраивается целиком, точечные правки уже не нужны
+        self.waveform_rows.clear()
+        if reindex:
+            self.search.invalidate()
+            self.columns.invalidate()
+            self.sort_keys.invalidate()
+        if recompute_view: self.update_view()
+        # Построчный вывод только при включённой трассировке, иначе ни одной строки не форматируем
+        if soundscripts_log.tracing():
+            log.log(TRACE, f"update_table: {len(self.items)} items")
+            for index, item_info in enumerate(self.items, start=1):
+                log.log(TRACE, f"{index}  {item_info.entry_name} | channel: {item_info.channel} | soundlevel: {item_info.soundlevel} | volume: {item_info.volume} | pitch: {item_info.pitch} | sounds: {list(item_info.sounds)}")
+
+        # Заполняем данные таблицы (только видимые ноды)
+        items = self.view_items()
+        data = [self.item_row(item) for item in items]
         
         # print(f"data: {data}")
         
@@ -643,15 +692,312 @@ class App(TkinterDnD.Tk):
             self.sheet.set_sheet_data(data)
         
         # Настройка высот строчек для каждой строки
-        for index, item_info in enumerate(self.items, start=1):
+        for index, item_info in enumerate(items, start=1):
             sounds = item_info["sounds"]
             self.sheet.row_height(index-1, len(sounds) * BASE_ROW_HEIGHT + BASE_ROW_HEIGHT)
         
+        # Подсветка битых звуков
+        self.validate_sounds()
+        self.update_row_index()
+        if reindex: self.scan_wavs()
+
         # Апдейт визуала таблицы
         self.redraw_sheet()
 
         # Апдейт статусной надписи
-        self.status_var.set(f"Rows count: {len(self.items)}")
+        self.status_var.set(self.rows_status())
+
+    # Метод для пересчёта видимых нод и их порядка по фильтру и сортировке
+    def update_view(self):
+        self.view_version += 1
+        if not self.row_filter and self.sort_field is None:
+            self.view = None
+            self.view_rows = None
+            return
+        started = time.perf_counter()
+        rows = self.row_filter.rows(self.items, self.columns) if self.row_filter else None
+        if self.sort_field is not None:
+            rows = self.sort_keys.order(self.items, self.sort_field, rows, self.sort_reverse)
+        self.view = rows
+        self.view_rows = {row: display for display, row in enumerate(self.view)}
+        log.debug(f"View ({self.row_filter.text if self.row_filter else 'no filter'}, sort: {self.sort_field}): {len(self.view)} of {len(self.items)} rows in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Номер ноды для строки таблицы
+    def item_index(self, display_row):
+        return display_row if self.view is None else self.view[display_row]
+
+    # Строка таблицы для номера ноды, None - нода скрыта фильтром
+    def display_index(self, row):
+        return row if self.view is None else self.view_rows.get(row)
+
+    # Ноды в порядке строк таблицы (сами ноды, не копии)
+    def view_items(self):
+        return self.items if self.view is None else [self.items[row] for row in self.view]
+
+    # Набор в поле фильтра: применяем после паузы
+    def on_filter_typed(self, event=None):
+        if event is not None and event.keysym in ("Return", "KP_Enter", "Escape"): return
+        if self.filter_after: self.after_cancel(self.filter_after)
+        self.filter_after = self.after(SEARCH_DELAY_MS, self.apply_filter)
+
+    # Метод для применения фильтра из поля фильтра
+    def apply_filter(self):
+        if self.filter_after:
+            self.after_cancel(self.filter_after)
+            self.filter_after = None
+        text = self.filter_entry.get().strip()
+        try:
+            row_filter = soundscripts_core.RowFilter(text) if text else None
+        except ValueError as e:
+            self.status_var.set(str(e))
+            return
+        if not row_filter and not self.row_filter: return
+        self.row_filter = row_filter or None
+        self.update_table(reindex=False)
+
+    # Метод для сброса фильтра
+    def clear_filter(self):
+        self.filter_entry.delete(0, tk.END)
+        self.apply_filter()
+
+    # Ctrl+клик по заголовку столбца
+    def on_header_sort_click(self, event):
+        if self.busy(edits=True): return "break"
+        try:
+            column = self.sheet.identify_column(event)
+        except Exception as e:
+            log.warning(f"Can't identify column: {e}")
+            return "break"
+        if column in COLUMN_FIELDS: self.sort_by(COLUMN_FIELDS[column])
+        return "break"
+
+    # Метод для сортировки по полю. reverse=None - переключение по кругу: по возрастанию -> по убыванию -> порядок файла
+    def sort_by(self, field, reverse=None):
+        if reverse is None:
+            if field != self.sort_field:
+                reverse = False
+            elif not self.sort_reverse:
+                reverse = True
+            else:
+                field, reverse = None, False
+        self.sort_field = field
+        self.sort_reverse = bool(reverse)
+        self.update_headers()
+        self.update_table(reindex=False)
+
+    # Заголовки столбцов со стрелкой у отсортированного
+    def update_headers(self):
+        headers = list(HEADERS)
+        if self.sort_field is not None:
+            headers[FIELD_COLUMNS[self.sort_field]] += " ▼" if self.sort_reverse else " ▲"
+        try:
+            self.sheet.headers(headers, redraw=False)
+        except TypeError:
+            self.sheet.headers(headers)
+
+    # Метод чтобы сделать сортировку порядком нод (перед сохранением в отсортированном порядке)
+    def apply_sort_order(self):
+        if self.sort_field is None: return
+        order = self.sort_keys.order(self.items, self.sort_field, reverse=self.sort_reverse)
+        self.items = [self.items[row] for row in order]
+        # Номера строк в журналах теперь другие: Undo до этой точки не дотянется, автосохранение знает новый порядок
+        self.journal.clear()
+        self.autosave.add_record({"op": "order", "rows": order})
+        self.schedule_autosave()
+        self.names.rebuild(self.items)
+        self.sort_field = None
+        self.sort_reverse = False
+        self.update_headers()
+        self.update_table()
+
+    # Шаг вставки для отсортированной таблицы: правленые ноды встают на новые места без полной сортировки.
+    # Возвращает переносы строк таблицы [(откуда, куда)], пусто - порядок не поменялся
+    def reorder_sorted_rows(self, rows):
+        moves = []
+        view_rows = self.view_rows
+        for row in rows:
+            if row not in view_rows: continue
+            old, new = self.sort_keys.reinsert(self.items, self.view, row, self.sort_field, self.sort_reverse)
+            if old == new: continue
+            moves.append((old, new))
+            for display in range(min(old, new), max(old, new) + 1):
+                view_rows[self.view[display]] = display
+        if moves: self.view_version += 1
+        return moves
+
+    # Метод для переноса строк таблицы после reorder_sorted_rows: [(откуда, куда)] по порядку, строки едут
+    # вместе с высотой, подсветкой и подписью слева - остальная таблица не перестраивается.
+    # False - tksheet так не умеет (старая версия), тогда таблица перестраивается целиком
+    def move_table_rows(self, moves):
+        try:
+            for old, new in moves:
+                # move_to в tksheet - место до переноса: вниз - на строку дальше
+                self.sheet.move_rows(move_to=new + 1 if new > old else new, to_move=[old], create_selections=False, undo=False, emit_event=False, redraw=False)
+                self.waveform_rows = {display for display in self.waveform_rows if not min(old, new) <= display <= max(old, new)}
+        except Exception as e:
+            log.warning(f"Table row move failed, rebuilding: {e}")
+            return False
+        return True
+
+    # Данные строки таблицы для одной ноды
+    def item_row(self, item):
+        row = soundscripts_core.table_row(item)
+        row += self.wav_info.cells(item)
+        return row
+
+    # Высота строки таблицы под количество звуков ноды
+    def item_row_height(self, item):
+        return len(item["sounds"]) * BASE_ROW_HEIGHT + BASE_ROW_HEIGHT
+
+    # Метод чтобы пометить клеточки изменёнными (fields - имена полей нод, None - вся строка)
+    def mark_table_dirty(self, rows, fields=None):
+        # Столбцы WAV показывают звуки ноды - меняются вместе с ними
+        if fields is not None and "sounds" in fields: fields = [*fields, *soundscripts_core.WAV_FIELDS]
+        columns = None if fields is None else {FIELD_COLUMNS[field] for field in fields}
+        searched = fields is None or "entry_name" in fields or "sounds" in fields
+        for field in (soundscripts_core.FILTER_FIELDS if fields is None else fields):
+            if field in soundscripts_core.FILTER_FIELDS: self.columns.invalidate(field)
+        for row in rows:
+            if searched: self.search.touch(row)
+            self.sort_keys.touch(self.items, row, fields)
+            if columns is None:
+                self.table_dirty[row] = None
+            elif row not in self.table_dirty:
+                self.table_dirty[row] = set(columns)
+            elif self.table_dirty[row] is not None:
+                self.table_dirty[row] |= columns
+        # Новые звуки - дочитываем их заголовки
+        if fields is None or "sounds" in fields: self.scan_wavs()
+
+    # Метод для обновления в таблице только изменённых клеточек (вместо полной перестройки update_table).
+    # Правленые строки остаются на месте даже если больше не подходят под фильтр - до следующего применения фильтра
+    def refresh_table(self):
+        # Поменялось поле сортировки - правленые строки переезжают на свои места
+        if self.sort_field is not None:
+            sort_column = FIELD_COLUMNS[self.sort_field]
+            resorted = [row for row, columns in self.table_dirty.items() if columns is None or sort_column in columns]
+            if len(resorted) > SORT_REINSERT_MAX:
+                self.update_table(reindex=False)
+                return
+            moves = self.reorder_sorted_rows(resorted) if resorted else []
+            if moves and not self.move_table_rows(moves):
+                self.update_table(reindex=False, recompute_view=False)
+                return
+        try:
+            for row, columns in self.table_dirty.items():
+                item = self.items[row]
+                display = self.display_index(row)
+                if display is None:
+                    if self.validator: self.validator.validate(item)
+                    continue
+                values = self.item_row(item)
+                if columns is None or FIELD_COLUMNS["sounds"] in columns: self.waveform_rows.discard(display)
+                for column in (range(len(HEADERS)) if columns is None else columns):
+                    try:
+                        self.sheet.set_cell_data(display, column, values[column], redraw=False)
+                    except TypeError:
+                        self.sheet.set_cell_data(display, column, values[column])
+                # Высота строки и битые пути зависят только от звуков - перепроверяем только эту строку
+                if columns is None or FIELD_COLUMNS["sounds"] in columns:
+                    try:
+                        self.sheet.row_height(display, self.item_row_height(item), redraw=False)
+                    except TypeError:
+                        self.sheet.row_height(display, self.item_row_height(item))
+                    if self.validator:
+                        self.set_missing_highlight(display, self.validator.validate(item))
+        except Exception as e:
+            # На всякий случай (другая версия tksheet и т.п.) - перестраиваем таблицу целиком
+            log.warning(f"Incremental table refresh failed, rebuilding: {e}")
+            self.table_dirty.clear()
+            self.update_table()
+            return
+        self.table_dirty.clear()
+        self.redraw_sheet()
+        self.status_var.set(self.rows_status())
+
+    # Метод для добавления в таблицу новых строк для нод начиная с индекса start (ноды уже лежат в self.items)
+    def insert_table_rows(self, start):
+        self.insert_table_rows_at(list(range(start, len(self.items))))
+
+    # Метод для вставки в таблицу строк для нод, которые уже стоят в self.items на местах rows (по возрастанию)
+    def insert_table_rows_at(self, rows):
+        if not rows: return
+        self.waveform_rows.clear() # строки ниже съехали
+        self.search.invalidate(rows[0])
+        self.columns.invalidate()
+        self.sort_keys.invalidate()
+        if self.view is not None:
+            # Под фильтром или сортировкой новые строки не обязательно там же в таблице - пересчитываем видимые строки
+            self.update_table(reindex=False)
+            return
+        # Подряд идущие строки вставляются одним куском
+        runs = []
+        for row in rows:
+            if runs and runs[-1][-1] + 1 == row:
+                runs[-1].append(row)
+            else:
+                runs.append([row])
+        try:
+            for run in runs:
+                new_items = [self.items[row] for row in run]
+                self.sheet.insert_rows(
+                    rows=[self.item_row(item) for item in new_items],
+                    idx=run[0],
+                    heights=[self.item_row_height(item) for item in new_items],
+                    redraw=False,
+                )
+        except Exception as e:
+            log.warning(f"Table rows insert failed, rebuilding: {e}")
+            self.update_table()
+            return
+        if rows[-1] - rows[0] + 1 == len(rows) and rows[-1] == len(self.items) - 1:
+            # Новые строки в конце - остальные не съехали, проверяем только новые ноды
+            if self.validator:
+                for row in rows:
+                    if self.validator.validate(self.items[row]): self.set_missing_highlight(row, True)
+        else:
+            self.validate_sounds()
+        self.update_row_index()
+        self.scan_wavs()
+        self.redraw_sheet()
+        self.status_var.set(self.rows_status())
+
+    # Метод для удаления строк из таблицы (ноды из self.items уже удалены)
+    def delete_table_rows(self, rows):
+        self.waveform_rows.clear()
+        if rows: self.search.invalidate(min(rows))
+        self.columns.invalidate()
+        self.sort_keys.invalidate()
+        if self.view is not None:
+            # Номера нод после удалённых съехали - пересчитываем видимые строки
+            self.update_table(reindex=False)
+            return
+        try:
+            self.sheet.delete_rows(sorted(rows), redraw=False)
+        except Exception as e:
+            log.warning(f"Table rows delete failed, rebuilding: {e}")
+            self.update_table()
+            return
+        # Строки съехали, а удалённые ноды надо забыть - проверяем заново целиком (это быстро)
+        self.validate_sounds()
+        self.update_row_index()
+        self.redraw_sheet()
+        self.status_var.set(self.rows_status())
+
+    # Метод для столбца с файлом-владельцем ноды: в режиме проекта номера строк слева заменяются именем файла,
+    # иначе там обычные номера
+    def update_row_index(self):
+        if self.project is None:
+            if not self.row_index_files: return
+            index = []
+        else:
+            owner = self.project.owner
+            index = [os.path.basename(owner(item)) for item in self.view_items()]
+        self.row_index_files = bool(index)
+        try:
+            self.sheet.row_index(index, redraw=False)
+        except TypeError:
+            self.sheet.row_index(index)
 
     # Вызывается каждый раз когда меняется конфигурация окна, нужно для вызова при изменении размеров окна
     def on_configure(self, event):
@@ -671,19 +1017,25 @@ class App(TkinterDnD.Tk):
             (2, column_width_pix * SOUNDLEVEL_WIDTH_MULTIPLIER), 
             (3, column_width_pix * VOLUME_WIDTH_MULTIPLIER), 
             (4, column_width_pix * PITCH_WIDTH_MULTIPLIER), 
-            (5, column_width_pix * SOUNDS_WIDTH_MULTIPLIER)
+            (5, column_width_pix * SOUNDS_WIDTH_MULTIPLIER),
+            (6, column_width_pix * WAV_WIDTH_MULTIPLIER),
+            (7, column_width_pix * WAV_WIDTH_MULTIPLIER),
+            (8, column_width_pix * WAV_WIDTH_MULTIPLIER),
+            (9, column_width_pix * WAV_WIDTH_MULTIPLIER)
         ]
         for column, width in column_widths_dyn:
             self.sheet.column_width(column, int(round(width)))
     
     # Метод для добавления в таблицу файлов которые были кинуты драг н дропом или через браузер файлов
     def add_sounds_button(self):
-        print(f"add_sounds_button start")
+        log.debug(f"add_sounds_button start")
+        if self.busy(): return
+        self.refresh_sound_index()
         # self.soundscript_path = self.open_files_dialog(title="Open soundscript", filter_str="Text (*.txt);;All (*)", start_dir = scripts_folder, multi=False)
         sound_folder = os.path.dirname(self.gameinfo_path) + "/sound"
-        print(f"sound_folder: {sound_folder}")
+        log.debug(f"sound_folder: {sound_folder}")
         sound_files = self.open_files_dialog(title="Open WAV files", filter_str="Sounds (*.wav);;All (*)", start_dir = sound_folder, multi=True)
-        print(f"sound_files: {sound_files}")
+        log.debug(f"sound_files: {sound_files}")
         if not sound_files: return
         self.add_files(sound_files)
 
@@ -694,69 +1046,42 @@ class App(TkinterDnD.Tk):
         if not wav_files:
             messagebox.showwarning("Warning", f"No WAV files found!")
             return
-        paths = wav_files
+        if self.busy(): return
+        
+        # Добавляем к именам первое слово из имени проекта в качестве префикса до точки
+        prefix = self.project_name.split()[0].lower() if self.add_proj_name_to_entryname else None
         
+        # Пути разбираются в фоне, а ноды добавляются только когда разобраны все - отмена ничего не меняет
+        self.start_job("Adding sounds", self.resolve_files_job, wav_files, self.gameinfo_folder, prefix, self.convert_mono, on_done=self.add_resolved_files)
+
+    # Фоновая часть add_files: имена нод и пути относительно папки sound (рабочий поток - self не трогаем).
+    # Заодно заголовки добавляемых файлов: какие движок не сыграет как надо - [(путь, [что не так])]
+    @staticmethod
+    def resolve_files_job(job, paths, gameinfo_folder, prefix, mono):
+        resolved, bad_paths = soundscripts_core.resolve_sound_files(paths, gameinfo_folder, prefix, progress=job.set_progress)
+        bad = set(bad_paths)
+        return resolved, bad_paths, App.check_conformance_job(job, [path for path in paths if path not in bad], mono)
+
+    # Главный поток: добавляем разобранные файлы в таблицу
+    def add_resolved_files(self, result):
+        resolved, bad_paths, nonconforming = result
         files_count = 0
-        bad_paths = []
-        for path in paths:
-            path = os.path.abspath(path)
-            file_name = os.path.basename(path) or path
-            sounds = []
-            path_rel = None
-            
-            # Добавляем к именам первое слово из имени проекта в качестве префикса до точки
-            if self.add_proj_name_to_entryname:
-                file_name = self.project_name.split()[0].lower() + "." + file_name
-                # print(f"self.soundscript_name: {self.soundscript_name}")
-            
-            # Фиксим имена
-            file_name = file_name.replace(".wav", "").replace(".WAV", "")
-            file_name = re.sub(r"[А-Яа-яЁё]", "", file_name)
-            file_name = re.sub(r"[ \-\—\(\)\[\]\{\},;!@#$%^&*+=№~`«»<>?/\\|\"']", "_", file_name)
-            file_name = re.sub(r"_+", "_", file_name)
-            file_name = file_name.strip("_")
-            
-            # Уникальные имена
-            existing_names = [e["entry_name"] for e in self.items]
-            if file_name in existing_names:
-                i = 1
-                new_file_name = f"{file_name}_{i}"
-                while new_file_name in existing_names:
-                    i += 1
-                    new_file_name = f"{file_name}_{i}"
-                file_name = new_file_name
-
-            # Добавление пути файла в список звуков
-            # Функция чтобы преобразовывать абсолютный путь файла в относительный путь
-            try:
-                # Проверяем, начинается ли path с папки с гейминфо
-                if os.path.commonpath([self.gameinfo_folder, os.path.normcase(path)]) == self.gameinfo_folder:
-                    try:
-                        relative = os.path.relpath(path, start=self.gameinfo_folder)
-                        parts = relative.split(os.sep)
-            
-                        if parts[0].lower() == "sound":
-                            # Всё, что справа от "sound"
-                            path_rel = "/".join(parts[1:])
-                            sounds.append(path_rel)
-                        else:
-                            bad_paths.append(path)
-                            continue
-                    except ValueError:
-                        bad_paths.append(path)
-                        continue
-                else:
-                    bad_paths.append(path)
-                    continue
-            except Exception:
-                bad_paths.append(path)
-                continue
+        first_new_row = len(self.items)
+        for file_name, path_rel in resolved:
+            # Уникальные имена (имя ещё не занято - остаётся как есть, иначе name_1, name_2...)
+            file_name = self.names.unique_name(file_name)
+            self.names.add(file_name, len(self.items))
 
             # Добавление новых нод
-            self.items.append({"entry_name": file_name, "channel": DEFAULT_CHANNEL, "soundlevel": DEFAULT_SOUNDLEVEL, "volume": DEFAULT_VOLUME, "pitch": DEFAULT_PITCH, "sounds": sounds})
+            self.items.append(soundscripts_core.SoundEntry(file_name, channel=DEFAULT_CHANNEL, soundlevel=DEFAULT_SOUNDLEVEL, volume=DEFAULT_VOLUME, pitch=DEFAULT_PITCH, sounds=[path_rel]))
             files_count += 1
 
-        self.update_table()
+        # В проекте новые ноды уходят в файл выделенной строки (или в первый файл манифеста)
+        if self.project:
+            target = self.project_target()
+            for item in self.items[first_new_row:]: self.project.adopt(item, target)
+        self.journal.record_insert(f"add {files_count} files", first_new_row, self.items[first_new_row:])
+        self.insert_table_rows(first_new_row)
         self.status_var.set(f"Added {files_count} WAV files." if files_count else f"WAV files not found!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
@@ -766,13 +1091,16 @@ class App(TkinterDnD.Tk):
                 f'These files are not from the "{self.project_name}" directory and will not be added!\n\n' +
                 "\n".join(bad_paths)
             )
+        if nonconforming: self.offer_conversion(nonconforming)
 
     # Метод для очистки всех файлов из таблицы
     def clear_all(self):
-        if not self.items:
+        if not self.items or self.busy(edits=True):
             return
         if messagebox.askyesno("Clear all", "Remove all sounds?"):
+            self.journal.record_delete("clear all", list(enumerate(self.items)))
             self.items.clear()
+            self.names.rebuild(self.items)
             self.update_table()
 
     # Метод с описанием программы
@@ -782,12 +1110,17 @@ class App(TkinterDnD.Tk):
 
     # Метод для нового саундскрипта
     def new_soundscript(self):
-        if not self.items: return
+        if not self.items or self.busy(): return
         if not self.soundscript_saved:
             if not messagebox.askokcancel("WARNING", "Are you sure you want to create a new script?\nUnsaved progress will be lost!"): return
         self.soundscript_name = None
         self.soundscript_path = None
+        self.document = None
+        self.project = None
         self.items = []
+        self.names.rebuild(self.items)
+        self.journal.clear()
+        self.reset_autosave()
         self.update_table()
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - New Soundscript")
     
@@ -923,12 +1256,271 @@ class App(TkinterDnD.Tk):
             self.unfreeze_control() # Активация контроля кнопок тулбара
             self.build_table_ui() # Постройка и активация таблицы
             self.setup_dnd() # Активация драг н дропа файлов в окно и таблицу
+            self.after(WAVEFORM_POLL_MS, self.poll_waveforms) # Миниатюры волны для видимых строк
+            # Прошлый запуск мог упасть с несохранёнными правками - предлагаем их вернуть, когда окно уже на экране
+            self.after_idle(self.offer_recovery)
         
         # Применяем тему если менеджер тем включен
         if hasattr(self, "theme"): self.theme_mgr.apply(self.theme)
         
         # Обновляем статусную строчку
         self.status_var.set(f"Ready for work! Add new WAV files or open an existing soundscript file.")
+        
+        # Индекс звуков проекта (в фоне, с диска подтягивается прошлый и обновляется по разнице)
+        self.refresh_sound_index()
+
+    # Метод для обновления индекса файлов папки sound в фоне
+    def refresh_sound_index(self):
+        if not self.gameinfo_folder or self.sound_index_job: return
+        sound_folder = os.path.join(self.gameinfo_folder, "sound")
+        index = self.sound_index if self.sound_index and self.sound_index.sound_folder == sound_folder else None
+        self.sound_index_job = self.background.submit(
+            "Indexing sounds", self.sound_index_job_func, sound_folder, index,
+            on_done=self.on_sound_index_ready,
+            on_error=lambda e: setattr(self, "sound_index_job", None),
+            on_cancel=lambda: setattr(self, "sound_index_job", None),
+        )
+
+    # Фоновая часть: загрузить прошлый индекс (если его ещё нет в памяти), обновить и сохранить если что-то поменялось
+    @staticmethod
+    def sound_index_job_func(job, sound_folder, index):
+        if index is None:
+            index = soundscripts_core.SoundFileIndex.load(SOUND_INDEX_PATH, sound_folder)
+        added, removed, rescanned = index.refresh(progress=job.set_progress)
+        if rescanned or not os.path.exists(SOUND_INDEX_PATH):
+            try:
+                index.save(SOUND_INDEX_PATH)
+            except OSError as e:
+                log.warning(f"Can't save sound index: {e}")
+        log.info(f"Sound index: {len(index)} files (+{added} -{removed}, {rescanned} folders rescanned)")
+        return index
+
+    # Главный поток: индекс готов
+    def on_sound_index_ready(self, index):
+        self.sound_index = index
+        self.sound_index_job = None
+        self.validator = soundscripts_core.SoundValidator(index)
+        self.validate_sounds()
+        self.scan_wavs()
+        # Файлы могли поменяться (размер, mtime) - миниатюры видимых строк перерисуются по новому индексу
+        self.waveform_rows.clear()
+        self.waveform_failed.clear()
+
+    # Метод для миниатюр волны: раз в WAVEFORM_POLL_MS смотрим какие строки видны и дорисовываем им миниатюры
+    def poll_waveforms(self):
+        self.after(WAVEFORM_POLL_MS, self.poll_waveforms)
+        if self.job or self.sound_index is None or not soundscripts_audio.available(): return
+        self.render_waveforms()
+
+    # Видимые строки таблицы (начало, конец) или None если tksheet этого не умеет
+    def visible_rows(self):
+        try:
+            start, end = self.sheet.visible_rows
+        except Exception:
+            return None
+        return start, min(end, len(self.view) if self.view is not None else len(self.items))
+
+    # Файлы звуков ноды: [(звук, путь на диске)], для звуков не из папки sound путь None.
+    # Размер и mtime отсюда не берём - индекс папки не видит перезапись файла на месте, кэши проверяют файл сами
+    def item_sound_files(self, item):
+        files = self.sound_index.files
+        out = []
+        for wave in item.sounds:
+            found = files.get(soundscripts_core.sound_key(wave))
+            if found is None or not found[0].lower().endswith(".wav"):
+                out.append((wave, None))
+            else:
+                out.append((wave, os.path.join(self.sound_index.sound_folder, found[0])))
+        return out
+
+    # Метод для рисования миниатюр в видимых строках: что уже есть в памяти - сразу в клеточки,
+    # чего нет - в фон, и после него ещё раз. Когда видимые готовы - в фоне готовятся строки вокруг экрана
+    def render_waveforms(self):
+        visible = self.visible_rows()
+        if visible is None: return
+        start, end = visible
+        missing = {}
+        column = FIELD_COLUMNS["sounds"]
+        changed = False
+        for display in range(start, end):
+            if display in self.waveform_rows: continue
+            lines = []
+            ready = True
+            for wave, path in self.item_sound_files(self.items[self.item_index(display)]):
+                envelope = None
+                if path is not None and path not in self.waveform_failed:
+                    envelope = self.waveforms.peek(path)
+                    if envelope is None:
+                        missing[path] = None
+                        ready = False
+                lines.append(f"{wave}  {soundscripts_audio.waveform_text(envelope)}" if envelope is not None else wave)
+            if not ready: continue
+            try:
+                self.sheet.set_cell_data(display, column, "\n".join(lines) + "\n" if lines else "", redraw=False)
+            except TypeError:
+                self.sheet.set_cell_data(display, column, "\n".join(lines) + "\n" if lines else "")
+            self.waveform_rows.add(display)
+            changed = True
+        # Только перерисовка: redraw_sheet ещё и сбросил бы заголовки со стрелкой сортировки
+        if changed: self.sheet.refresh() if hasattr(self.sheet, "refresh") else self.sheet.redraw()
+        if self.waveform_job: return
+        if not missing:
+            # Строки за краями экрана, чтобы при прокрутке миниатюры уже были
+            total = len(self.view) if self.view is not None else len(self.items)
+            for display in (*range(end, min(total, end + WAVEFORM_PREFETCH_ROWS)), *range(max(0, start - WAVEFORM_PREFETCH_ROWS), start)):
+                for _, path in self.item_sound_files(self.items[self.item_index(display)]):
+                    if path is not None and path not in self.waveform_failed and self.waveforms.peek(path) is None:
+                        missing[path] = None
+            if not missing: return
+        self.waveform_job = self.background.submit(
+            "Drawing waveforms", self.waveform_job_func, self.waveforms, list(missing),
+            on_done=self.on_waveforms_ready,
+            on_error=lambda e: setattr(self, "waveform_job", None),
+            on_cancel=lambda: setattr(self, "waveform_job", None),
+        )
+
+    # Фоновая часть: огибающие с диска или посчитанные заново. Возвращает файлы, которые не читаются
+    @staticmethod
+    def waveform_job_func(job, waveforms, paths):
+        failed = []
+        for done, path in enumerate(paths, start=1):
+            try:
+                waveforms.get(path)
+            except (OSError, ValueError) as e:
+                log.debug(f"No waveform for {path}: {e}")
+                failed.append(path)
+            job.set_progress(done, len(paths))
+        return failed
+
+    # Главный поток: огибающие готовы - дорисовываем видимые строки
+    def on_waveforms_ready(self, failed):
+        self.waveform_job = None
+        self.waveform_failed.update(failed)
+        self.render_waveforms()
+
+    # Метод для чтения заголовков WAV звуков всех нод в фоне (читаются только новые и изменённые - каждый файл проверяется os.stat)
+    def scan_wavs(self):
+        if self.sound_index is None: return
+        if self.wav_scan_job:
+            self.wav_scan_again = True
+            return
+        self.wav_scan_again = False
+        index = self.wav_info if self.wav_info.sound_folder == self.sound_index.sound_folder else None
+        # Кортежи звуков не меняются на месте - в поток уходит снимок списка, а не сами ноды
+        sounds = [item.sounds for item in self.items]
+        self.wav_scan_job = self.background.submit(
+            "Reading WAV headers", self.wav_scan_job_func, self.sound_index, index, sounds,
+            on_done=self.on_wavs_scanned,
+            on_error=lambda e: setattr(self, "wav_scan_job", None),
+            on_cancel=lambda: setattr(self, "wav_scan_job", None),
+        )
+
+    # Фоновая часть: загрузить прошлые заголовки (если их ещё нет в памяти), дочитать новые и сохранить
+    @staticmethod
+    def wav_scan_job_func(job, files, index, sounds):
+        if index is None:
+            index = soundscripts_core.WavInfoIndex.load(WAV_INFO_PATH, files.sound_folder)
+        started = time.perf_counter()
+        scanned = index.scan(files, (wave for waves in sounds for wave in waves), progress=job.set_progress)
+        if scanned:
+            try:
+                index.save(WAV_INFO_PATH)
+            except OSError as e:
+                log.warning(f"Can't save WAV info: {e}")
+            log.info(f"WAV headers: {len(scanned)} files read in {(time.perf_counter() - started) * 1000:.1f} ms ({len(index.info)} known)")
+        return index, scanned
+
+    # Главный поток: заголовки прочитаны - столбцы WAV и их сортировка заново.
+    # Перечитанные файлы новые или изменились на диске - их миниатюры волны тоже рисуются заново
+    def on_wavs_scanned(self, result):
+        index, scanned = result
+        self.wav_scan_job = None
+        if scanned and self.sound_index is not None and self.sound_index.sound_folder == index.sound_folder:
+            paths = [os.path.join(index.sound_folder, self.sound_index.files[key][0]) for key in scanned if key in self.sound_index.files]
+            self.waveforms.forget(paths)
+            self.waveform_failed.difference_update(paths)
+            self.waveform_rows.clear()
+        changed = index is not self.wav_info
+        self.wav_info = index
+        for field in soundscripts_core.WAV_FIELDS:
+            self.sort_keys.key_funcs[field] = index.sort_key(field)
+            if changed or scanned: self.sort_keys.invalidate(field)
+        if (changed and index.info) or scanned: self.update_table(reindex=False)
+        if self.wav_scan_again: self.scan_wavs()
+
+    # Метод для полной проверки звуков всех нод и подсветки битых клеточек
+    def validate_sounds(self):
+        if not self.validator or not hasattr(self, "sheet"): return
+        started = time.perf_counter()
+        total = self.validator.validate_all(self.items)
+        self.highlight_missing_sounds()
+        log.info(f"Sounds validated in {(time.perf_counter() - started) * 1000:.1f} ms: {total} missing in {len(self.validator.missing)} entries")
+        if not self.job: self.status_var.set(self.rows_status())
+
+    # Текст статусной строки про таблицу: количество строк и битых звуков
+    def rows_status(self):
+        status = f"Rows: {len(self.view)} of {len(self.items)} (filtered)" if self.row_filter else f"Rows count: {len(self.items)}"
+        if self.sort_field is not None:
+            status += f" | sorted by {HEADERS[FIELD_COLUMNS[self.sort_field]]}{' (descending)' if self.sort_reverse else ''}"
+        if self.validator and self.validator.missing:
+            status += f" | {self.validator.total()} missing sounds in {len(self.validator.missing)} entries (right click - Missing sounds report)"
+        return status
+
+    # Метод для подсветки клеточек sounds у нод с битыми путями (всю подсветку перекладываем заново,
+    # строки могли съехать после удаления/вставки)
+    def highlight_missing_sounds(self):
+        if not self.validator or not hasattr(self, "sheet"): return
+        try:
+            try:
+                self.sheet.dehighlight_all(redraw=False)
+            except TypeError:
+                self.sheet.dehighlight_all()
+            missing = self.validator.missing
+            if missing:
+                for row, item in enumerate(self.view_items()):
+                    if id(item) in missing: self.set_missing_highlight(row, True)
+        except Exception as e:
+            log.warning(f"Can't highlight missing sounds: {e}")
+
+    # Метод для подсветки или снятия подсветки клеточки sounds одной строки
+    def set_missing_highlight(self, row, missing):
+        column = FIELD_COLUMNS["sounds"]
+        if missing:
+            p = self.theme_mgr.palettes[self.theme_mgr.name]
+            try:
+                self.sheet.highlight_cells(row=row, column=column, bg=p["missing_bg"], fg=p["missing_fg"], redraw=False)
+            except TypeError:
+                self.sheet.highlight_cells(row=row, column=column, bg=p["missing_bg"], fg=p["missing_fg"])
+        else:
+            try:
+                self.sheet.dehighlight_cells(row=row, column=column, redraw=False)
+            except TypeError:
+                self.sheet.dehighlight_cells(row=row, column=column)
+
+    # Метод для отчёта о битых путях: окно с началом списка, полный список копируется в буфер обмена
+    def missing_sounds_report(self):
+        if not self.validator:
+            messagebox.showinfo("Missing sounds", "Sound index is not ready yet, try again in a moment.")
+            return
+        report = self.validator.report(self.items)
+        if not report:
+            messagebox.showinfo("Missing sounds", "All sounds are found in the sound folder!")
+            return
+        lines = [f"{row + 1}\t{entry_name}\t{wave}" for row, entry_name, wave in report]
+        self.clipboard_clear()
+        self.clipboard_append("\n".join(lines))
+        shown = "\n".join(f"{entry_name}: {wave}" for _, entry_name, wave in report[:30])
+        more = f"\n... and {len(report) - 30} more" if len(report) > 30 else ""
+        messagebox.showwarning(
+            "Missing sounds",
+            f"{len(report)} sounds of {len(self.validator.missing)} entries are not found in the sound folder.\n" +
+            f"Full list is copied to the clipboard.\n\n{shown}{more}"
+        )
+
+    # Есть ли файл звука в папке sound проекта. None - индекс ещё не готов
+    def sound_exists(self, wave):
+        if self.sound_index is None: return None
+        return self.sound_index.exists(wave)
     
     # Метод для получения имени мода из гейминфо
     def get_project_name(self):
@@ -945,14 +1537,14 @@ class App(TkinterDnD.Tk):
                     # print(f"self.project_name: {self.project_name}")
                     break
         if not self.project_name:
-            print(f"ERROR! game name not found in gameinfo.txt:")
-            print(f"{gameinfo_path}")
+            log.error(f"Game name not found in gameinfo.txt: {gameinfo_path}")
             return
     
     # Метод для анфриза кнопок на тулбаре
     def unfreeze_control(self):
         self.btn_new_ss.state(["!disabled"])
         self.btn_open_ss.state(["!disabled"])
+        self.btn_open_project.state(["!disabled"])
         self.btn_save_ss.state(["!disabled"])
         self.btn_save_ss_as.state(["!disabled"])
         self.btn_add_sounds.state(["!disabled"])
@@ -961,27 +1553,25 @@ class App(TkinterDnD.Tk):
     # Метод который происходит при драг н дропе файлов на окно или таблицу
     def on_drop(self, event):
         paths = self.tk.splitlist(event.data)
+        if self.busy(): return
         if ".txt" in paths[0]: 
             if self.items and not self.soundscript_saved:
                 if not messagebox.askokcancel("WARNING", "Are you sure you want to open a script?\nUnsaved progress will be lost!"): return
-            self.soundscript_path = paths[0]
-            print(f"self.soundscript_path: {self.soundscript_path}")
-            self.open_soundscript()
+            log.debug(f"Dropped soundscript: {paths[0]}")
+            self.open_soundscript(paths[0])
             return
         self.add_files(paths)
 
     # Метод для дабл клика ЛКМ по любому месту в таблице
     def on_sheet_modified(self, event):
-        print(f"Sheet modified!")
+        log.debug(f"Sheet modified!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
     
     # Метод для получения информации при селекте чего-либо в таблице
     def get_selection_info(self, event=None):
-        print(f" ")
-        print(f"get_selection_info!")
         select = self.sheet.get_currently_selected()
-        print(f"select: {select}")
+        if soundscripts_log.tracing(): log.log(TRACE, f"get_selection_info: {select}")
         if not select: return
         row, column, type_, box, iid, fill_iid = select
         from_row, from_column, upto_row, upto_column = box
@@ -997,7 +1587,9 @@ class App(TkinterDnD.Tk):
         print(f"\tfrom_column: {from_column}")
         print(f"\tupto_column: {upto_column}")
         '''
-        selected_rows = list(range(from_row, upto_row))
+        # Строки таблицы -> номера нод (под фильтром это не одно и то же)
+        selected_rows = [self.item_index(display) for display in range(from_row, upto_row)]
+        if row is not None: row = self.item_index(row)
         '''
         # print(f"selected_rows:")
         # for index in selected_rows:
@@ -1033,7 +1625,8 @@ class App(TkinterDnD.Tk):
     
     # Быстрый вход в редактирование - дабл-клик ЛКМ или Enter
     def fast_edit(self, event=None):
-        print(f"Fast edit!")
+        log.debug(f"Fast edit!")
+        if self.busy(edits=True): return
         
         # Получаем всю необходимую инфу о текущем выделении
         selection_info = self.get_selection_info()
@@ -1056,8 +1649,8 @@ class App(TkinterDnD.Tk):
         
     # Метод для контекстного меню таблицы на ПКМ - в зависимости от контекста клика показываются разные пункты
     def on_right_click(self, event):
-        print(f" ")
-        print(f"Контекстное меню!")
+        log.debug(f"Context menu!")
+        if self.busy(edits=True): return
         
         # Получаем всю необходимую инфу о текущем выделении
         selection_info = self.get_selection_info()
@@ -1088,17 +1681,31 @@ class App(TkinterDnD.Tk):
         if type_ == "cells" and column_pitch_selected: self.rcm_menu.add_command(label="Set Pitch for selection", command=lambda: self.edit_csvp(selected_rows, "pitch"))
         
         if type_ in ("cells", "rows") and not multiselect_rows: self.rcm_menu.add_command(label="Edit sounds of this row", command=lambda: self.edit_row_sounds_list(row))
+        if type_ in ("cells", "rows") and not multiselect_rows: self.rcm_menu.add_command(label="Play Sound", accelerator="Space", command=lambda: self.preview_row(row))
         
         if type_ == "columns" and column == 1: self.rcm_menu.add_command(label="Set Channel for All", command=lambda: self.edit_csvp(selected_rows, "channel"))
         if type_ == "columns" and column == 2: self.rcm_menu.add_command(label="Set Soundlevel for All", command=lambda: self.edit_csvp(selected_rows, "soundlevel"))
         if type_ == "columns" and column == 3: self.rcm_menu.add_command(label="Set Volume for All", command=lambda: self.edit_csvp(selected_rows, "volume"))
         if type_ == "columns" and column == 4: self.rcm_menu.add_command(label="Set Pitch for All", command=lambda: self.edit_csvp(selected_rows, "pitch"))
+        if type_ in ("cells", "rows") or (type_ == "columns" and column == 3): self.rcm_menu.add_command(label="Suggest Volume by Loudness...", command=lambda: self.suggest_volumes(selected_rows))
+        if type_ in ("cells", "rows"): self.rcm_menu.add_command(label="Convert Sounds to Source Format...", command=lambda: self.convert_row_sounds(selected_rows))
+        
+        if type_ == "columns" and column in COLUMN_FIELDS:
+            field = COLUMN_FIELDS[column]
+            self.rcm_menu.add_command(label="Sort Ascending", command=lambda: self.sort_by(field, reverse=False))
+            self.rcm_menu.add_command(label="Sort Descending", command=lambda: self.sort_by(field, reverse=True))
+        if type_ == "columns" and self.sort_field is not None: self.rcm_menu.add_command(label="Original Order", command=lambda: self.sort_by(None, reverse=False))
         
         self.rcm_menu.add_separator()
         
         if type_ == "cells" and column in (3, 4): self.rcm_menu.add_command(label="Clear Cell(s)", command=lambda: self.clear_selected_cells())
         if type_ == "columns" and column in (3, 4): self.rcm_menu.add_command(label="Clear All", command=lambda: self.clear_selected_cells())
         if type_ in ("cells", "rows"): self.rcm_menu.add_command(label="Delete Row(s)", command=lambda: self.delete_selected_rows())
+        
+        self.rcm_menu.add_separator()
+        if self.journal.can_undo(): self.rcm_menu.add_command(label=f"Undo {self.journal.undo_stack[-1].label}", accelerator="Ctrl+Z", command=self.undo)
+        if self.journal.can_redo(): self.rcm_menu.add_command(label=f"Redo {self.journal.redo_stack[-1].label}", accelerator="Ctrl+Y", command=self.redo)
+        self.rcm_menu.add_command(label="Missing sounds report", command=self.missing_sounds_report)
 
         self.rcm_menu.tk_popup(event.x_root, event.y_root)
         # sel = self.sheet.get_currently_selected()
@@ -1112,20 +1719,18 @@ class App(TkinterDnD.Tk):
         
     # Метод для очистки необязательных клеточек
     def clear_selected_cells(self):
-        print(f"CLEAR_SELECTED_CELLS START")
+        log.debug(f"clear_selected_cells start")
         selection_info = self.get_selection_info()
         selected_rows = selection_info["selected_rows"]
         column_volume_selected = selection_info["column_volume_selected"]
         column_pitch_selected = selection_info["column_pitch_selected"]
-        print(f"selected_rows: {selected_rows}")
-        print(f"self.items: {self.items}")
+        log.debug(f"selected_rows: {selected_rows}")
         
         # Получаем список имён нод для которых планируем очистить клеточки
         entry_names = []
         for idx in selected_rows:
             entry_names.append(self.items[idx]["entry_name"])
-        print(f"entry_names: ")
-        for entry_name in entry_names: print(f"{entry_name}")
+        if soundscripts_log.tracing(): log.log(TRACE, f"entry_names: {entry_names}")
         
         # Вы уверены что хотите очистить клеточки?
         if not messagebox.askyesno(
@@ -1135,30 +1740,36 @@ class App(TkinterDnD.Tk):
         ):
             return
         
+        changes = []
         for idx in selected_rows:
+            if column_volume_selected: changes.append((idx, "volume", self.items[idx]["volume"], ""))
+            if column_pitch_selected: changes.append((idx, "pitch", self.items[idx]["pitch"], ""))
             self.items[idx]["volume"] = "" if column_volume_selected else self.items[idx]["volume"]
             self.items[idx]["pitch"] = "" if column_pitch_selected else self.items[idx]["pitch"]
+            self.mark_dirty(self.items[idx])
+        self.journal.record_set("clear cells", changes)
 
         # Апдейт таблицы и других приколов
-        self.update_table()
+        cleared_fields = [field for field, selected in (("volume", column_volume_selected), ("pitch", column_pitch_selected)) if selected]
+        self.mark_table_dirty(selected_rows, cleared_fields)
+        self.refresh_table()
         self.status_var.set(f"Cleared cells for {len(selected_rows)} rows!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
         
     # Метод для удаления нод
     def delete_selected_rows(self, event=None):
-        print(f"DELETE_ROWS START")
+        log.debug(f"delete_selected_rows start")
+        if self.busy(edits=True): return
         selection_info = self.get_selection_info()
         selected_rows = selection_info["selected_rows"]
-        print(f"selected_rows: {selected_rows}")
-        print(f"self.items: {self.items}")
+        log.debug(f"selected_rows: {selected_rows}")
         
         # Получаем список имён нод которые планируем удалить
         entry_names = []
         for idx in selected_rows:
             entry_names.append(self.items[idx]["entry_name"])
-        print(f"entry_names: ")
-        for entry_name in entry_names: print(f"{entry_name}")
+        if soundscripts_log.tracing(): log.log(TRACE, f"entry_names: {entry_names}")
         
         # Вы уверены что хотите удалить эти строки?
         if not messagebox.askyesno(
@@ -1168,31 +1779,107 @@ class App(TkinterDnD.Tk):
         ):
             return
         
+        self.journal.record_delete(f"delete {len(selected_rows)} rows", [(i, self.items[i]) for i in selected_rows])
         for i in sorted(selected_rows, reverse=True):
             del self.items[i]
+        self.names.rebuild(self.items) # строки после удалённых съехали, индекс проще перестроить
 
         # Апдейт таблицы и других приколов
-        self.update_table()
+        self.delete_table_rows(selected_rows)
         self.status_var.set(f"Removed {len(selected_rows)} rows!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
 
-    # Метод для поиска текста в таблице и перехода к клеточке где текст был найден
-    def find_next(self, search_text=None, event=None):
-        print(f"FIND_NEXT START")
+    # Запрос из поля поиска -> (текст, режим): "re:..." - регулярка, "^..." - начало имени или пути, иначе подстрока
+    def parse_search_query(self, search_text):
+        if search_text.startswith("re:"): return search_text[3:], "regex"
+        if search_text.startswith("^") and len(search_text) > 1: return search_text[1:], "prefix"
+        return search_text, "substring"
+
+    # Метод для поиска по индексу. Результат кэшируется пока не поменялись запрос или таблица.
+    # Возвращает True если совпадения пересчитаны
+    def update_search_hits(self, search_text):
+        key = (search_text, self.search.version, len(self.items), self.view_version)
+        if key == self.search_key: return False
+        query, mode = self.parse_search_query(search_text)
+        started = time.perf_counter()
+        try:
+            hits = self.search.search(self.items, query, mode)
+            if self.view is not None:
+                # Только видимые клеточки, номера строк таблицы вместо номеров нод
+                view_rows = self.view_rows
+                hits = sorted(self.search.number(view_rows[row], column) for row, column in map(self.search.cell, hits) if row in view_rows)
+            self.search_hits = hits
+        except re.error as e:
+            self.search_hits = []
+            self.search_key = None
+            self.status_var.set(f"Bad regular expression: {e}")
+            return True
+        self.search_key = key
+        self.search_pos = -1
+        log.debug(f"Search {mode} {query!r}: {len(self.search_hits)} matches in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return True
+
+    # Набор в поле поиска: после паузы показываем количество совпадений
+    def on_search_typed(self, event=None):
+        if event is not None and event.keysym in ("Return", "KP_Enter"): return
+        if self.search_after: self.after_cancel(self.search_after)
+        self.search_after = self.after(SEARCH_DELAY_MS, self.show_search_count)
+
+    def show_search_count(self):
+        self.search_after = None
+        search_text = self.search_entry.get()
+        if not search_text:
+            self.status_var.set(self.rows_status())
+            return
+        if self.update_search_hits(search_text) and self.search_key is None: return # кривая регулярка, статус уже выставлен
+        count = len(self.search_hits)
+        self.status_var.set(f"{count} matches" if count != 1 else "1 match")
+
+    # Метод для поиска текста в таблице и перехода к клеточке где текст был найден (step=-1 - к предыдущей)
+    def find_next(self, search_text=None, event=None, step=1):
         if not search_text: return
-        print(f"search_text: {search_text}")
-        
-        # найти и выделить следующее совпадение - встроенная фича tksheet
-        self.sheet.next_match(find=search_text)
-    
+        log.debug(f"find_next: {search_text}")
+        self.update_search_hits(search_text)
+        if self.search_key is None: return
+        if not self.search_hits:
+            self.status_var.set("No matches")
+            return
+
+        if self.search_pos < 0:
+            # Новый запрос - начинаем от выделенной клеточки
+            selected = None
+            try:
+                selected = self.sheet.get_currently_selected()
+            except Exception:
+                pass
+            position = 0
+            if selected:
+                current = self.search.number(selected[0] or 0, selected[1] or 0)
+                position = bisect.bisect_right(self.search_hits, current) if step > 0 else bisect.bisect_left(self.search_hits, current) - 1
+            index = position % len(self.search_hits)
+        else:
+            index = (self.search_pos + step) % len(self.search_hits)
+        self.goto_search_hit(index)
+
+    # Метод для перехода к N-ному совпадению (с нуля)
+    def goto_search_hit(self, index):
+        if not self.search_hits: return
+        self.search_pos = index % len(self.search_hits)
+        row, column = self.search.cell(self.search_hits[self.search_pos])
+        try:
+            self.sheet.see(row=row, column=column, redraw=False)
+            self.sheet.select_cell(row, column, redraw=True)
+        except Exception as e:
+            # Другая версия tksheet - пусть ищет сама
+            log.warning(f"Can't select search match: {e}")
+            self.sheet.next_match(find=self.search_entry.get())
+            return
+        self.status_var.set(f"Match {self.search_pos + 1} of {len(self.search_hits)}")
+
     # Метод для редактирования каналов одной или нескольких нод
     def edit_csvp(self, selected_rows, csvp):
-        print(f" ")
-        print(f"EDIT CHANNELS START")
-        print(f"selected_rows: {selected_rows}")
-        print(f"self.items: {self.items}")
-        print(f"csvp: {csvp}")
+        log.debug(f"edit_csvp: {csvp}, selected_rows: {selected_rows}")
         
         if not csvp: return
         
@@ -1229,23 +1916,231 @@ class App(TkinterDnD.Tk):
         )
         new_value = dialog.result
         if not new_value: return
+        self.journal.record_set(f"set {csvp}", [(idx, csvp, self.items[idx][csvp], new_value) for idx in selected_rows])
         for idx in selected_rows:
             self.items[idx][csvp] = new_value
+            self.mark_dirty(self.items[idx])
 
-        self.update_table()
+        self.mark_table_dirty(selected_rows, [csvp])
+        self.refresh_table()
         self.status_var.set(f"Updated {csvp} for {len(selected_rows)} rows!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
     
+    # Метод для подбора volume по громкости звуков: звуки выделенных нод анализируются в фоне (пул процессов),
+    # потом спрашиваем целевую громкость и одной правкой ставим предложенные значения
+    def suggest_volumes(self, selected_rows):
+        if not soundscripts_audio.available():
+            messagebox.showwarning("Loudness", "Loudness analysis needs NumPy.\nInstall it with: pip install numpy")
+            return
+        if self.busy(): return
+        if self.sound_index is None:
+            messagebox.showinfo("Loudness", "Sound index is not ready yet, try again in a moment.")
+            return
+        row_paths = self.row_sound_paths(selected_rows)
+        if not row_paths:
+            messagebox.showinfo("Loudness", "None of the selected entries has sounds in the sound folder.")
+            return
+        paths = sorted({path for paths in row_paths.values() for path in paths})
+        self.start_job("Analyzing loudness", self.loudness_job, paths, on_done=lambda result: self.on_loudness_ready(row_paths, result))
+
+    # Фоновая часть: громкость файлов в пуле процессов (рабочий поток - self не трогаем)
+    @staticmethod
+    def loudness_job(job, paths):
+        return soundscripts_audio.analyze_files(paths, progress=job.set_progress)
+
+    # Главный поток: громкость известна - спрашиваем цель, показываем предложения и применяем одной правкой
+    def on_loudness_ready(self, row_paths, result):
+        found, errors, seconds = result
+        speed = soundscripts_audio.audio_hours_per_second(found, seconds)
+        log.info(f"Loudness: {len(found)} files in {seconds:.2f} s ({speed:.2f} audio-hours/s), {len(errors)} failed")
+        for path, error in errors: log.warning(f"Can't analyze {path}: {error}")
+        loudness = {}
+        for row, paths in row_paths.items():
+            value = soundscripts_audio.entry_loudness([found[path][2] for path in paths if path in found])
+            if value is not None: loudness[row] = value
+        if not loudness:
+            messagebox.showwarning("Loudness", f"Nothing to measure: {len(errors)} files can't be read and the rest are silent.")
+            return
+        # По умолчанию - громкость самой тихой ноды: её уровень достижим для всех без volume больше 1
+        target = simpledialog.askfloat(
+            "Target loudness",
+            f"Analyzed {len(found)} files in {seconds:.2f} s ({speed:.2f} audio-hours/s).\t\n" +
+            f"Loudness of selected entries: {min(loudness.values()):.1f} to {max(loudness.values()):.1f} LUFS at volume 1.\t\n\n" +
+            "Target loudness (LUFS):",
+            initialvalue=round(min(loudness.values()), 1),
+            parent=self,
+        )
+        if target is None: return
+        changes = []
+        capped = []
+        for row, value in loudness.items():
+            item = self.items[row]
+            suggestion = soundscripts_audio.suggest_volume(item.volume, value, target)
+            if suggestion is None: continue
+            new_volume, limited = suggestion
+            if limited: capped.append(item.entry_name)
+            if new_volume != item.volume: changes.append((row, "volume", item.volume, new_volume))
+        if not changes:
+            messagebox.showinfo("Loudness", "Volumes of selected entries already match the target.")
+            return
+        lines = [f"{self.items[row].entry_name}: {old} -> {new} ({loudness[row]:.1f} LUFS)" for row, _, old, new in changes]
+        for line in lines: log.info(f"Suggested volume: {line}")
+        shown = "\n".join(lines[:LOUDNESS_REPORT_LINES])
+        more = f"\n... and {len(lines) - LOUDNESS_REPORT_LINES} more" if len(lines) > LOUDNESS_REPORT_LINES else ""
+        limited = f"\n\n{len(capped)} entries are too quiet for the target even at volume 1." if capped else ""
+        if not messagebox.askyesno("Suggested volumes", f"Set volume for {len(changes)} entries?\n\n{shown}{more}{limited}"): return
+        self.journal.record_set("set volume by loudness", changes)
+        for row, _, _, new_volume in changes:
+            self.items[row].volume = new_volume
+            self.mark_dirty(self.items[row])
+        self.mark_table_dirty([row for row, _, _, _ in changes], ["volume"])
+        self.refresh_table()
+        self.status_var.set(f"Updated volume for {len(changes)} rows to {target:.1f} LUFS!")
+        self.soundscript_saved = False
+        self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
+
+    # Метод для прослушивания звука выделенной строки (Space)
+    def preview_selected(self, event=None):
+        select = self.sheet.get_currently_selected()
+        if select and select[0] is not None: self.preview_row(self.item_index(select[0]))
+        return "break" # иначе Space уйдёт в tksheet
+
+    # Метод для прослушивания звука ноды: wave или случайный из rndwave (как в движке), с её volume и pitch.
+    # Звук играет в потоке движка, время до первого сэмпла показывается в статусе. Space на той же ноде пока играет - стоп
+    def preview_row(self, row):
+        if not soundscripts_audio.available():
+            self.status_var.set("Sound preview needs NumPy (pip install numpy).")
+            return
+        if self.sound_index is None:
+            self.status_var.set("Sound index is not ready yet, try again in a moment.")
+            return
+        if self.player and self.player.current and self.player.current.playing and self.preview_item == row:
+            self.player.stop()
+            self.status_var.set("Preview stopped.")
+            return
+        item = self.items[row]
+        sounds = [sound for sound in self.item_sound_files(item) if sound[1] is not None]
+        if not sounds:
+            self.status_var.set(f"No WAV files of {item.entry_name} in the sound folder.")
+            return
+        wave, path = random.choice(sounds)
+        if self.player is None:
+            try:
+                self.player = soundscripts_playback.PreviewPlayer(soundscripts_playback.make_output(self.preview_output))
+            except RuntimeError as e:
+                messagebox.showwarning("Preview", f"Can't open audio output \"{self.preview_output}\":\n{e}")
+                return
+        gain, pitch = soundscripts_playback.entry_gain_pitch(item.volume, item.pitch)
+        playback = self.player.play(path, gain, pitch)
+        self.preview_item = row
+        self.status_var.set(f"Playing {wave}...")
+        if self.preview_after: self.after_cancel(self.preview_after)
+        self.poll_preview(item.entry_name, wave, playback)
+
+    # Метод для ожидания первого сэмпла: звук играет в потоке движка, а главный поток раз в PREVIEW_POLL_MS
+    # смотрит, пошёл ли он (или ошибка) - так же, как JobRunner ждёт задачи
+    def poll_preview(self, entry_name, wave, playback):
+        self.preview_after = None
+        if not playback.started.is_set():
+            self.preview_after = self.after(PREVIEW_POLL_MS, lambda: self.poll_preview(entry_name, wave, playback))
+            return
+        self.on_preview_started(entry_name, wave, playback)
+
+    # Главный поток: звук пошёл - время до первого сэмпла в статус и лог
+    def on_preview_started(self, entry_name, wave, playback):
+        if playback.error is not None:
+            self.status_var.set(f"Can't play {wave}: {playback.error}")
+            return
+        if playback.first_sample is None: return # остановили раньше первого сэмпла или звук пустой
+        message = f"{entry_name}: {wave} at volume {playback.gain:.2f}, pitch {playback.pitch:.0f} via {self.player.output.name} - {playback.report()}"
+        log.info(f"Preview {message}")
+        self.status_var.set(f"Playing {message}")
+
+    # Пути на диске для звуков нод rows (которых нет в папке sound - пропускаем): {строка: [пути]}
+    def row_sound_paths(self, rows):
+        files = self.sound_index.files
+        sound_folder = self.sound_index.sound_folder
+        row_paths = {}
+        for row in rows:
+            paths = []
+            for wave in self.items[row].sounds:
+                found = files.get(soundscripts_core.sound_key(wave))
+                if found is not None: paths.append(os.path.join(sound_folder, found[0]))
+            if paths: row_paths[row] = paths
+        return row_paths
+
+    # Фоновая часть: заголовки файлов и что в них не так для движка - [(путь, [что не так])].
+    # Нечитаемые файлы пропускаются (их покажет проверка звуков или сама конвертация)
+    @staticmethod
+    def check_conformance_job(job, paths, mono):
+        nonconforming = []
+        for done, path in enumerate(paths, start=1):
+            try:
+                problems = soundscripts_audio.conform_problems(soundscripts_core.read_wav_header(path), mono)
+            except (OSError, ValueError):
+                continue
+            if problems: nonconforming.append((path, problems))
+            if not done % 100: job.set_progress(done, len(paths))
+        return nonconforming
+
+    # Метод для конвертации звуков выделенных нод в формат движка (частота, разрядность, каналы)
+    def convert_row_sounds(self, selected_rows):
+        if self.busy(): return
+        if self.sound_index is None:
+            messagebox.showinfo("Convert sounds", "Sound index is not ready yet, try again in a moment.")
+            return
+        row_paths = self.row_sound_paths(selected_rows)
+        paths = sorted({path for paths in row_paths.values() for path in paths})
+        if not paths:
+            messagebox.showinfo("Convert sounds", "None of the selected entries has sounds in the sound folder.")
+            return
+        self.start_job("Checking sounds", self.check_conformance_job, paths, self.convert_mono, on_done=self.offer_conversion)
+
+    # Метод для предложения конвертации: список неподходящих звуков и вопрос. nonconforming - [(путь, [что не так])]
+    def offer_conversion(self, nonconforming):
+        if not nonconforming:
+            messagebox.showinfo("Convert sounds", "All sounds are already in a format Source plays correctly.")
+            return
+        lines = [f"{os.path.basename(path)}: {', '.join(problems)}" for path, problems in nonconforming]
+        for path, problems in nonconforming: log.info(f"Not in Source format: {path}: {', '.join(problems)}")
+        shown = "\n".join(lines[:CONVERT_REPORT_LINES])
+        more = f"\n... and {len(lines) - CONVERT_REPORT_LINES} more" if len(lines) > CONVERT_REPORT_LINES else ""
+        if not soundscripts_audio.available():
+            messagebox.showwarning("Convert sounds", f"{len(lines)} sounds are not in a format Source plays correctly:\n\n{shown}{more}\n\nConverting them needs NumPy.\nInstall it with: pip install numpy")
+            return
+        target = f"{'/'.join(str(rate) for rate in soundscripts_audio.SOURCE_RATES)} Hz, 16-bit{', mono' if self.convert_mono else ''}"
+        backups = "The originals are kept as .bak next to them." if self.save_backups else "The originals will be replaced!"
+        if not messagebox.askyesno("Convert sounds", f"{len(lines)} sounds are not in a format Source plays correctly:\n\n{shown}{more}\n\nConvert them to {target}?\n{backups}"): return
+        if self.busy(): return
+        self.start_job("Converting sounds", self.convert_job, [path for path, _ in nonconforming], self.convert_mono, self.save_backups, on_done=self.on_sounds_converted)
+
+    # Фоновая часть: конвертация в пуле процессов (рабочий поток - self не трогаем)
+    @staticmethod
+    def convert_job(job, paths, mono, backups):
+        return soundscripts_audio.conform_files(paths, mono, backups, progress=job.set_progress)
+
+    # Главный поток: файлы переписаны - индекс папки sound (размеры и время поменялись) и столбцы WAV обновятся сами
+    def on_sounds_converted(self, result):
+        converted, errors, seconds = result
+        audio = sum(info[2] for info in converted.values() if info)
+        count = sum(1 for info in converted.values() if info)
+        log.info(f"Converted {count} sounds ({audio:.1f} s of audio) in {seconds:.2f} s, {len(errors)} failed")
+        for path, error in errors: log.warning(f"Can't convert {path}: {error}")
+        self.status_var.set(f"Converted {count} sounds in {seconds:.1f} s" + (f", {len(errors)} failed (see log)" if errors else "") + "!")
+        if errors:
+            shown = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in errors[:CONVERT_REPORT_LINES])
+            messagebox.showwarning("Convert sounds", f"{len(errors)} sounds can't be converted:\n\n{shown}")
+        self.refresh_sound_index()
+
     # Метод для редактирования имён
     def edit_entry_names(self, selected_rows, override_name=None):
-        print(f" ")
-        print(f"edit_entry_name!!!!!")
-        print(f"selected_rows: {selected_rows}")
+        log.debug(f"edit_entry_names, selected_rows: {selected_rows}")
         
+        changes = []
         for row in selected_rows:
             current_entry_name = self.items[row]["entry_name"]
-            print(f"current_entry_name: {current_entry_name}")
+            log.debug(f"current_entry_name: {current_entry_name}")
             
             init_name = override_name if override_name else current_entry_name
             
@@ -1271,32 +2166,29 @@ class App(TkinterDnD.Tk):
             if not new_entry_name or current_entry_name == new_entry_name: continue
             
             # Проверка на существование такого имени в таблице
-            existing_names = [e["entry_name"] for e in self.items]
-            if new_entry_name in existing_names: 
+            if new_entry_name in self.names: 
                 if not messagebox.askyesno("Warning", "This name already exist! Are you sure you want to continue?"):
                     self.edit_entry_names([row], override_name=new_entry_name)
                     continue
             # Новое значение имени
+            self.names.rename(current_entry_name, new_entry_name, row)
+            changes.append((row, "entry_name", current_entry_name, new_entry_name))
             self.items[row]["entry_name"] = new_entry_name
+            self.mark_dirty(self.items[row])
+            self.mark_table_dirty([row], ["entry_name"])
         
-        self.update_table()
+        self.journal.record_set("rename", changes)
+        self.refresh_table()
         self.status_var.set(f"{len(selected_rows)} names updated!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
     
     # Метод для редактирования звуков ноды (один wave или rndwave)
     def edit_row_sounds_list(self, row):
-        print(f" ")
-        print(f"edit_row_sounds_list!")
-        print(f"row: {row}")
-        
         entry_name = self.items[row]["entry_name"]
         
         sounds = self.items[row]["sounds"]
-        print(f"sounds: {sounds}")
-        
-        for wave in sounds: print(f"\twave: {wave}")
-        print(f" ")
+        log.debug(f"edit_row_sounds_list, row: {row}, sounds: {list(sounds)}")
         
         new_sounds = SoundsListEdit(
             self,
@@ -1306,16 +2198,163 @@ class App(TkinterDnD.Tk):
         )
         new_sounds = new_sounds.result
         
-        print(f"!!! new_sounds: {new_sounds}")
+        log.debug(f"new_sounds: {new_sounds}")
         if not new_sounds: return
         
+        old_sounds = self.items[row]["sounds"]
         self.items[row]["sounds"] = new_sounds
+        self.journal.record_set("edit sounds", [(row, "sounds", old_sounds, self.items[row]["sounds"])])
+        self.mark_dirty(self.items[row])
         
-        self.update_table()
+        self.mark_table_dirty([row], ["sounds"])
+        self.refresh_table()
         self.status_var.set(f"Updated sounds for {entry_name}!")
         self.soundscript_saved = False
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
 
+    # Отмена последней правки (Ctrl+Z)
+    def undo(self, event=None):
+        self.replay_edit(undo=True)
+
+    # Повтор отменённой правки (Ctrl+Y / Ctrl+Shift+Z)
+    def redo(self, event=None):
+        self.replay_edit(undo=False)
+
+    # Метод для отмены/повтора правки из журнала: в таблице обновляются только затронутые строки
+    def replay_edit(self, undo):
+        if self.busy(edits=True): return
+        command = self.journal.undo(self.items) if undo else self.journal.redo(self.items)
+        if command is None:
+            self.status_var.set("Nothing to undo" if undo else "Nothing to redo")
+            return
+        log.debug(f"{'Undo' if undo else 'Redo'}: {command.label} ({command.kind}, {len(command.rows())} rows)")
+        rows = command.rows()
+        if command.kind == "set":
+            for row, field, old, new in (reversed(command.data) if undo else command.data):
+                if field != "entry_name": continue
+                if undo:
+                    self.names.rename(new, old, row)
+                else:
+                    self.names.rename(old, new, row)
+            for row in rows:
+                self.mark_dirty(self.items[row])
+            self.mark_table_dirty(rows, command.fields())
+            self.refresh_table()
+        else:
+            # Строки добавились или ушли - индекс имён проще перестроить, как при удалении
+            self.names.rebuild(self.items)
+            if (command.kind == "delete") == undo:
+                self.insert_table_rows_at(rows)
+            else:
+                self.delete_table_rows(rows)
+        self.status_var.set(f"{'Undone' if undo else 'Redone'}: {command.label}")
+        self.soundscript_saved = False
+        self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
+
+    # Каждая правка, её отмена и повтор уходят в журнал автосохранения
+    def on_journal_change(self, command, undo):
+        self.autosave.add(command, undo)
+        self.schedule_autosave()
+
+    # Запись журнала автосохранения пачкой чуть позже (fsync на каждую правку был бы слишком дорогим)
+    def schedule_autosave(self):
+        if not self.autosave_after: self.autosave_after = self.after(AUTOSAVE_FLUSH_MS, self.flush_autosave)
+
+    def flush_autosave(self):
+        self.autosave_after = None
+        try:
+            count = self.autosave.flush()
+        except OSError as e:
+            log.warning(f"Can't write autosave journal {AUTOSAVE_PATH}: {e}")
+            return
+        if count and soundscripts_log.tracing(): log.log(TRACE, f"Autosave: {count} changes written")
+
+    # Начать журнал автосохранения от текущего состояния (открыли, создали или сохранили файл)
+    # entries и keep_from - после фонового сохранения: сколько нод было в записанном файле и с какой записи
+    # начинаются правки, сделанные пока он писался (они остаются в новом журнале)
+    def reset_autosave(self, entries=None, keep_from=None):
+        if self.autosave_after:
+            self.after_cancel(self.autosave_after)
+            self.autosave_after = None
+        try:
+            self.autosave.reset(self.soundscript_path, len(self.items) if entries is None else entries, keep_from)
+        except OSError as e:
+            log.warning(f"Can't reset autosave journal {AUTOSAVE_PATH}: {e}")
+        if self.autosave.count(): self.schedule_autosave()
+
+    # Метод для восстановления правок из журнала автосохранения после падения
+    def offer_recovery(self):
+        try:
+            saved = soundscripts_core.AutosaveLog.load(AUTOSAVE_PATH)
+        except OSError as e:
+            log.warning(f"Can't read autosave journal {AUTOSAVE_PATH}: {e}")
+            saved = None
+        if not saved or not saved[1]:
+            self.reset_autosave()
+            return
+        header, records = saved
+        source = header.get("source")
+        if not messagebox.askyesno(
+            "Recover unsaved changes",
+            f"{ABOUT_TOOL_NAME} was not closed properly.\n\n" +
+            f"Recover {len(records)} unsaved changes to {source if source else 'a new soundscript'}?"
+        ):
+            self.reset_autosave()
+            return
+        # Сам журнал откладываем в сторону: открытие файла начнёт новый, а этот нужен пока правки не накатятся
+        try:
+            os.replace(AUTOSAVE_PATH, AUTOSAVE_RECOVERY_PATH)
+        except OSError as e:
+            log.warning(f"Can't move autosave journal aside: {e}")
+        if not source:
+            self.replay_recovered(header, records)
+            return
+        if not os.path.exists(source):
+            self.recovery_failed(f"{source} is not found!")
+            return
+        self.open_soundscript(source, then=lambda: self.replay_recovered(header, records), on_error=lambda e: self.recovery_failed(e))
+
+    # Главный поток: исходный файл открыт (или новый скрипт) - накатываем правки
+    def replay_recovered(self, header, records):
+        if header.get("entries") != len(self.items):
+            self.recovery_failed(f"{header.get('source')} has changed since the crash ({len(self.items)} entries instead of {header.get('entries')}).")
+            return
+        started = time.perf_counter()
+        try:
+            changed = soundscripts_core.replay_autosave(self.items, records)
+        except ValueError as e:
+            self.recovery_failed(e)
+            return
+        for item in changed:
+            self.mark_dirty(item)
+        self.names.rebuild(self.items)
+        self.update_table()
+        # Восстановленные правки снова в журнале - второе падение их не потеряет
+        for record in records:
+            self.autosave.add_record(record)
+        self.flush_autosave()
+        try:
+            os.remove(AUTOSAVE_RECOVERY_PATH)
+        except OSError:
+            pass
+        log.info(f"Recovered {len(records)} changes in {(time.perf_counter() - started) * 1000:.1f} ms")
+        self.status_var.set(f"Recovered {len(records)} unsaved changes!")
+        self.soundscript_saved = False
+        self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name if self.soundscript_name else 'Unsaved Soundscript'}*")
+
+    # Восстановление не удалось - отложенный журнал так и остаётся лежать рядом
+    def recovery_failed(self, error):
+        self.reset_autosave()
+        kept = os.path.exists(AUTOSAVE_RECOVERY_PATH)
+        messagebox.showerror("ERROR", f"Can't recover unsaved changes!\n\n{error}" + (f"\n\nThe journal is kept in {AUTOSAVE_RECOVERY_PATH}" if kept else ""))
+
+    # Метод чтобы пометить ноду изменённой - при сохранении в открытом файле перепишется только она
+    def mark_dirty(self, item):
+        if self.document: self.document.mark_dirty(item)
+        if self.project: self.project.mark_dirty(item)
+        # Файл сейчас пишется в фоне - запоминаем, чтобы пометка пережила и удачное, и отменённое сохранение
+        if self.save_dirty is not None: self.save_dirty.append(item)
+
     # Метод для загрузки кэша из файла
     def load_cache(self) -> str | None:
         cache_path = Path(CACHE_PATH)
@@ -1323,17 +2362,24 @@ class App(TkinterDnD.Tk):
             return None
         # print(f"cache_path: {cache_path}")
         try:
-            gameinfo_path = Path(json.loads(cache_path.read_text(encoding="utf-8"))[0].get("gameinfo_path"))
-            window_size = json.loads(cache_path.read_text(encoding="utf-8"))[1].get("window_size")
+            cache = json.loads(cache_path.read_text(encoding="utf-8"))
+            gameinfo_path = Path(cache[0].get("gameinfo_path"))
+            window_size = cache[1].get("window_size")
+            # Настройки логов необязательны (старые кэши без них), флаги командной строки их перекрывают
+            log_settings = cache[2] if len(cache) > 2 else {}
+            self.log_level = log_settings.get("log_level", soundscripts_log.DEFAULT_LOG_LEVEL)
+            self.log_file = log_settings.get("log_file", "")
+            self.save_backups = max(0, int(log_settings.get("save_backups", SAVE_BACKUPS_DEFAULT)))
+            self.convert_mono = bool(log_settings.get("convert_mono", CONVERT_MONO_DEFAULT))
+            self.preview_output = str(log_settings.get("preview_output", PREVIEW_OUTPUT_DEFAULT))
+            soundscripts_log.configure(self.log_level, self.log_file)
             # print(f"gameinfo_path: {gameinfo_path}")
             # print(f"window_size: {window_size}")
             if gameinfo_path.exists(): self.gameinfo_path = gameinfo_path
             self.geometry(window_size if window_size else WINDOW_SIZE_DEFAULT)
             return
         except Exception as e:
-            print(f"Failed to load cache!")
-            print(f"Exception:")
-            print(e)
+            log.warning(f"Failed to load cache: {e}")
             return
     
     # Метод для сохранения кэша в файл
@@ -1344,50 +2390,30 @@ class App(TkinterDnD.Tk):
         json_dumps_content = [
             {"gameinfo_path": str(self.gameinfo_path)},
             {"window_size": window_size},
+            {"log_level": self.log_level, "log_file": self.log_file, "save_backups": self.save_backups, "convert_mono": self.convert_mono, "preview_output": self.preview_output},
         ]
         try:
             Path(CACHE_PATH).write_text(json.dumps(json_dumps_content, indent=2), encoding="utf-8")
-            print(f"Cache saved!")
+            log.info(f"Cache saved!")
             # print(f"Content:")
             # print(f"{json_dumps_content}")
             return True
         except Exception as e:
-            print(f"ERROR SAVING CACHE:")
-            print(e)
+            log.error(f"Error saving cache: {e}")
             return False
 
     # Функция для дампа содержания саундскрипта из итемов
-    def dump_soundscript_from_items(self) -> str:
-        items = self.items
-        out = []
-        out.append(f'// Generated by {ABOUT_TOOL_NAME}')
-        out.append(f'// {ABOUT_TOOL_DESCRIPTION}')
-        out.append(f'// {ABOUT_TOOL_AUTHOR}')
-        out.append(f'// {ABOUT_TOOL_REQUESTED}')
-        out.append(f'// {ABOUT_TOOL_LINK}')
-        out.append(f'// {ABOUT_TOOL_DISCORD}\n')
-        for r in items:
-            out.append(f'"{r["entry_name"]}"\n{{')
-            out.append(f'\t"channel"\t\t"{r["channel"]}"')
-            if r["volume"]: out.append(f'\t"volume"\t\t"{r["volume"]}"')
-            out.append(f'\t"soundlevel"\t"{r["soundlevel"]}"')
-            if r["pitch"]: out.append(f'\t"pitch"\t\t\t"{r["pitch"]}"')
-    
-            if not r.get("sounds"):
-                out.append('\t"wave"\t\t""')
-            elif len(r["sounds"]) == 1:
-                out.append(f'\t"wave"\t\t\t"{r["sounds"][0]}"')
-            else:
-                out.append('\t"rndwave"\n\t\t{')
-                for w in r["sounds"]:
-                    out.append(f'\t\t"wave"\t"{w}"')
-                out.append('\t}')
-            out.append('}\n')
-        return "\n".join(out)
+    def dump_soundscript_from_items(self, items=None) -> str:
+        return soundscripts_core.dump_soundscript(self.items if items is None else items)
     
     # Функция для сохранения саундскрипта
-    def save_soundscript(self, same_file=False):
-        if not self.items: return
+    # then - что сделать после успешной записи (сохранение идёт в фоне, например закрыть окно).
+    # Возвращает путь, если запись началась, None - не началась (отменили диалог или порядок строк)
+    def save_soundscript(self, same_file=False, then=None):
+        if not self.items or self.busy(): return
+        # В проекте каждая нода пишется в свой файл, так что Save As некуда - всегда обычное сохранение
+        if self.project:
+            return self.soundscript_path if self.save_project(then) else None
         
         # Если у нас абсолютно новый файл и пользователь жмякает Save - надо запускать Save As логику
         if not self.soundscript_name: same_file=False
@@ -1395,134 +2421,350 @@ class App(TkinterDnD.Tk):
         scripts_folder = os.path.dirname(self.gameinfo_path) + "/scripts"
         ss_path = self.soundscript_path
         
-        print(f"ss_path: {ss_path}")
-        print(f"same_file: {same_file}")
-        print(f"self.soundscript_name: {self.soundscript_name}")
-        print(f"self.soundscript_path: {self.soundscript_path}")
+        log.debug(f"save_soundscript, ss_path: {ss_path}, same_file: {same_file}, soundscript_name: {self.soundscript_name}")
         
         if not same_file:
             ss_name = self.soundscript_name if self.soundscript_name else self.project_name.split()[0].lower() + "_" + "soundscript"
-            print(f"ss_name: {ss_name}")
+            log.debug(f"ss_name: {ss_name}")
             ss_path = self.save_file_dialog(title = "Save Soundscript", filter_str = "Text (*.txt);;All (*)", start_dir = scripts_folder, suggested_name = ss_name, add_default_ext = True)
         
         if not ss_path: return None
-        print(f"ss_path: {ss_path}")
-        
-        soundscript_content = self.dump_soundscript_from_items()
-        print(f"soundscript_content:")
-        print(soundscript_content)
-        with open(ss_path, "w", encoding="utf-8") as f:
-            f.write(soundscript_content)
+        if not self.ask_save_order(): return None
+        log.info(f"Saving soundscript: {ss_path}")
+        
+        # Сборка текста и запись идут в фоне. Документ запоминаем как есть, чтобы при отмене или ошибке
+        # вернуть ему пометки изменённых нод - иначе следующее сохранение их бы пропустило
+        document = self.document
+        state = document.snapshot() if document else None
+        items = list(self.items)
+        # Пока текст собирается, правки ждут; пока он пишется на диск - уже можно, они копятся тут и в журнале
+        self.save_dirty = []
+        mark = self.autosave.count()
+        def restore():
+            if document:
+                document.restore(state)
+                for item in self.save_dirty: document.mark_dirty(item)
+            self.save_dirty = None
+        def on_error(e):
+            restore()
+            messagebox.showerror("ERROR", f"Failed to save {ss_path}!\n\n{e}")
+        self.start_job(
+            "Saving", self.save_job, document, items, ss_path, self.save_backups,
+            on_done=lambda new_document: self.on_soundscript_saved(ss_path, new_document, then, len(items), mark),
+            on_cancel=restore, on_error=on_error,
+        )
+        return ss_path
+
+    # Таблица отсортирована - спрашиваем, в каком порядке писать ноды. False - сохранение отменили
+    def ask_save_order(self) -> bool:
+        if self.sort_field is None: return True
+        answer = messagebox.askyesnocancel(
+            "Save order",
+            f"The table is sorted by {HEADERS[FIELD_COLUMNS[self.sort_field]]}.\n\n" +
+            "Yes - save entries in the sorted order\nNo - keep the original order"
+        )
+        if answer is None: return False
+        if answer: self.apply_sort_order()
+        return True
+
+    # Фоновая часть сохранения: собрать текст и записать его во временный файл рядом, который в конце
+    # подменяет настоящий - отменённое на середине сохранение не оставляет полузаписанный файл
+    @staticmethod
+    def save_job(job, document, items, ss_path, backups=0):
+        # Если файл был открыт - нетронутые ноды, комментарии и неизвестные ключи копируются как есть
+        if document:
+            soundscript_content = document.render(items)
+            if soundscripts_log.tracing(): log.log(TRACE, f"soundscript_content:\n{soundscript_content}")
+            # Текст собран, ноды больше не читаем - дальше только диск, таблицу можно править
+            job.edits_allowed = True
+            size = len(soundscript_content)
+            chunks = (soundscript_content[pos:pos + SAVE_CHUNK_SIZE] for pos in range(0, size, SAVE_CHUNK_SIZE))
+            soundscripts_core.write_text_atomic(ss_path, chunks, backups, progress=lambda done: job.set_progress(done, size))
+            return document
+        # Иначе пишем весь файл с нуля (переводы строк как у системы, как раньше) - кусками прямо в файл,
+        # не собирая весь текст в памяти. Ноды читаются до конца записи, так что правки ждут её
+        def chunks():
+            for batch, chunk in enumerate(soundscripts_core.iter_dump_soundscript(items, os.linesep)):
+                job.set_progress(batch * soundscripts_core.DUMP_BATCH, len(items))
+                yield chunk
+        soundscripts_core.write_text_atomic(ss_path, chunks(), backups)
+        # Следующие сохранения этого файла уже будут точечными: документ из того, что реально легло на диск
+        with open(ss_path, "r", encoding="utf-8", newline="") as f: soundscript_content = f.read()
+        if soundscripts_log.tracing(): log.log(TRACE, f"soundscript_content:\n{soundscript_content}")
+        return soundscripts_core.SoundscriptDocument(soundscript_content, items)
+
+    # Главный поток: файл записан. entries и mark - сколько нод ушло в файл и с какой записи журнала
+    # автосохранения начались правки, сделанные пока он писался
+    def on_soundscript_saved(self, ss_path, document, then=None, entries=None, mark=None):
+        self.document = document
         self.soundscript_name = os.path.basename(ss_path)
         self.soundscript_path = ss_path
+        self.finish_save(f"{self.soundscript_name} successfully saved!", then, entries, mark)
+
+    # Общий конец сохранения файла или проекта (главный поток)
+    def finish_save(self, message, then=None, entries=None, mark=None):
+        edited = mark is not None and self.autosave.count() > mark
+        # Правки во время записи в файл не попали - их ноды остаются изменёнными для следующего сохранения
+        dirty, self.save_dirty = self.save_dirty or [], None
+        for item in dirty: self.mark_dirty(item)
+        self.reset_autosave(entries, mark) # всё на диске - журнал правок начинается заново
+        self.soundscript_saved = not edited
+        self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name}{'*' if edited else ''}")
+        self.save_cache() # Сохраняемся
+        if edited:
+            # Например закрытие окна после сохранения - новые правки ещё не на диске, так что не закрываемся
+            self.status_var.set(f"{self.soundscript_name} saved, changes made while saving are not saved yet.")
+            return
+        self.status_var.set(message)
+        if then: then()
+
+    # Метод для открытия проекта: манифест звуков рядом с gameinfo.txt
+    def open_project_dialog(self):
+        if self.busy(): return
+        if self.items and not self.soundscript_saved:
+            if not messagebox.askokcancel("WARNING", "Are you sure you want to open the project?\nUnsaved progress will be lost!"): return
+        manifest = soundscripts_core.manifest_path(self.gameinfo_path)
+        if not os.path.exists(manifest):
+            messagebox.showwarning("WARNING", f"{manifest} is not found!")
+            return
+        self.open_project(manifest)
+
+    # Функция для открытия проекта: все скрипты из манифеста читаются и разбираются в фоне (сами - в пуле процессов)
+    def open_project(self, manifest, then=None, on_error=None):
+        if self.busy(): return
+        self.start_job(
+            "Opening project", self.open_project_job, manifest,
+            on_done=lambda result: self.on_project_opened(manifest, *result, then),
+            on_error=on_error or (lambda e: self.status_var.set(f"Error reading project {manifest}: {e}")),
+        )
+
+    @staticmethod
+    def open_project_job(job, manifest):
+        started = time.perf_counter()
+        project, errors = soundscripts_core.SoundscriptProject.load(manifest, progress=job.set_progress)
+        log.info(f"Opened project {manifest}: {len(project.paths)} files, {len(project.items)} entries in {time.perf_counter() - started:.2f}s")
+        return project, errors
+
+    # Главный поток: проект разобран
+    def on_project_opened(self, manifest, project, errors, then=None):
+        self.soundscript_path = manifest
+        self.soundscript_name = f"{soundscripts_core.MANIFEST_NAME} ({len(project.paths)} files)"
+        self.document = None
+        self.project = project
+        self.items = list(project.items)
+        self.names.rebuild(self.items)
+        self.journal.clear()
+        self.reset_autosave()
+        self.update_table()
         self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name}")
         self.soundscript_saved = True
-        self.save_cache() # Сохраняемся
-        self.status_var.set(f"{self.soundscript_name} successfully saved!")
-        return ss_path
+        self.refresh_sound_index()
+        # Одинаковые имена в разных файлах - движок возьмёт только одну из нод, об этом надо знать
+        duplicates = project.duplicates(self.items, self.names)
+        for name, paths in duplicates.items():
+            log.warning(f'Duplicate entry "{name}" in {", ".join(paths)}')
+        for path, error in errors:
+            log.error(f"Can't read {path}: {error}")
+        self.status_var.set(f"Project: {len(project.paths)} files, {len(self.items)} entries, {len(duplicates)} names in several files")
+        if errors or duplicates:
+            lines = [f"Can't read {path}: {error}" for path, error in errors]
+            lines += [f'"{name}": {", ".join(os.path.basename(path) for path in paths)}' for name, paths in duplicates.items()]
+            messagebox.showwarning(
+                "WARNING",
+                f"{len(errors)} files are not loaded, {len(duplicates)} entry names are in several files:\n\n" +
+                "\n".join(lines[:PROJECT_REPORT_LINES]) + (f"\n... and {len(lines) - PROJECT_REPORT_LINES} more (see the log)" if len(lines) > PROJECT_REPORT_LINES else "")
+            )
+        if then: then()
+
+    # Файл проекта, в который идут новые ноды: файл первой выделенной строки, иначе первый файл манифеста
+    def project_target(self):
+        select = self.sheet.get_currently_selected()
+        if select and select[0] is not None and self.items:
+            row = self.item_index(select[0])
+            if 0 <= row < len(self.items): return self.project.owner(self.items[row])
+        return self.project.target
+
+    # Сохранение проекта: каждая нода уходит в свой файл, переписываются только файлы с изменениями.
+    # False - сохранение отменили
+    def save_project(self, then=None) -> bool:
+        if not self.ask_save_order(): return False
+        project = self.project
+        items = list(self.items)
+        state = project.snapshot()
+        self.save_dirty = []
+        mark = self.autosave.count()
+        def restore():
+            project.restore(state)
+            for item in self.save_dirty: project.mark_dirty(item)
+            self.save_dirty = None
+        def on_error(e):
+            restore()
+            messagebox.showerror("ERROR", f"Failed to save the project!\n\n{e}")
+        self.start_job(
+            "Saving project", self.save_project_job, project, items, self.save_backups,
+            on_done=lambda paths: self.finish_save(f"{len(paths)} of {len(project.paths)} project files saved!", then, len(items), mark),
+            on_cancel=restore, on_error=on_error,
+        )
+        return True
+
+    # Фоновая часть сохранения проекта: сначала собираем тексты всех изменённых файлов (правки ждут),
+    # потом пишем их по одному так же атомарно, как одиночный файл
+    @staticmethod
+    def save_project_job(job, project, items, backups=0):
+        rendered = [(path, document.render(file_items)) for path, document, file_items in project.changed(items)]
+        job.edits_allowed = True
+        total = sum(len(content) for _, content in rendered)
+        done = 0
+        for path, content in rendered:
+            log.info(f"Saving project file: {path}")
+            chunks = (content[pos:pos + SAVE_CHUNK_SIZE] for pos in range(0, len(content), SAVE_CHUNK_SIZE))
+            soundscripts_core.write_text_atomic(path, chunks, backups, progress=lambda written: job.set_progress(done + written, total))
+            done += len(content)
+        return [path for path, _ in rendered]
     
     # Функция для открытия саундскрипта
     def open_soundscript_dialog(self):
+        if self.busy(): return
         if self.items and not self.soundscript_saved:
             if not messagebox.askokcancel("WARNING", "Are you sure you want to open a script?\nUnsaved progress will be lost!"): return
         self.gameinfo_path = str(self.gameinfo_path)
         scripts_folder = os.path.dirname(self.gameinfo_path) + "/scripts"
-        self.soundscript_path = self.open_files_dialog(title="Open soundscript", filter_str="Text (*.txt);;All (*)", start_dir = scripts_folder, multi=False)
-        if not self.soundscript_path: return
-        self.soundscript_path = self.soundscript_path[0]
-        self.open_soundscript()
+        soundscript_path = self.open_files_dialog(title="Open soundscript", filter_str="Text (*.txt);;All (*)", start_dir = scripts_folder, multi=False)
+        if not soundscript_path: return
+        self.open_soundscript(soundscript_path[0])
         
     # Функция для открытия саундскрипта
-    def open_soundscript(self):
-        if not self.soundscript_path: return
-        self.soundscript_name = os.path.basename(self.soundscript_path) or self.soundscript_path
-        with open(self.soundscript_path, 'r', encoding='utf-8') as soundscript_file: soundscript_content = soundscript_file.read()
-        print(f"soundscript_content:")
-        print(soundscript_content)
-        try:
-            new_items = self.parse_soundscript(soundscript_content)
-            print(f"new_items:")
-            print(new_items)
-            if new_items:
-                self.items = new_items
-                self.update_table()
-                self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name}")
-                self.soundscript_saved = True
-        except Exception as e:
-            print(f"ERROR READING SOUNDSCRIPT FILE!")
-            print(e)
+    # Чтение и разбор идут в фоне, текущий скрипт заменяется только когда новый разобран целиком
+    def open_soundscript(self, soundscript_path, then=None, on_error=None):
+        if not soundscript_path or self.busy(): return
+        # Манифест звуков мода открывается как проект (все его скрипты сразу)
+        if os.path.basename(soundscript_path).lower() == soundscripts_core.MANIFEST_NAME:
+            self.open_project(soundscript_path, then, on_error)
             return
+        self.start_job(
+            "Opening", self.open_job, soundscript_path, self.parse_cache,
+            on_done=lambda document: self.on_soundscript_opened(soundscript_path, document, then),
+            on_error=on_error or (lambda e: self.status_var.set(f"Error reading soundscript file: {e}")),
+        )
 
-    # Функция для чтения саундскрипта
-    def parse_soundscript(self, text) -> List[Dict[str, Any]]:
-        items = []
-        # Регулярка для нахождения каждого блока
-        block_pattern = re.compile(r'"([^"]+)"\s*\{([^}]*)\}', re.DOTALL)
-    
-        for match in block_pattern.finditer(text):
-            entry_name = match.group(1)
-            body = match.group(2)
-    
-            item: Dict[str, Any] = {
-                "entry_name": entry_name,
-                "channel": "",
-                "volume": "",
-                "soundlevel": "",
-                "pitch": "",
-                "sounds": []
-            }
-    
-            # Проверка на rndwave
-            if "rndwave" in body:
-                # находим все wave внутри rndwave
-                rnd_pattern = re.compile(r'"wave"\s+"([^"]+)"')
-                item["sounds"] = rnd_pattern.findall(body)
-            else:
-                wave_match = re.search(r'"wave"\s+"([^"]+)"', body)
-                if wave_match:
-                    item["sounds"] = [wave_match.group(1)]
-    
-            # остальные параметры
-            channel_match = re.search(r'"channel"\s+"([^"]+)"', body)
-            if channel_match:
-                item["channel"] = channel_match.group(1)
-    
-            volume_match = re.search(r'"volume"\s+"([^"]+)"', body)
-            if volume_match:
-                item["volume"] = volume_match.group(1)
-    
-            soundlevel_match = re.search(r'"soundlevel"\s+"([^"]+)"', body)
-            if soundlevel_match:
-                item["soundlevel"] = soundlevel_match.group(1)
-    
-            pitch_match = re.search(r'"pitch"\s+"([^"]+)"', body)
-            if pitch_match:
-                item["pitch"] = pitch_match.group(1)
-    
-            items.append(item)
-    
-        return items
+    # Фоновая часть открытия: прочитать и разобрать файл. Если этот файл уже открывали и он не менялся -
+    # ноды берутся из кэша разбора, а не из текста
+    @staticmethod
+    def open_job(job, soundscript_path, parse_cache=None):
+        started = time.perf_counter()
+        # Байты как есть (переводы строк не трогаем) - чтобы при сохранении нетронутые куски файла совпадали байт в байт
+        with open(soundscript_path, 'rb') as soundscript_file:
+            mtime_ns = os.fstat(soundscript_file.fileno()).st_mtime_ns
+            data = soundscript_file.read()
+        soundscript_content = data.decode('utf-8')
+        log.info(f"Opening soundscript: {soundscript_path} ({len(soundscript_content)} chars)")
+        if soundscripts_log.tracing(): log.log(TRACE, f"soundscript_content:\n{soundscript_content}")
+        job.check()
+        entries = parse_cache.load(soundscript_path, data, mtime_ns) if parse_cache else None
+        if entries is not None:
+            document = soundscripts_core.SoundscriptDocument(soundscript_content, entries=entries)
+            log.info(f"Loaded {len(document.items)} entries from the parse cache in {(time.perf_counter() - started) * 1000:.1f} ms")
+        else:
+            document = soundscripts_core.SoundscriptDocument(soundscript_content, progress=job.set_progress)
+            log.info(f"Parsed {len(document.items)} entries in {(time.perf_counter() - started) * 1000:.1f} ms")
+            entries = [(item, *document.spans[id(item)][1:]) for item in document.items]
+            if parse_cache and not parse_cache.store(soundscript_path, data, mtime_ns, entries):
+                log.warning(f"Can't store {soundscript_path} in the parse cache {parse_cache.folder}")
+        if soundscripts_log.tracing(): log.log(TRACE, f"new_items: {[item.to_dict() for item in document.items]}")
+        return document
+
+    # Главный поток: файл разобран. then() - что сделать после (восстановление правок после падения)
+    def on_soundscript_opened(self, soundscript_path, document, then=None):
+        new_items = list(document.items)
+        if not new_items and not then:
+            self.status_var.set(f"No entries found in {os.path.basename(soundscript_path)}!")
+            return
+        self.soundscript_path = soundscript_path
+        self.soundscript_name = os.path.basename(soundscript_path) or soundscript_path
+        self.document = document
+        self.project = None
+        self.items = new_items
+        self.names.rebuild(self.items)
+        self.journal.clear()
+        self.reset_autosave()
+        self.update_table()
+        self.title(f"{ABOUT_TOOL_NAME} | {self.project_name} - {self.soundscript_name}")
+        self.soundscript_saved = True
+        self.refresh_sound_index()
+        if then: then()
+
+    # Метод для запуска фоновой задачи: в статусной строке прогресс и кнопка Cancel, пока задача идёт
+    def start_job(self, name, func, *args, on_done=None, on_error=None, on_cancel=None):
+        def finish(callback, status):
+            def handler(*result):
+                self.job = None
+                self.btn_cancel_job.pack_forget()
+                if status: self.status_var.set(status)
+                if callback: callback(*result)
+            return handler
+        self.job = self.jobs.submit(
+            name, func, *args,
+            on_done=finish(on_done, None),
+            on_error=finish(on_error, f"{name} failed!"),
+            on_cancel=finish(on_cancel, f"{name} cancelled."),
+            on_progress=self.show_job_progress,
+        )
+        self.btn_cancel_job.pack(side=tk.RIGHT, padx=2, pady=2)
+        self.status_var.set(f"{name}...")
+
+    # Метод для показа прогресса фоновой задачи
+    def show_job_progress(self, job):
+        percent = job.percent()
+        self.status_var.set(f"{job.name}... {percent}%" if percent is not None else f"{job.name}...")
+
+    # Метод для кнопки Cancel
+    def cancel_job(self):
+        if self.job:
+            self.job.cancel()
+            self.status_var.set(f"Cancelling {self.job.name.lower()}...")
+
+    # Занято ли приложение фоновой задачей (тогда правки и файловые операции ждут).
+    # edits=True - проверка перед правкой таблицы: их можно, если задача уже не читает ноды (сохранение пишет файл)
+    def busy(self, edits=False) -> bool:
+        if not self.job: return False
+        if edits and self.job.edits_allowed: return False
+        self.status_var.set(f"{self.job.name} is in progress, wait or press Cancel.")
+        return True
 
     # Метод для отслеживания закрытия окна приложения
     def on_closing(self):
+        if self.job:
+            messagebox.showwarning("WARNING", f"{self.job.name} is in progress!\nWait until it finishes or press Cancel.")
+            return
         if not self.soundscript_saved:
             answer = messagebox.askyesnocancel(
                 "Unsaved changes",
                 "You have unsaved changes! \nWould you like to save before exiting?"
             )
-            if answer:  # Да, сохраняем
-                self.save_soundscript(same_file=True)
-                self.save_cache() # Сохраняемся
-                self.destroy()
+            if answer:  # Да, сохраняем (в фоне, окно закроется после записи)
+                # Сохранение не началось (отменили диалог) - остаёмся, журнал правок на случай падения не трогаем
+                if not self.save_soundscript(same_file=True, then=self.close_app):
+                    self.save_cache() # Сохраняемся
+                    self.status_var.set("Not saved, the window stays open.")
             elif answer is False:  # Нет, выходим без сохранения
-                self.save_cache() # Сохраняемся
-                self.destroy()
+                self.close_app()
             else:  # Отмена - остаёмся в приложении
                 self.save_cache() # Сохраняемся
                 return
         else:
-            self.save_cache() # Сохраняемся
-            self.destroy()
+            self.close_app()
+
+    # Метод для закрытия окна
+    def close_app(self):
+        self.save_cache() # Сохраняемся
+        # Сюда попадаем только после записи на диск или явного "Нет" - журнал на случай падения больше не нужен
+        if self.autosave_after: self.after_cancel(self.autosave_after)
+        self.autosave.discard()
+        self.jobs.shutdown()
+        self.background.shutdown()
+        if self.preview_after: self.after_cancel(self.preview_after)
+        if self.player: self.player.shutdown()
+        self.destroy()
 
 # Класс диалогового окна для редактирования csvp
 class ChoiceDialog(tk.Toplevel):
@@ -1634,6 +2876,17 @@ class SoundsListEdit(tk.Toplevel):
         button_frame_2 = tk.Frame(self)
         button_frame_2.pack(pady=10)
         
+        # Поле для ввода пути звука руками: Tab дописывает путь по индексу папки sound
+        path_frame = tk.Frame(self)
+        path_frame.pack(padx=10, fill="x")
+        self.path_entry = tk.Entry(path_frame, width=40)
+        self.path_entry.pack(side="left", fill="x", expand=True)
+        self.path_entry.bind("<Tab>", self.complete_path)
+        self.path_entry.bind("<Return>", self.add_typed_path)
+        tk.Button(path_frame, text=" Add Path ", command=self.add_typed_path).pack(side="left", padx=5)
+        self.path_hint = tk.Label(self, text="Type a path inside sound/ and press Tab to complete it", anchor="w")
+        self.path_hint.pack(padx=10, fill="x")
+
         add_sounds_btn = tk.Button(button_frame_1, text="      Add Sounds\t", command=self.add_files).pack(side="left", padx=5)
         
         remove_sounds_btn = tk.Button(button_frame_1, text="  Remove Sounds\t", command=self.remove_selected).pack(side="left", padx=5)
@@ -1674,51 +2927,25 @@ class SoundsListEdit(tk.Toplevel):
 
     # Метод для добавления новых звуков в список
     def add_files(self):
-        print(f"SoundsListEdit add_files")
-        
         # Выбираем WAV файлы
         sound_folder = os.path.dirname(self.parent.gameinfo_path) + "/sound"
-        print(f"sound_folder: {sound_folder}")
+        log.debug(f"SoundsListEdit add_files, sound_folder: {sound_folder}")
         sound_files = self.parent.open_files_dialog(title="Open WAV files", filter_str="Sounds (*.wav);;All (*)", start_dir = sound_folder, multi=True)
-        print(f"sound_files: {sound_files}")
+        log.debug(f"sound_files: {sound_files}")
         if not sound_files: return
         
         # Отбираем хорошее от плохого
         new_sounds = []
-        bad_paths = []
         already_in_list = []
-        for path in sound_files:
-            # Добавление пути файла в список звуков
-            # Функция чтобы преобразовывать абсолютный путь файла в относительный путь
-            try:
-                # Проверяем, начинается ли path с папки с гейминфо
-                if os.path.commonpath([self.parent.gameinfo_folder, os.path.normcase(path)]) == self.parent.gameinfo_folder:
-                    try:
-                        relative = os.path.relpath(path, start=self.parent.gameinfo_folder)
-                        parts = relative.split(os.sep)
-            
-                        if parts[0].lower() == "sound":
-                            # Всё, что справа от "sound"
-                            path_rel = "/".join(parts[1:])
-                            if path_rel not in list(self.sounds_list.get(0, tk.END)):
-                                new_sounds.append(path_rel)
-                            else:
-                                already_in_list.append(path_rel)
-                        else:
-                            bad_paths.append(path)
-                            continue
-                    except ValueError:
-                        bad_paths.append(path)
-                        continue
-                else:
-                    bad_paths.append(path)
-                    continue
-            except Exception:
-                bad_paths.append(path)
-                continue
-        print(f"new_sounds: {new_sounds}")
-        print(f"bad_paths: {bad_paths}")
-        print(f"already_in_list: {already_in_list}")
+        current = set(self.sounds_list.get(0, tk.END))
+        resolved, bad_paths = soundscripts_core.resolve_sound_files(sound_files, self.parent.gameinfo_folder)
+        for _, path_rel in resolved:
+            if path_rel not in current:
+                new_sounds.append(path_rel)
+                current.add(path_rel)
+            else:
+                already_in_list.append(path_rel)
+        log.debug(f"new_sounds: {new_sounds}, bad_paths: {bad_paths}, already_in_list: {already_in_list}")
         
         # Добавляем новые звуки к текущему списку
         for new_sound in new_sounds: self.sounds_list.insert(tk.END, new_sound)
@@ -1729,6 +2956,42 @@ class SoundsListEdit(tk.Toplevel):
         # self.output_name_entry.insert(0, self.output_name)
         # pass
 
+    # Метод для автодополнения пути по индексу звуков проекта (Tab)
+    def complete_path(self, event=None):
+        index = self.parent.sound_index
+        if index is None:
+            self.path_hint.config(text="Sound index is not ready yet...")
+            return "break"
+        typed = self.path_entry.get().strip()
+        matches = index.complete(typed)
+        if not matches:
+            self.path_hint.config(text="No matching sounds")
+            return "break"
+        # Дописываем до общего начала всех вариантов (как в консоли)
+        common = os.path.commonprefix([match.lower() for match in matches])
+        completion = matches[0][:len(common)] if len(common) > len(typed) else typed
+        self.path_entry.delete(0, tk.END)
+        self.path_entry.insert(0, completion)
+        shown = ", ".join(match.rsplit("/", 1)[-1] for match in matches[:5])
+        more = "..." if len(matches) > 5 else ""
+        self.path_hint.config(text=f"{len(matches)}{'+' if len(matches) >= 100 else ''} matches: {shown}{more}")
+        return "break"
+
+    # Метод для добавления введённого руками пути
+    def add_typed_path(self, event=None):
+        path = self.path_entry.get().strip().replace("\\", "/")
+        if not path: return "break"
+        if path in self.sounds_list.get(0, tk.END):
+            self.path_hint.config(text=f"Already in the list: {path}")
+            return "break"
+        if self.parent.sound_exists(path) is False:
+            if not messagebox.askyesno("Warning", f"There is no such file in the sound folder:\n{path}\n\nAdd it anyway?", parent=self):
+                return "break"
+        self.sounds_list.insert(tk.END, path)
+        self.path_entry.delete(0, tk.END)
+        self.path_hint.config(text=f"Added: {path}")
+        return "break"
+
     def remove_selected(self, event=None):
         selected_indices = self.sounds_list.curselection()
         for index in reversed(selected_indices):
@@ -1739,14 +3002,8 @@ class SoundsListEdit(tk.Toplevel):
         return "break"  # чтобы не влияло на другие виджеты
 
     def on_ok(self):
-        print(f"SoundsListEdit on_ok")
-        print(f"self.sounds:")
-        for old_sound in self.sounds:
-            print(f"\t{old_sound}")
         redacted_sounds = list(self.sounds_list.get(0, tk.END))
-        print(f"redacted_sounds:")
-        for new_sound in redacted_sounds:
-            print(f"\t{new_sound}")
+        log.debug(f"SoundsListEdit on_ok, sounds: {list(self.sounds)} -> {redacted_sounds}")
         if not redacted_sounds:
             messagebox.showerror("ERROR", f"There must be at least one sound in the list!")
             return
@@ -1914,6 +3171,9 @@ class AboutWindow(tk.Toplevel):
         self.destroy()
 
 def main():
+    # -v/-vv/-vvv, --log-level, --log-file
+    sys.argv[1:] = soundscripts_log.parse_cli_args(sys.argv[1:])
+    soundscripts_log.configure()
     app = App()
     setup_icons(app)
     app.mainloop()
@@ -1924,9 +3184,9 @@ try:
 except Exception as e:
     import traceback
     # from tkinter import messagebox
-    print(f"An error occurred: {e}")
+    log.critical(f"An error occurred: {e}")
     traceback_error = traceback.format_exc()
-    print(traceback_error)
+    log.critical(traceback_error)
     messagebox.showerror("ERROR", f"{traceback_error}")
     # input("\nPress Enter to exit...")
 finally:
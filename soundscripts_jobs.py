@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from soundscripts_log import log
+
+# Фоновые задачи для долгих операций (открытие, импорт, сохранение), чтобы окно не уходило в "Не отвечает".
+# Работа идёт в пуле потоков, а результат, прогресс и ошибки возвращаются в главный поток через after() -
+# ткинтер трогать можно только оттуда. Сам модуль от ткинтера не зависит: ему передаётся функция планирования.
+
+JOB_WORKERS = 1 # задачи пользователя (открытие, импорт, сохранение) идут по одной - больше одного потока им не нужно
+BACKGROUND_WORKERS = 3 # фоновая работа без блокировки окна (индекс папки sound, заголовки WAV, миниатюры волны) - по потоку
+                       # на каждую, у каждой не больше одной задачи за раз. Отдельный пул, чтобы Save не ждал их в очереди
+JOB_POLL_MS = 50 # как часто главный поток проверяет прогресс и завершение задач
+
+# Исключение которым задача прерывается при отмене (кидается из Job.check)
+class JobCancelled(Exception):
+    pass
+
+# Одна фоновая задача: флаг отмены и прогресс, которые видны обоим потокам
+class Job:
+    def __init__(self, name, on_done=None, on_error=None, on_cancel=None, on_progress=None):
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.on_progress = on_progress
+        self.done = 0
+        self.total = 0
+        self.future = None
+        self.edits_allowed = False # задача больше не читает данные главного потока - правки уже можно (например запись на диск)
+        self._cancel = threading.Event()
+        self._reported = None
+
+    # Попросить задачу остановиться (сама она остановится на ближайшем check)
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    # Вызывается из рабочего потока: прервать работу если нажали Cancel
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+
+    # Вызывается из рабочего потока: сколько сделано из скольких (заодно точка отмены)
+    def set_progress(self, done, total):
+        self.done = done
+        self.total = total
+        self.check()
+
+    # Прогресс в процентах, None - неизвестно
+    def percent(self):
+        if not self.total: return None
+        return min(100, int(self.done * 100 / self.total))
+
+# Пул фоновых задач. schedule - функция вида widget.after(ms, callback)
+class JobRunner:
+    def __init__(self, schedule, workers=JOB_WORKERS, poll_ms=JOB_POLL_MS):
+        self.schedule = schedule
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="soundscripts_job")
+        self.jobs = []
+        self._polling = False
+
+    # Есть ли незавершённые задачи
+    @property
+    def busy(self) -> bool:
+        return bool(self.jobs)
+
+    # Запустить func(job, *args) в фоне. Колбэки вызываются в главном потоке:
+    # on_done(result), on_error(exception), on_cancel(), on_progress(job)
+    def submit(self, name, func, *args, on_done=None, on_error=None, on_cancel=None, on_progress=None) -> Job:
+        job = Job(name, on_done, on_error, on_cancel, on_progress)
+        job.future = self.executor.submit(func, job, *args)
+        self.jobs.append(job)
+        log.debug(f"Job started: {name}")
+        if not self._polling:
+            self._polling = True
+            self.schedule(self.poll_ms, self._poll)
+        return job
+
+    # Отменить все задачи
+    def cancel_all(self):
+        for job in self.jobs: job.cancel()
+
+    # Главный поток: раздаём прогресс и результаты завершённых задач
+    def _poll(self):
+        for job in list(self.jobs):
+            if not job.future.done():
+                state = (job.done, job.total)
+                if job.on_progress and state != job._reported:
+                    job._reported = state
+                    job.on_progress(job)
+                continue
+            self.jobs.remove(job)
+            try:
+                result = job.future.result()
+            except JobCancelled:
+                log.info(f"Job cancelled: {job.name}")
+                if job.on_cancel: job.on_cancel()
+            except Exception as e:
+                log.error(f"Job failed: {job.name}: {e}", exc_info=e)
+                if job.on_error: job.on_error(e)
+            else:
+                log.debug(f"Job finished: {job.name}")
+                if job.on_done: job.on_done(result)
+        if self.jobs:
+            self.schedule(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    # Остановить пул (при закрытии окна): незапущенные задачи выкидываются, запущенные просим прерваться
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,111 @@
+import os
+import sys
+import logging
+from collections import deque
+
+# Логгер редактора: уровни, кольцевой буфер последних сообщений и необязательный лог-файл.
+# Без настройки в консоль идут только предупреждения и ошибки, горячие пути (таблица, открытие, сохранение)
+# пишут только на уровне TRACE и только под проверкой tracing(), чтобы даже не собирать строки зря.
+
+TRACE = 5 # ниже DEBUG - подробный вывод по каждой ноде/строке таблицы
+logging.addLevelName(TRACE, "TRACE")
+
+LOG_LEVELS = {"trace": TRACE, "debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+DEFAULT_LOG_LEVEL = "warning"
+RING_BUFFER_SIZE = 1000 # сколько последних сообщений держим в памяти
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(message)s"
+LOG_DATE_FORMAT = "%H:%M:%S"
+
+log = logging.getLogger("soundscripts_editor")
+log.propagate = False
+
+# Хэндлер который просто складывает отформатированные сообщения в deque ограниченного размера
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        super().__init__(level=TRACE)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        try:
+            self.records.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    # Метод для получения последних сообщений (например чтобы показать их в окне ошибки)
+    def lines(self, count=None):
+        records = list(self.records)
+        return records if count is None else records[-count:]
+
+ring_buffer = RingBufferHandler()
+ring_buffer.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+console_handler = logging.StreamHandler(sys.stderr)
+console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+file_handler = None
+log.addHandler(ring_buffer)
+log.addHandler(console_handler)
+
+# Что пришло из командной строки - у него приоритет над кэшем
+cli_level = None
+cli_log_file = None
+
+# Функция для перевода названия уровня ("debug", "TRACE", "10") в число, неизвестное -> None
+def level_from_name(name):
+    if name is None: return None
+    if isinstance(name, int): return name
+    name = str(name).strip().lower()
+    if name.isdigit(): return int(name)
+    return LOG_LEVELS.get(name)
+
+# Функция для настройки логгера. Уровень и файл из командной строки перекрывают переданные сюда (из кэша)
+def configure(level=None, log_file=None):
+    global file_handler
+    level = level_from_name(cli_level if cli_level is not None else level)
+    if level is None: level = LOG_LEVELS[DEFAULT_LOG_LEVEL]
+    log.setLevel(level)
+    # В консоль и буфер пишем всё что пропустил сам логгер
+    console_handler.setLevel(level)
+
+    log_file = cli_log_file if cli_log_file is not None else log_file
+    current = file_handler.baseFilename if file_handler else None
+    wanted = os.path.abspath(log_file) if log_file else None
+    if current == wanted: return
+    if file_handler:
+        log.removeHandler(file_handler)
+        file_handler.close()
+        file_handler = None
+    if wanted:
+        try:
+            file_handler = logging.FileHandler(wanted, encoding="utf-8")
+        except OSError as e:
+            log.warning(f"Can't open log file {wanted}: {e}")
+            return
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT, "%Y-%m-%d %H:%M:%S"))
+        log.addHandler(file_handler)
+
+# Функция для разбора флагов логирования из argv: -v (info), -vv (debug), -vvv (trace), --log-level X, --log-file X.
+# Возвращает argv без этих флагов
+def parse_cli_args(argv):
+    global cli_level, cli_log_file
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-v", "-vv", "-vvv"):
+            cli_level = ("info", "debug", "trace")[len(arg) - 2]
+        elif arg == "--log-level" or arg.startswith("--log-level="):
+            value = arg.split("=", 1)[1] if "=" in arg else next(args, None)
+            if level_from_name(value) is None:
+                log.warning(f"Unknown log level: {value}")
+            else:
+                cli_level = value
+        elif arg == "--log-file" or arg.startswith("--log-file="):
+            cli_log_file = arg.split("=", 1)[1] if "=" in arg else next(args, None)
+        else:
+            rest.append(arg)
+    return rest
+
+# Функция для проверки включена ли трассировка - ей оборачиваются подробные выводы в горячих местах
+def tracing():
+    return log.isEnabledFor(TRACE)
+
+def trace(msg, *args):
+    if log.isEnabledFor(TRACE): log.log(TRACE, msg, *args)
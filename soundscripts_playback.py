@@ -0,0 +1,350 @@
+import os
+import sys
+import time
+import wave
+import random
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+import soundscripts_core
+import soundscripts_audio
+from soundscripts_log import log
+
+# Прослушивание звуков прямо в редакторе: декодированные звуки держатся в LRU по памяти, движок в своём потоке
+# применяет volume и pitch ноды и отдаёт звук блоками в вывод. Вывод подключаемый: sounddevice (поток, низкая
+# задержка), winsound (Windows, без библиотек), файл WAV или никуда - последние два для машин без звука и для
+# проверок. Время до первого сэмпла меряется на каждый запуск. Окна тут нет, нужен NumPy (как и для анализа)
+
+PREVIEW_CACHE_BYTES = 64 << 20 # сколько памяти под декодированные звуки (float32), озвучка - это сотни реплик
+PREVIEW_BLOCK_FRAMES = 1024 # сколько кадров отдаём выводу за раз (~23 мс на 44.1 кГц - это и шаг реакции на стоп)
+PREVIEW_STOP_TIMEOUT = 0.5 # сколько shutdown ждёт остановки звука
+PREVIEW_LATENCY = "low" # задержка потока sounddevice
+PITCH_MIN = 1.0 # pitch в движке - от 1 до 255 процентов
+PITCH_MAX = 255.0
+OUTPUT_NAMES = ("auto", "sounddevice", "winsound", "null") # или путь к .wav - тогда вывод в файл
+
+# Число из значения volume/pitch ноды: "0.8", "VOL_NORM", "PITCH_HIGH", диапазон "95, 105" - случайное
+# между краями (как в движке). Пусто или не число - default
+def pick_value(value: str, default: float, rnd=random) -> float:
+    numbers = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        if not part: continue
+        number = soundscripts_core.SORT_NAMED_VALUES.get(part)
+        if number is None:
+            try:
+                number = float(part)
+            except ValueError:
+                return default
+        numbers.append(float(number))
+    if not numbers or len(numbers) > 2: return default
+    return rnd.uniform(min(numbers), max(numbers))
+
+# Громкость и pitch ноды для одного проигрывания: (множитель, pitch в процентах)
+def entry_gain_pitch(volume: str, pitch: str, rnd=random) -> Tuple[float, float]:
+    gain = max(0.0, min(1.0, pick_value(volume, 1.0, rnd)))
+    return gain, max(PITCH_MIN, min(PITCH_MAX, pick_value(pitch, 100.0, rnd)))
+
+# Блоки звука для вывода: громкость и pitch применяются по ходу, блок за блоком - первый блок готов сразу,
+# не дожидаясь обработки всего файла. Pitch как в движке - вместе со скоростью (линейная интерполяция)
+def stream_blocks(samples, gain=1.0, pitch=100.0, block_frames=PREVIEW_BLOCK_FRAMES):
+    np = soundscripts_audio.np
+    frames = len(samples)
+    step = pitch / 100
+    if step == 1:
+        for start in range(0, frames, block_frames):
+            block = samples[start:start + block_frames]
+            yield block * np.float32(gain) if gain != 1 else block
+        return
+    total = int((frames - 1) / step) + 1 if frames else 0
+    for start in range(0, total, block_frames):
+        positions = np.arange(start, min(total, start + block_frames), dtype=np.float64) * step
+        left = positions.astype(np.intp)
+        right = np.minimum(left + 1, frames - 1)
+        fraction = (positions - left).astype(np.float32)[:, None]
+        block = samples[left] * (1 - fraction) + samples[right] * fraction
+        yield block * np.float32(gain) if gain != 1 else block
+
+# Декодированные звуки в памяти: LRU на max_bytes, запись проверяется по размеру и mtime самого файла
+# (os.stat перед каждым звуком - перезаписанный на месте файл не играет старое). Доступ из нескольких потоков
+class DecodedBufferCache:
+    def __init__(self, max_bytes=PREVIEW_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.buffers = OrderedDict() # путь -> (размер, mtime_ns, сэмплы, частота)
+        self._lock = threading.Lock()
+
+    # (сэмплы, частота, был ли в кэше). Файл не читается - OSError/ValueError
+    def get(self, path):
+        st = os.stat(path)
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+        with self._lock:
+            record = self.buffers.get(path)
+            if record is not None and record[0] == size and record[1] == mtime_ns:
+                self.buffers.move_to_end(path)
+                return record[2], record[3], True
+        samples, rate = soundscripts_audio.read_wav_samples(path)
+        with self._lock:
+            old = self.buffers.pop(path, None)
+            if old is not None: self.bytes -= old[2].nbytes
+            # Звук больше всего кэша не держим - он бы выкинул всё остальное
+            if samples.nbytes <= self.max_bytes:
+                self.buffers[path] = (size, mtime_ns, samples, rate)
+                self.bytes += samples.nbytes
+                while self.bytes > self.max_bytes:
+                    _, evicted = self.buffers.popitem(last=False)
+                    self.bytes -= evicted[2].nbytes
+        return samples, rate, False
+
+    def clear(self):
+        with self._lock:
+            self.buffers.clear()
+            self.bytes = 0
+
+# Вывод звука. open(частота, каналы) перед звуком, write(блок float32 кадры x каналы) - блокирует пока
+# блок не принят, close(abort) после звука (abort - звук остановили, остаток не доигрывать), interrupt() - из другого
+# потока прервать зависший write, shutdown() - при закрытии. streaming = False - вывод получает весь звук одним блоком
+class NullOutput:
+    name = "null"
+    streaming = True
+
+    # realtime - принимать блоки с их настоящей длительностью, как звуковая карта (иначе мгновенно)
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.rate = 0
+        self.frames = 0
+        self.blocks = 0
+
+    def open(self, rate, channels):
+        self.rate = rate
+        self.frames = 0
+        self.blocks = 0
+
+    def write(self, block):
+        self.frames += len(block)
+        self.blocks += 1
+        if self.realtime: time.sleep(len(block) / self.rate)
+
+    def close(self, abort=False):
+        pass
+
+    def interrupt(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+# Вывод в файл WAV 16 бит: что прозвучало бы последним (файл перезаписывается на каждый звук)
+class FileSinkOutput:
+    name = "file"
+    streaming = True
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def open(self, rate, channels):
+        self.file = wave.open(self.path, "wb")
+        self.file.setnchannels(channels)
+        self.file.setsampwidth(2)
+        self.file.setframerate(rate)
+
+    def write(self, block):
+        np = soundscripts_audio.np
+        self.file.writeframes((np.clip(block, -1, 32767 / 32768) * 32768).astype("<i2").tobytes())
+
+    def close(self, abort=False):
+        if self.file is not None: self.file.close()
+        self.file = None
+
+    def interrupt(self):
+        pass
+
+    def shutdown(self):
+        self.close()
+
+# Вывод через sounddevice (PortAudio): блоки пишутся в открытый поток. Поток не закрывается между звуками
+# того же формата - открытие устройства стоит десятки миллисекунд, а это и есть задержка до первого сэмпла
+class SoundDeviceOutput:
+    name = "sounddevice"
+    streaming = True
+
+    def __init__(self, latency=PREVIEW_LATENCY):
+        import sounddevice
+        self.sounddevice = sounddevice
+        self.latency = latency
+        self.stream = None
+        self.format = None
+
+    def open(self, rate, channels):
+        if self.stream is not None and self.format != (rate, channels):
+            self.stream.close()
+            self.stream = None
+        if self.stream is None:
+            self.stream = self.sounddevice.OutputStream(samplerate=rate, channels=channels, dtype="float32", latency=self.latency)
+            self.format = (rate, channels)
+        if not self.stream.active: self.stream.start()
+
+    def write(self, block):
+        self.stream.write(soundscripts_audio.np.ascontiguousarray(block, dtype="float32"))
+
+    # Остаток доигрывается сам - поток остаётся открытым. При стопе буфер сбрасывается
+    def close(self, abort=False):
+        if abort and self.stream is not None: self.stream.abort()
+
+    def interrupt(self):
+        pass
+
+    def shutdown(self):
+        if self.stream is not None: self.stream.close()
+        self.stream = None
+
+# Вывод через winsound (есть в Windows без библиотек): звук из памяти играется только целиком и синхронно,
+# поэтому весь звук одним блоком, а стоп - PlaySound(None) из другого потока
+class WinsoundOutput:
+    name = "winsound"
+    streaming = False
+
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+        self.rate = 0
+        self.channels = 0
+
+    def open(self, rate, channels):
+        self.rate = rate
+        self.channels = channels
+
+    def write(self, block):
+        np = soundscripts_audio.np
+        data = (np.clip(block, -1, 32767 / 32768) * 32768).astype("<i2").tobytes()
+        fmt = (1).to_bytes(2, "little") + self.channels.to_bytes(2, "little") + self.rate.to_bytes(4, "little") + (self.rate * self.channels * 2).to_bytes(4, "little") + (self.channels * 2).to_bytes(2, "little") + (16).to_bytes(2, "little")
+        body = b"WAVE" + b"fmt " + len(fmt).to_bytes(4, "little") + fmt + b"data" + len(data).to_bytes(4, "little") + data
+        self.winsound.PlaySound(b"RIFF" + len(body).to_bytes(4, "little") + body, self.winsound.SND_MEMORY | self.winsound.SND_NODEFAULT)
+
+    def close(self, abort=False):
+        pass
+
+    def interrupt(self):
+        self.winsound.PlaySound(None, 0)
+
+    def shutdown(self):
+        self.interrupt()
+
+# Функция для выбора вывода по имени из OUTPUT_NAMES или пути к .wav. auto - лучший из доступных.
+# Вывод недоступен (нет библиотеки) - RuntimeError
+def make_output(spec="auto"):
+    spec = (spec or "auto").strip()
+    if spec.lower().endswith(".wav"): return FileSinkOutput(spec)
+    spec = spec.lower()
+    if spec == "null": return NullOutput(realtime=True)
+    if spec in ("auto", "sounddevice"):
+        try:
+            return SoundDeviceOutput()
+        except Exception as e: # нет модуля или PortAudio
+            if spec == "sounddevice": raise RuntimeError(f"sounddevice is not available: {e}")
+            log.debug(f"sounddevice is not available: {e}")
+    if spec in ("auto", "winsound"):
+        if sys.platform == "win32": return WinsoundOutput()
+        if spec == "winsound": raise RuntimeError("winsound is available only on Windows")
+    if spec == "auto":
+        log.warning("No audio output for preview (pip install sounddevice), sounds go nowhere")
+        return NullOutput(realtime=True)
+    raise RuntimeError(f"Unknown preview output: {spec}")
+
+# Одно проигрывание: параметры, замеры и флаги, которые видны и главному потоку и потоку движка
+class Playback:
+    def __init__(self, path, gain, pitch):
+        self.path = path
+        self.gain = gain
+        self.pitch = pitch
+        self.requested = time.perf_counter()
+        self.cached = False # звук был в кэше декодированных
+        self.decode_seconds = 0.0
+        self.first_sample = None # секунды от запроса до первого блока в выводе
+        self.duration = 0.0 # длительность с учётом pitch
+        self.error = None
+        self.started = threading.Event() # первый блок отдан (или ошибка)
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    @property
+    def playing(self) -> bool:
+        return not self.finished.is_set()
+
+    # Строка для статуса и лога
+    def report(self) -> str:
+        if self.error is not None: return f"can't play: {self.error}"
+        if self.first_sample is None: return "nothing to play"
+        source = "cached" if self.cached else f"decoded in {self.decode_seconds * 1000:.1f} ms"
+        return f"{self.duration:.2f} s, first sample in {self.first_sample * 1000:.1f} ms ({source})"
+
+# Движок прослушивания: звуки играются по одному (новый останавливает старый) в своём потоке
+class PreviewPlayer:
+    def __init__(self, output=None, cache_bytes=PREVIEW_CACHE_BYTES, block_frames=PREVIEW_BLOCK_FRAMES):
+        self.output = output if output is not None else make_output()
+        self.buffers = DecodedBufferCache(cache_bytes)
+        self.block_frames = block_frames
+        self.current = None
+        self._output_lock = threading.Lock()
+
+    # Сыграть файл с громкостью gain и pitch в процентах. Возвращается сразу: прошлый звук только просят
+    # остановиться, вывод новому достанется когда прошлый его отпустит (через блок или сразу после декодирования)
+    def play(self, path, gain=1.0, pitch=100.0) -> Playback:
+        if not soundscripts_audio.available(): raise RuntimeError("NumPy is not installed (pip install numpy)")
+        self.stop(wait=False)
+        playback = Playback(path, gain, pitch)
+        self.current = playback
+        threading.Thread(target=self._run, args=(playback,), name="soundscripts_preview", daemon=True).start()
+        return playback
+
+    # Остановить текущий звук. wait - дождаться его потока (не из главного потока окна: декодирование большого
+    # файла не прерывается, поток остановится сразу после него)
+    def stop(self, wait=False):
+        playback = self.current
+        if playback is None or not playback.playing: return
+        playback._stop.set()
+        self.output.interrupt()
+        if wait and not playback.finished.wait(PREVIEW_STOP_TIMEOUT): log.warning(f"Preview of {playback.path} didn't stop in time")
+
+    # Поток движка: звук из кэша или декодируем, и блоками в вывод
+    def _run(self, playback):
+        np = soundscripts_audio.np
+        try:
+            if playback.stopped: return # остановили ещё до начала
+            started = time.perf_counter()
+            samples, rate, playback.cached = self.buffers.get(playback.path)
+            playback.decode_seconds = time.perf_counter() - started
+            playback.duration = len(samples) / rate / (playback.pitch / 100) if rate else 0.0
+            if not len(samples) or playback.stopped: return
+            blocks = stream_blocks(samples, playback.gain, playback.pitch, self.block_frames)
+            if not self.output.streaming: blocks = iter([np.concatenate(list(blocks))])
+            with self._output_lock:
+                self.output.open(rate, samples.shape[1])
+                try:
+                    for block in blocks:
+                        if playback.stopped: break
+                        if playback.first_sample is None:
+                            playback.first_sample = time.perf_counter() - playback.requested
+                            playback.started.set()
+                        self.output.write(block)
+                finally:
+                    self.output.close(abort=playback.stopped)
+        except Exception as e:
+            playback.error = e
+            log.warning(f"Can't preview {playback.path}: {e}")
+        finally:
+            playback.started.set()
+            playback.finished.set()
+
+    # При закрытии: остановить звук и освободить устройство
+    def shutdown(self):
+        self.stop(wait=True)
+        with self._output_lock:
+            self.output.shutdown()
+        self.buffers.clear()